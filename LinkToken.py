@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-import requests
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any, List, Optional
+import asyncio
+import hashlib
+import hmac
+import httpx
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 import logging
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError
 from plaid.api import plaid_api
 from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
 from plaid.model.products import Products
@@ -15,6 +18,11 @@ from plaid.model.link_token_create_request import LinkTokenCreateRequest
 from plaid.model.link_token_create_request_user import LinkTokenCreateRequestUser
 from plaid.configuration import Configuration
 from plaid.api_client import ApiClient
+import http_clients
+from ttl_cache import AsyncTTLCache
+import financial_profile
+from link_token_pool import LinkTokenPool, PooledToken, POOL_ENABLED
+from plaid_webhook import WebhookVerificationError, WebhookVerifier
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -44,7 +52,11 @@ validate_env_vars()
 PLAID_CLIENT_ID = os.getenv("PLAID_CLIENT_ID")
 PLAID_SECRET = os.getenv("PLAID_SECRET")
 PLAID_ENV = "sandbox"
-PLAID_BASE_URL = "https://sandbox.plaid.com"
+PLAID_BASE_URL = os.getenv("PLAID_BASE_URL", "https://sandbox.plaid.com")
+# Link로 요청하는 상품 (transactions는 소득 계산에 사용)
+PLAID_PRODUCTS = [p.strip() for p in os.getenv("PLAID_PRODUCTS", "auth,transactions").split(",") if p.strip()]
+# Plaid가 item 갱신 webhook을 보낼 주소 (예: https://api.example.com/plaid/webhook)
+PLAID_WEBHOOK_URL = os.getenv("PLAID_WEBHOOK_URL")
 
 # Plaid 클라이언트 초기화
 configuration = Configuration(
@@ -58,8 +70,134 @@ configuration = Configuration(
 api_client = ApiClient(configuration)
 client = plaid_api.PlaidApi(api_client)
 
+async def mint_link_token() -> PooledToken:
+    """Plaid에서 새 Link 토큰 발급 (임시 사용자 ID)"""
+    options = {"webhook": PLAID_WEBHOOK_URL} if PLAID_WEBHOOK_URL else {}
+    request = LinkTokenCreateRequest(
+        products=[Products(product) for product in PLAID_PRODUCTS],
+        client_name="Bestia Mortgage",
+        country_codes=[CountryCode('US')],
+        language='en',
+        user=LinkTokenCreateRequestUser(
+            client_user_id=str(uuid.uuid4())  # 임시 사용자 ID 생성
+        ),
+        **options
+    )
+
+    # 동기 SDK 호출은 스레드 풀에서 실행 (이벤트 루프 차단 방지)
+    response = await http_clients.run_blocking(client.link_token_create, request)
+    return PooledToken(
+        link_token=response['link_token'],
+        expiration=response['expiration'],
+        request_id=response['request_id'],
+    )
+
+# 미리 발급해 둔 Link 토큰 풀 (main.py lifespan에서 시작/정지)
+link_token_pool = LinkTokenPool(mint_link_token)
+
+# 계좌 잔액 캐시: TTL 안에는 캐시 값, 이후 stale 기간에는 이전 값을 반환하며 백그라운드 갱신
+BALANCE_TTL = float(os.getenv("PLAID_BALANCE_TTL_SECONDS", "30"))
+BALANCE_STALE_TTL = float(os.getenv("PLAID_BALANCE_STALE_SECONDS", "120"))
+# 배치 조회 요청당 최대 access token 수
+MAX_BALANCE_BATCH = int(os.getenv("PLAID_BALANCE_BATCH_MAX", "20"))
+balance_cache = AsyncTTLCache(
+    ttl=BALANCE_TTL,
+    stale_ttl=BALANCE_STALE_TTL,
+    name="plaid-balances",
+    max_entries=int(os.getenv("PLAID_BALANCE_CACHE_ENTRIES", "1024")),
+)
+
+def token_key(access_token: str) -> str:
+    """캐시 키로 쓰는 access token의 HMAC 해시 (평문 토큰은 캐시/로그에 남기지 않음)"""
+    return hmac.new(PLAID_SECRET.encode(), access_token.encode(), hashlib.sha256).hexdigest()
+
+async def fetch_account_balances(access_token: str) -> Dict[str, Any]:
+    """Plaid /accounts/balance/get 호출 (공유 연결 풀 사용)"""
+    response = await http_clients.plaid.post(
+        f"{PLAID_BASE_URL}/accounts/balance/get",
+        headers={"Content-Type": "application/json"},
+        json={
+            "client_id": PLAID_CLIENT_ID,
+            "secret": PLAID_SECRET,
+            "access_token": access_token
+        }
+    )
+
+    if response.status_code != 200:
+        logger.error(f"Account fetch failed: {response.text}")
+        raise HTTPException(status_code=400, detail="계좌 정보 조회 실패")
+
+    return response.json()
+
+async def get_account_balances(access_token: str, fresh: bool = False) -> Dict[str, Any]:
+    """캐시를 거쳐 계좌 잔액 조회 (같은 토큰의 동시 조회는 한 번만 실행)"""
+    return await balance_cache.get(
+        token_key(access_token),
+        lambda: fetch_account_balances(access_token),
+        force_refresh=fresh,
+    )
+
+def invalidate_account_balances(access_token: str):
+    balance_cache.invalidate(token_key(access_token))
+
+async def fetch_transactions(access_token: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """Plaid /transactions/get으로 기간 내 거래 전체 조회 (페이지 단위)"""
+    transactions: List[Dict[str, Any]] = []
+    while True:
+        response = await http_clients.plaid.post(
+            f"{PLAID_BASE_URL}/transactions/get",
+            headers={"Content-Type": "application/json"},
+            json={
+                "client_id": PLAID_CLIENT_ID,
+                "secret": PLAID_SECRET,
+                "access_token": access_token,
+                "start_date": start_date,
+                "end_date": end_date,
+                "options": {"count": 500, "offset": len(transactions)}
+            }
+        )
+        if response.status_code != 200:
+            raise Exception(f"거래 내역 조회 실패: {response.text}")
+
+        data = response.json()
+        transactions.extend(data["transactions"])
+        if not data["transactions"] or len(transactions) >= data["total_transactions"]:
+            return transactions
+
+# item별 소득/부채 프로필 (갱신 실패 시 캐시된 잔액으로 계산하지 않도록 Plaid에서 직접 조회)
+profile_service = financial_profile.get_service()
+profile_service.configure(
+    fetch_balances=fetch_account_balances,
+    fetch_transactions=fetch_transactions,
+)
+
+async def fetch_webhook_verification_key(key_id: str) -> Dict[str, Any]:
+    """Plaid /webhook_verification_key/get으로 webhook 서명 공개 키(JWK) 조회"""
+    response = await http_clients.plaid.post(
+        f"{PLAID_BASE_URL}/webhook_verification_key/get",
+        headers={"Content-Type": "application/json"},
+        json={
+            "client_id": PLAID_CLIENT_ID,
+            "secret": PLAID_SECRET,
+            "key_id": key_id
+        }
+    )
+    if response.status_code != 200:
+        raise Exception(f"Webhook 검증 키 조회 실패: {response.text}")
+    return response.json()["key"]
+
+# webhook 서명 검증 (공개 키는 kid별로 캐시)
+webhook_verifier = WebhookVerifier(fetch_webhook_verification_key)
+
+# 프로필을 다시 계산하는 Plaid webhook (webhook_type -> webhook_code, None이면 모든 코드)
+PROFILE_REFRESH_WEBHOOKS = {
+    "TRANSACTIONS": None,
+    "ITEM": {"LOGIN_REPAIRED", "NEW_ACCOUNTS_AVAILABLE"},
+}
+
 class PublicTokenRequest(BaseModel):
     public_token: str
+    user_id: Optional[str] = None
 
     class Config:
         schema_extra = {
@@ -73,12 +211,31 @@ class LinkTokenResponse(BaseModel):
     expiration: str
     request_id: str
 
+class AccountBatchRequest(BaseModel):
+    access_tokens: List[str] = Field(..., min_length=1, description="Plaid access tokens")
+    fresh: bool = Field(False, description="Bypass the balance cache")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "access_tokens": ["access-sandbox-xxx", "access-sandbox-yyy"],
+                "fresh": False
+            }
+        }
+
 class AccountResponse(BaseModel):
     access_token: str
+    item_id: Optional[str] = None
     accounts: list
-    income: float
-    debt: float
-    credit_score: int
+    # 연 소득, 월 부채 상환액 (거래 내역이 아직 준비되지 않았으면 None)
+    income: Optional[float] = None
+    debt: Optional[float] = None
+    credit_score: Optional[int] = None
+
+class PlaidWebhook(BaseModel):
+    webhook_type: str
+    webhook_code: str
+    item_id: Optional[str] = None
 
 @router.get("/create_link_token",
     response_model=LinkTokenResponse,
@@ -102,23 +259,20 @@ class AccountResponse(BaseModel):
 )
 async def create_link_token():
     try:
-        # Link 토큰 생성 요청
-        request = LinkTokenCreateRequest(
-            products=[Products("auth")],
-            client_name="Bestia Mortgage",
-            country_codes=[CountryCode('US')],
-            language='en',
-            user=LinkTokenCreateRequestUser(
-                client_user_id=str(uuid.uuid4())  # 임시 사용자 ID 생성
-            )
-        )
-        
-        response = client.link_token_create(request)
-        return {"link_token": response['link_token']}
+        # 풀에 남은 토큰을 바로 내주고, 비어 있으면 그 자리에서 발급
+        token = await link_token_pool.take() if POOL_ENABLED else await mint_link_token()
+        return token.as_response()
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/create_link_token/pool-stats",
+    response_model=Dict[str, Any],
+    summary="Link token pool statistics",
+    description="Returns size, watermarks and hit counters of the prefetched Link token pool")
+async def link_token_pool_stats():
+    return link_token_pool.stats()
+
 @router.post("/api/set_access_token",
     response_model=Dict[str, str],
     summary="Exchange public token for access token",
@@ -137,6 +291,7 @@ async def create_link_token():
             }
         },
         400: {"description": "Missing public token"},
+        409: {"description": "Item is already linked to another user"},
         500: {"description": "Plaid API error"}
     }
 )
@@ -150,13 +305,15 @@ async def set_access_token(request_data: dict):
         exchange_request = ItemPublicTokenExchangeRequest(
             public_token=public_token
         )
-        exchange_response = client.item_public_token_exchange(exchange_request)
+        exchange_response = await http_clients.run_blocking(
+            client.item_public_token_exchange, exchange_request
+        )
         
         access_token = exchange_response['access_token']
         item_id = exchange_response['item_id']
 
-        # 여기서 access_token을 저장하거나 다른 처리를 할 수 있습니다
-        # 예: 데이터베이스에 저장
+        # item 저장 + 소득/부채 프로필 계산 (user_id가 없으면 item_id로 조회)
+        await profile_service.link_item(request_data.get('user_id') or item_id, item_id, access_token)
 
         return {
             "access_token": access_token,
@@ -164,6 +321,10 @@ async def set_access_token(request_data: dict):
             "property_id": request_data.get('property_id')
         }
 
+    except HTTPException:
+        raise
+    except financial_profile.ItemOwnerConflict:
+        raise HTTPException(status_code=409, detail="This Plaid item is already linked to another user")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -188,7 +349,7 @@ async def exchange_token(request: PublicTokenRequest):
         logger.info("Exchanging public token for access token")
         url = f"{PLAID_BASE_URL}/item/public_token/exchange"
         
-        response = requests.post(
+        response = await http_clients.plaid.post(
             url,
             headers={"Content-Type": "application/json"},
             json={
@@ -204,30 +365,126 @@ async def exchange_token(request: PublicTokenRequest):
                 detail=f"Token exchange failed: {response.text}"
             )
             
-        # Sandbox 테스트 데이터 추가
+        data = response.json()
+        access_token = data.get("access_token")
+        item_id = data.get("item_id")
+
+        # item 저장 + Plaid 잔액/거래 내역으로 소득/부채 계산 (user_id가 없으면 item_id로 조회)
+        profile = await profile_service.link_item(request.user_id or item_id, item_id, access_token) or {}
         return {
-            "access_token": response.json().get("access_token"),
-            "accounts": [],
-            # 테스트용 더미 데이터
-            "income": 120000,  # 연봉 $120,000
-            "debt": 15000,    # 부채 $15,000
-            "credit_score": 720  # 신용점수 720
+            "access_token": access_token,
+            "item_id": item_id,
+            "accounts": profile.get("accounts", []),
+            "income": profile.get("income"),
+            "debt": profile.get("debt"),
+            # Plaid는 신용점수를 제공하지 않음
+            "credit_score": None
         }
 
+    except HTTPException:
+        raise
+    except financial_profile.ItemOwnerConflict:
+        raise HTTPException(status_code=409, detail="This Plaid item is already linked to another user")
     except Exception as e:
         logger.error(f"Token exchange error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/plaid/webhook",
+    response_model=Dict[str, str],
+    summary="Receive Plaid webhooks",
+    description="Verifies the Plaid-Verification signature and schedules a background refresh of the financial profile when Plaid reports new item data",
+    responses={401: {"description": "Missing or invalid Plaid-Verification signature"}})
+async def plaid_webhook(request: Request):
+    # 서명은 원본 본문의 해시를 포함하므로 파싱 전에 바이트 그대로 검증
+    body = await request.body()
+    try:
+        await webhook_verifier.verify(body, request.headers.get("Plaid-Verification"))
+    except WebhookVerificationError as e:
+        logger.warning(f"Rejected Plaid webhook: {e}")
+        raise HTTPException(status_code=401, detail="Invalid Plaid webhook signature")
+    try:
+        webhook = PlaidWebhook.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    codes = PROFILE_REFRESH_WEBHOOKS.get(webhook.webhook_type, set())
+    if not webhook.item_id or (codes is not None and webhook.webhook_code not in codes):
+        return {"status": "ignored"}
+
+    item = await http_clients.run_blocking(profile_service.store.item, webhook.item_id)
+    if item is None:
+        logger.warning(f"Webhook {webhook.webhook_type}/{webhook.webhook_code} for unknown item {webhook.item_id}")
+        return {"status": "ignored"}
+
+    logger.info(f"Webhook {webhook.webhook_type}/{webhook.webhook_code}: refreshing item {webhook.item_id}")
+    invalidate_account_balances(item["access_token"])
+    profile_service.schedule_refresh(webhook.item_id)
+    return {"status": "scheduled"}
+
+@router.get("/plaid/profiles/stats",
+    response_model=Dict[str, Any],
+    summary="Get financial profile store stats",
+    description="Returns item/profile counts and refresh counters of the financial profile service")
+async def get_profile_stats():
+    return await profile_service.stats()
+
+@router.get("/accounts/cache/stats",
+    response_model=Dict[str, Any],
+    summary="Get account balance cache stats",
+    description="Returns hit/stale/coalesced counters of the account balance cache")
+async def get_account_cache_stats():
+    return balance_cache.stats()
+
+@router.post("/accounts/batch",
+    response_model=Dict[str, Any],
+    summary="Get account information for several items",
+    description="Fetches account balances for several access tokens concurrently; results keep the request order")
+async def get_accounts_batch(request: AccountBatchRequest):
+    """
+    Retrieves account information for several Plaid items
+
+    Args:
+        request (AccountBatchRequest): Access tokens and the cache bypass flag
+
+    Returns:
+        Dict[str, Any]: Per-item results in request order (status "ok" with data, or "error")
+    """
+    if len(request.access_tokens) > MAX_BALANCE_BATCH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch size exceeds the limit of {MAX_BALANCE_BATCH} access tokens"
+        )
+
+    logger.info(f"Fetching account information for {len(request.access_tokens)} items")
+    outcomes = await asyncio.gather(
+        *(get_account_balances(token, request.fresh) for token in request.access_tokens),
+        return_exceptions=True
+    )
+
+    results = []
+    for outcome in outcomes:
+        if isinstance(outcome, HTTPException):
+            results.append({"status": "error", "status_code": outcome.status_code, "detail": outcome.detail})
+        elif isinstance(outcome, httpx.HTTPError):
+            results.append({"status": "error", "status_code": 503, "detail": "Plaid 서비스 연결 실패"})
+        elif isinstance(outcome, Exception):
+            logger.error(f"Account fetch error: {str(outcome)}")
+            results.append({"status": "error", "status_code": 500, "detail": "내부 서버 오류"})
+        else:
+            results.append({"status": "ok", "data": outcome})
+    return {"results": results}
+
 @router.get("/accounts/{access_token}",
     response_model=Dict[str, Any],
     summary="Get account information",
-    description="Retrieves account information using an access token")
-async def get_accounts(access_token: str):
+    description="Retrieves account information using an access token (cached briefly; fresh=1 bypasses the cache)")
+async def get_accounts(access_token: str, fresh: bool = False):
     """
     Retrieves account information from Plaid
     
     Args:
         access_token (str): The access token for the Plaid API
+        fresh (bool): Skip the cache and fetch current balances from Plaid
     
     Returns:
         Dict[str, Any]: Account information from Plaid
@@ -237,25 +494,13 @@ async def get_accounts(access_token: str):
     """
     try:
         logger.info("Fetching account information")
-        response = requests.post(
-            f"https://{PLAID_ENV}.plaid.com/accounts/balance/get",
-            headers={"Content-Type": "application/json"},
-            json={
-                "client_id": PLAID_CLIENT_ID,
-                "secret": PLAID_SECRET,
-                "access_token": access_token
-            }
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"Account fetch failed: {response.text}")
-            raise HTTPException(status_code=400, detail="계좌 정보 조회 실패")
-            
-        return response.json()
+        return await get_account_balances(access_token, fresh)
 
-    except requests.exceptions.RequestException as e:
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
         logger.error(f"Network error fetching accounts: {str(e)}")
         raise HTTPException(status_code=503, detail="Plaid 서비스 연결 실패")
     except Exception as e:
         logger.error(f"Account fetch error: {str(e)}")
-        raise HTTPException(status_code=500, detail="내부 서버 오류")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="내부 서버 오류")
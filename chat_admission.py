@@ -0,0 +1,247 @@
+"""OpenAI 호출 동시성 제한, 공정 대기열, 재시도, 요청 병합
+
+- 동시 요청 수를 max_concurrency로 제한하고, 자리가 없으면 사용자별 대기열에 넣어
+  사용자 사이를 돌아가며(round-robin) 자리를 배정합니다. 한 사용자의 폭주가 다른
+  사용자의 대기 시간을 늘리지 않습니다.
+- max_wait 안에 자리를 얻지 못하거나 사용자 대기열이 가득 차면 AdmissionRejected
+- 429/5xx/연결 오류는 지터를 준 지수 백오프로 재시도 (Retry-After 헤더 우선)
+- 같은 키(동일 프롬프트)로 동시에 들어온 요청은 한 번만 호출하고 결과를 공유
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+# 자리를 기다리는 최대 시간과 사용자당 최대 대기 요청 수
+MAX_QUEUE_WAIT = float(os.getenv("OPENAI_QUEUE_MAX_WAIT_SECONDS", "10"))
+MAX_QUEUED_PER_USER = int(os.getenv("OPENAI_QUEUE_MAX_PER_USER", "4"))
+# 재시도 (지수 백오프 + full jitter)
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY_SECONDS", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY_SECONDS", "8"))
+# 대기 시간 통계에 쓰는 최근 표본 수
+WAIT_SAMPLES = 1000
+
+
+class AdmissionRejected(Exception):
+    """대기 시간 초과 또는 대기열 초과로 요청을 받지 못함"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def request_key(**params: Any) -> str:
+    """요청 병합용 키 (모델, 파라미터, 메시지 전체의 해시)"""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Ticket:
+    """배정된 자리. release()는 여러 번 불러도 한 번만 반환"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """OpenAI 호출 수락 제어기 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_wait: float = MAX_QUEUE_WAIT,
+        max_queued_per_user: int = MAX_QUEUED_PER_USER,
+        max_retries: int = MAX_RETRIES,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.max_queued_per_user = max_queued_per_user
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._active = 0
+        # 사용자별 대기 future (앞에 있는 사용자부터 한 건씩 돌아가며 배정)
+        self._queues: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self._queued = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_timeout": 0,
+            "rejected_queue_full": 0,
+            "retries": 0,
+            "coalesced": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+        }
+
+    async def acquire(self, user_id: Hashable) -> Ticket:
+        """자리를 얻을 때까지 대기 (max_wait 초과 시 AdmissionRejected)"""
+        started = time.monotonic()
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._admitted(started)
+            return Ticket(self)
+
+        queue = self._queues.get(user_id)
+        if queue is not None and len(queue) >= self.max_queued_per_user:
+            self._metrics["rejected_queue_full"] += 1
+            raise AdmissionRejected("Too many pending chat requests for this user", self.max_wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user_id, deque()).append(future)
+        self._queued += 1
+        self._metrics["queued"] += 1
+        self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], self._queued)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 배정과 동시에 취소/만료되면 받은 자리를 돌려줌
+                Ticket(self).release()
+            else:
+                future.cancel()
+                self._discard(user_id, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self._metrics["rejected_timeout"] += 1
+                raise AdmissionRejected("Chat service is busy; please retry", self.max_wait)
+            raise
+        self._admitted(started)
+        return Ticket(self)
+
+    @asynccontextmanager
+    async def slot(self, user_id: Hashable) -> AsyncIterator[Ticket]:
+        ticket = await self.acquire(user_id)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _admitted(self, started: float):
+        self._metrics["admitted"] += 1
+        self._waits.append(time.monotonic() - started)
+
+    def _discard(self, user_id: Hashable, future: asyncio.Future):
+        queue = self._queues.get(user_id)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self._queued -= 1
+            if not queue:
+                del self._queues[user_id]
+
+    def _release(self):
+        self._active -= 1
+        # 대기 중인 사용자들에게 돌아가며 한 건씩 자리 배정
+        while self._active < self.max_concurrency and self._queues:
+            user_id, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            if not future.done():
+                self._active += 1
+                future.set_result(None)
+
+    async def with_retries(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """재시도 가능한 오류(429/5xx/연결 오류)에 지터를 준 지수 백오프로 재시도"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await call()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    if not isinstance(e, AdmissionRejected):
+                        self._metrics["failures"] += 1
+                    raise
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                hinted = retry_after_seconds(e)
+                if hinted is not None:
+                    delay = min(max(delay, hinted), self.max_delay)
+                self._metrics["retries"] += 1
+                logger.warning(f"OpenAI call failed ({type(e).__name__}); retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def call(self, user_id: Hashable, call: Callable[[], Awaitable[Any]], key: Optional[str] = None) -> Any:
+        """자리 배정 + 재시도 + 요청 병합을 거쳐 호출
+
+        재시도 사이의 대기 동안에는 자리를 반납해 다른 요청이 쓸 수 있게 합니다.
+        """
+        if key is not None and key in self._inflight:
+            self._metrics["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        async def attempt():
+            async with self.slot(user_id):
+                return await call()
+
+        if key is None:
+            return await self.with_retries(attempt)
+
+        future = asyncio.ensure_future(self.with_retries(attempt))
+        self._inflight[key] = future
+
+        def finished(done: asyncio.Future):
+            self._inflight.pop(key, None)
+            # 모든 대기자가 취소되어도 예외가 "회수되지 않음" 경고로 남지 않도록
+            done.cancelled() or done.exception()
+
+        future.add_done_callback(finished)
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def percentile(q: float) -> Optional[float]:
+            return round(waits[min(int(q * len(waits)), len(waits) - 1)], 4) if waits else None
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "queue_depth": self._queued,
+            "queued_users": len(self._queues),
+            "inflight_coalescing_keys": len(self._inflight),
+            **self._metrics,
+            "wait_seconds": {
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 4) if waits else None,
+            },
+        }
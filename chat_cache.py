@@ -0,0 +1,246 @@
+"""반복되는 챗봇 질문의 응답 캐시
+
+두 단계로 조회합니다.
+- 정확 일치: 정규화한 질문 + 관련 mortgage_data 필드의 해시
+- 유사 일치(선택): mortgage_data 맥락과 질문 속 숫자가 모두 같은 질문 중 단어/문자
+  n-gram 해싱 벡터의 코사인 유사도가 임계값 이상인 질문 (금액만 다른 질문은
+  표현이 비슷해도 다른 답이 필요하므로 제외)
+
+이전 대화가 있으면 답변이 그 맥락에 따라 달라지므로, 프롬프트에 들어가는 이전
+턴 전체의 해시를 맥락에 포함하고 유사 일치는 같은 사용자의 대화 안에서만 찾습니다.
+이전 대화가 없는 첫 질문은 사용자와 관계없이 공유됩니다.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.getenv("CHAT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2048"))
+# 유사 일치로 인정하는 코사인 유사도 (0이면 유사 단계 사용 안 함)
+SIMILARITY_THRESHOLD = float(os.getenv("CHAT_CACHE_SIMILARITY", "0.9"))
+# n-gram 해싱 벡터 차원
+VECTOR_DIM = 1 << 12
+
+# 답변에 영향을 주지 않는 mortgage_data 필드 (사용자 식별자 등)
+IGNORED_CONTEXT_FIELDS = frozenset({"userId"})
+
+_NUMBER = re.compile(r"\$?\d[\d,]*(?:\.\d+)?")
+_NON_WORD = re.compile(r"[^\w$%.]+")
+_NORMALIZED_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_prompt(text: str) -> str:
+    """대소문자, 공백, 문장부호, 숫자 표기($500,000 → 500000) 차이를 제거"""
+    text = _NUMBER.sub(lambda m: m.group(0).replace("$", "").replace(",", ""), text.lower())
+    text = _NON_WORD.sub(" ", text)
+    return " ".join(word.strip(".") for word in text.split() if word.strip("."))
+
+
+def context_key(mortgage_data: Optional[Dict[str, Any]]) -> str:
+    """답변에 영향을 주는 mortgage_data 필드의 해시"""
+    relevant = {
+        name: value for name, value in (mortgage_data or {}).items()
+        if name not in IGNORED_CONTEXT_FIELDS
+    }
+    payload = json.dumps(relevant, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def history_key(history: Sequence[Dict[str, str]]) -> str:
+    """이전 대화 턴(역할 + 정규화한 내용)의 해시 (이전 대화가 없으면 빈 문자열)"""
+    if not history:
+        return ""
+    turns: List[List[str]] = [[turn["role"], normalize_prompt(turn["content"])] for turn in history]
+    payload = json.dumps(turns, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def conversation_scope(
+    mortgage_data: Optional[Dict[str, Any]], history: Sequence[Dict[str, str]], user_id: Optional[str]
+) -> Tuple[str, str]:
+    """(정확 일치 맥락, 유사 일치 범위)
+
+    이전 대화가 있으면 정확 일치 맥락에 대화 해시를 넣고, 유사 일치 범위는 해당
+    사용자로 한정합니다.
+    """
+    context = context_key(mortgage_data)
+    if not history:
+        return context, context
+    context = f"{context}|{history_key(history)}"
+    return context, f"{context}|{user_id}"
+
+
+def similarity_bucket(normalized: str, context: str) -> str:
+    """유사 일치 후보 범위: 같은 맥락 + 같은 숫자 목록"""
+    return context + "|" + " ".join(_NORMALIZED_NUMBER.findall(normalized))
+
+
+def _features(normalized: str) -> Iterable[str]:
+    words = normalized.split()
+    yield from words
+    yield from (f"{a} {b}" for a, b in zip(words, words[1:]))
+    padded = f" {normalized} "
+    yield from (padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def ngram_vector(normalized: str) -> np.ndarray:
+    """단어 1/2-gram과 문자 3-gram을 해싱한 L2 정규화 벡터"""
+    vector = np.zeros(VECTOR_DIM, dtype='float32')
+    for feature in _features(normalized):
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % VECTOR_DIM
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+@dataclass
+class CachedResponse:
+    content: str
+    bucket: str
+    vector: Optional[np.ndarray]
+    expires_at: float
+
+
+class ResponseCache:
+    """TTL + 크기 제한 LRU 응답 캐시 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(
+        self,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        # 유사 일치 후보 범위별 키 목록
+        self._by_bucket: Dict[str, Dict[str, None]] = {}
+        self._metrics = {
+            "exact_hits": 0,
+            "similar_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+    @staticmethod
+    def make_key(normalized: str, context: str) -> str:
+        return hashlib.sha256(f"{context}\0{normalized}".encode()).hexdigest()
+
+    def lookup(
+        self,
+        prompt: str,
+        mortgage_data: Optional[Dict[str, Any]],
+        history: Sequence[Dict[str, str]] = (),
+        user_id: Optional[str] = None,
+    ) -> Tuple[Optional[str], str]:
+        """캐시된 답변 조회
+
+        Args:
+            history: 이번 질문 이전의 대화 턴 (프롬프트에 들어가는 것과 같은 범위)
+        Returns:
+            (답변 또는 None, 조회 결과: "exact" | "similar" | "miss")
+        """
+        normalized = normalize_prompt(prompt)
+        context, scope = conversation_scope(mortgage_data, history, user_id)
+        now = time.monotonic()
+
+        key = self.make_key(normalized, context)
+        entry = self._get_live(key, now)
+        if entry is not None:
+            self._metrics["exact_hits"] += 1
+            return entry.content, "exact"
+
+        if self.similarity_threshold > 0:
+            similar = self._find_similar(ngram_vector(normalized), similarity_bucket(normalized, scope), now)
+            if similar is not None:
+                self._metrics["similar_hits"] += 1
+                return similar.content, "similar"
+
+        self._metrics["misses"] += 1
+        return None, "miss"
+
+    def store(
+        self,
+        prompt: str,
+        mortgage_data: Optional[Dict[str, Any]],
+        content: str,
+        history: Sequence[Dict[str, str]] = (),
+        user_id: Optional[str] = None,
+    ):
+        normalized = normalize_prompt(prompt)
+        context, scope = conversation_scope(mortgage_data, history, user_id)
+        key = self.make_key(normalized, context)
+        vector = ngram_vector(normalized) if self.similarity_threshold > 0 else None
+        bucket = similarity_bucket(normalized, scope)
+
+        self._remove(key)
+        self._entries[key] = CachedResponse(content, bucket, vector, time.monotonic() + self.ttl)
+        self._by_bucket.setdefault(bucket, {})[key] = None
+        self._metrics["stores"] += 1
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._metrics["evictions"] += 1
+
+    def _get_live(self, key: str, now: float) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now >= entry.expires_at:
+            self._remove(key)
+            self._metrics["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _find_similar(self, vector: np.ndarray, bucket: str, now: float) -> Optional[CachedResponse]:
+        keys = list(self._by_bucket.get(bucket, ()))
+        if not keys:
+            return None
+        matrix = np.stack([self._entries[key].vector for key in keys])
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        return self._get_live(keys[best], now)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_bucket.get(entry.bucket)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self._by_bucket[entry.bucket]
+
+    def clear(self):
+        self._entries.clear()
+        self._by_bucket.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._metrics["exact_hits"] + self._metrics["similar_hits"]
+        lookups = hits + self._metrics["misses"]
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            **self._metrics,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
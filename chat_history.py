@@ -0,0 +1,281 @@
+"""챗봇 대화 기록 저장소
+
+- MemoryHistoryStore: 사용자별 링 버퍼(최근 N턴) + 유휴 사용자 TTL/LRU 제거 + 전체 메모리 한도
+- SQLiteHistoryStore: 여러 uvicorn 워커가 같은 대화를 보도록 공유하는 로컬 DB 저장소
+
+CHAT_HISTORY_BACKEND 환경 변수("memory" 또는 "sqlite")로 선택합니다.
+"""
+import logging
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import http_clients
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BACKEND = os.getenv("CHAT_HISTORY_BACKEND", "memory")
+# 사용자별로 보관하는 최대 메시지 수
+MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "20"))
+# 마지막 대화 이후 이 시간이 지나면 기록 삭제
+IDLE_TTL = float(os.getenv("CHAT_HISTORY_IDLE_TTL_SECONDS", str(24 * 3600)))
+# 메모리 저장소 한도 (사용자 수, 메시지 내용 바이트)
+MAX_USERS = int(os.getenv("CHAT_HISTORY_MAX_USERS", "10000"))
+MAX_BYTES = int(os.getenv("CHAT_HISTORY_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_DB_PATH = Path(__file__).parent / 'data' / 'chat_history.sqlite3'
+DB_PATH = Path(os.getenv("CHAT_HISTORY_DB_PATH", DEFAULT_DB_PATH))
+
+# 메시지 하나당 내용 외 고정 비용 추정치 (dict, 문자열 객체 헤더 등)
+MESSAGE_OVERHEAD_BYTES = 200
+
+
+def message_size(message: Dict[str, str]) -> int:
+    return len(message["content"].encode("utf-8")) + MESSAGE_OVERHEAD_BYTES
+
+
+class HistoryStore(ABC):
+    """대화 기록 저장소 인터페이스 (메시지는 {"role", "content"} 딕셔너리)"""
+
+    @abstractmethod
+    async def append(self, user_id: str, message: Dict[str, str]):
+        ...
+
+    @abstractmethod
+    async def recent(self, user_id: str, limit: int) -> List[Dict[str, str]]:
+        """최근 limit개 메시지 (오래된 순)"""
+
+    @abstractmethod
+    async def clear(self, user_id: str):
+        ...
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        ...
+
+
+@dataclass
+class UserHistory:
+    messages: Deque[Dict[str, str]]
+    last_seen: float
+    size_bytes: int = 0
+
+
+class MemoryHistoryStore(HistoryStore):
+    """워커 프로세스 메모리의 대화 기록
+
+    사용자 순서를 최근 사용 순으로 유지하므로 가장 오래 쉬고 있는 사용자부터
+    TTL 만료, 사용자 수 초과, 메모리 한도 초과 순으로 제거합니다. 한 사용자만
+    남아도 메모리 한도를 넘으면 그 사용자의 오래된 메시지를 잘라냅니다.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = MAX_TURNS,
+        idle_ttl: float = IDLE_TTL,
+        max_users: int = MAX_USERS,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_users = max_users
+        self.max_bytes = max_bytes
+        self._users: "OrderedDict[str, UserHistory]" = OrderedDict()
+        self._total_bytes = 0
+        self._evicted = {"ttl": 0, "users": 0, "bytes": 0}
+        # 메모리 한도 때문에 현재 사용자에게서 잘라낸 오래된 메시지 수
+        self._trimmed = 0
+
+    async def append(self, user_id: str, message: Dict[str, str]):
+        now = time.monotonic()
+        history = self._users.get(user_id)
+        if history is None:
+            history = self._users[user_id] = UserHistory(deque(maxlen=self.max_turns), now)
+        else:
+            self._users.move_to_end(user_id)
+            history.last_seen = now
+
+        if len(history.messages) == self.max_turns:
+            # 링 버퍼에서 밀려날 메시지 크기 차감
+            dropped = message_size(history.messages[0])
+            history.size_bytes -= dropped
+            self._total_bytes -= dropped
+        history.messages.append(message)
+        size = message_size(message)
+        history.size_bytes += size
+        self._total_bytes += size
+        self._evict(now, keep=user_id)
+
+    async def recent(self, user_id: str, limit: int) -> List[Dict[str, str]]:
+        history = self._users.get(user_id)
+        if history is None:
+            return []
+        if time.monotonic() - history.last_seen > self.idle_ttl:
+            self._remove(user_id, "ttl")
+            return []
+        return list(history.messages)[-limit:] if limit > 0 else []
+
+    async def clear(self, user_id: str):
+        if user_id in self._users:
+            self._total_bytes -= self._users.pop(user_id).size_bytes
+
+    def _remove(self, user_id: str, reason: str):
+        self._total_bytes -= self._users.pop(user_id).size_bytes
+        self._evicted[reason] += 1
+
+    def _evict(self, now: float, keep: str):
+        while self._users:
+            user_id, history = next(iter(self._users.items()))
+            if user_id == keep:
+                break
+            if now - history.last_seen > self.idle_ttl:
+                reason = "ttl"
+            elif len(self._users) > self.max_users:
+                reason = "users"
+            elif self._total_bytes > self.max_bytes:
+                reason = "bytes"
+            else:
+                break
+            self._remove(user_id, reason)
+
+        # 다른 사용자를 모두 제거해도 한도를 넘으면 현재 사용자의 오래된 메시지부터 삭제
+        # (방금 추가한 메시지는 남김)
+        history = self._users.get(keep)
+        while history is not None and self._total_bytes > self.max_bytes and len(history.messages) > 1:
+            dropped = message_size(history.messages.popleft())
+            history.size_bytes -= dropped
+            self._total_bytes -= dropped
+            self._trimmed += 1
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "users": len(self._users),
+            "messages": sum(len(history.messages) for history in self._users.values()),
+            "bytes": self._total_bytes,
+            "max_turns": self.max_turns,
+            "max_users": self.max_users,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl,
+            "evicted": dict(self._evicted),
+            "trimmed_messages": self._trimmed,
+        }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_messages_user ON chat_messages (user_id, id);
+CREATE INDEX IF NOT EXISTS chat_messages_created ON chat_messages (created_at);
+"""
+
+
+class SQLiteHistoryStore(HistoryStore):
+    """여러 워커가 공유하는 SQLite 대화 기록
+
+    사용자별로 최근 max_turns개만 남기고, 유휴 사용자는 주기적으로 정리합니다.
+    DB 호출은 공유 스레드 풀에서 실행합니다.
+    """
+
+    def __init__(self, path: Path = DB_PATH, max_turns: int = MAX_TURNS, idle_ttl: float = IDLE_TTL):
+        self.path = Path(path)
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self._initialized = False
+        self._last_purge = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _append(self, user_id: str, message: Dict[str, str]):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO chat_messages (user_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, message["role"], message["content"], now),
+            )
+            # 링 버퍼처럼 최근 max_turns개만 유지
+            conn.execute(
+                "DELETE FROM chat_messages WHERE user_id = ? AND id <= ("
+                " SELECT id FROM chat_messages WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (user_id, user_id, self.max_turns),
+            )
+            if now - self._last_purge > min(self.idle_ttl, 3600):
+                self._last_purge = now
+                conn.execute(
+                    "DELETE FROM chat_messages WHERE user_id IN ("
+                    " SELECT user_id FROM chat_messages GROUP BY user_id HAVING MAX(created_at) < ?)",
+                    (now - self.idle_ttl,),
+                )
+
+    def _recent(self, user_id: str, limit: int) -> List[Dict[str, str]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT role, content, created_at FROM chat_messages WHERE user_id = ?"
+                " ORDER BY id DESC LIMIT ?",
+                (user_id, limit),
+            ).fetchall()
+        if not rows or time.time() - rows[0]["created_at"] > self.idle_ttl:
+            return []
+        return [{"role": row["role"], "content": row["content"]} for row in reversed(rows)]
+
+    def _clear(self, user_id: str):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM chat_messages WHERE user_id = ?", (user_id,))
+
+    def _stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(DISTINCT user_id) AS users, COUNT(*) AS messages FROM chat_messages"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": str(self.path),
+            "users": row["users"],
+            "messages": row["messages"],
+            "max_turns": self.max_turns,
+            "idle_ttl_seconds": self.idle_ttl,
+        }
+
+    async def append(self, user_id: str, message: Dict[str, str]):
+        await http_clients.run_blocking(self._append, user_id, message)
+
+    async def recent(self, user_id: str, limit: int) -> List[Dict[str, str]]:
+        if limit <= 0:
+            return []
+        return await http_clients.run_blocking(self._recent, user_id, limit)
+
+    async def clear(self, user_id: str):
+        await http_clients.run_blocking(self._clear, user_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await http_clients.run_blocking(self._stats)
+
+
+def create_history_store(backend: Optional[str] = None) -> HistoryStore:
+    backend = backend or HISTORY_BACKEND
+    if backend == "sqlite":
+        logger.info(f"Using SQLite chat history at {DB_PATH}")
+        return SQLiteHistoryStore()
+    if backend != "memory":
+        raise ValueError(f"Unknown chat history backend: {backend}")
+    return MemoryHistoryStore()
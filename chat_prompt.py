@@ -0,0 +1,176 @@
+"""토큰 예산에 맞춘 챗봇 프롬프트 구성
+
+- 정적 시스템 프롬프트 + mortgage_data 요약(시스템 메시지) + 대화 기록
+- 대화 기록은 최신 메시지부터 예산 안에 들어가는 만큼 그대로 넣고, 들어가지
+  않는 이전 메시지는 앞부분만 남긴 짧은 요약 하나로 압축합니다.
+
+토큰 수는 tiktoken이 설치되어 있으면 그것으로, 없으면 글자/단어 수 기반
+추정치로 계산합니다 (네트워크 호출 없음).
+"""
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트 전체(시스템 + 요약 + 기록) 토큰 예산
+PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "3000"))
+# 예산을 넘는 이전 대화 요약에 쓰는 최대 토큰
+HISTORY_SUMMARY_TOKENS = int(os.getenv("CHAT_HISTORY_SUMMARY_TOKENS", "200"))
+# 요약에서 이전 메시지 하나당 남기는 최대 글자 수
+SUMMARY_SNIPPET_CHARS = 160
+# 채팅 형식에서 메시지 하나에 붙는 고정 토큰 (역할, 구분자)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# mortgage_data 요약 설정
+PROFILE_MAX_FIELDS = 30
+PROFILE_VALUE_CHARS = 80
+PROFILE_IGNORED_FIELDS = frozenset({"userId"})
+_CURRENCY_FIELD = re.compile(r"price|value|income|payment|amount|debt|down|balance|cost|salary", re.I)
+_RATE_FIELD = re.compile(r"rate|ratio|percent|pct", re.I)
+
+
+@lru_cache(maxsize=8)
+def _token_counter(model: str) -> Callable[[str], int]:
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken is not installed; using estimated token counts")
+        return estimate_tokens
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text))
+
+
+def estimate_tokens(text: str) -> int:
+    """영어 기준 토큰 수 추정 (약 4글자 또는 0.75단어당 1토큰 중 큰 값)"""
+    return max(len(text) // 4, int(len(text.split()) * 4 / 3)) + 1
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    return _token_counter(model)(text)
+
+
+def message_tokens(message: Dict[str, str], model: str = "gpt-3.5-turbo") -> int:
+    return count_tokens(message["content"], model) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _format_value(name: str, value: Any) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        text = str(value)
+        return text if len(text) <= PROFILE_VALUE_CHARS else text[:PROFILE_VALUE_CHARS - 3] + "..."
+    if _RATE_FIELD.search(name):
+        return f"{value:g}%"
+    if _CURRENCY_FIELD.search(name):
+        return f"${value:,.0f}"
+    return f"{value:,}" if isinstance(value, int) else f"{value:,.2f}"
+
+
+def _flatten(data: Dict[str, Any], prefix: str = ""):
+    for name, value in data.items():
+        if name in PROFILE_IGNORED_FIELDS or value is None or value == "":
+            continue
+        path = f"{prefix}{name}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{path}.")
+        elif isinstance(value, (list, tuple)):
+            yield path, f"{len(value)} items"
+        else:
+            yield path, value
+
+
+def summarize_mortgage_data(mortgage_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """mortgage_data를 '- 필드: 값' 형식의 짧은 프로필로 요약 (없으면 None)"""
+    fields = list(_flatten(mortgage_data or {}))
+    if not fields:
+        return None
+    lines = [f"- {name}: {_format_value(name.rsplit('.', 1)[-1], value)}" for name, value in fields[:PROFILE_MAX_FIELDS]]
+    if len(fields) > PROFILE_MAX_FIELDS:
+        lines.append(f"- ({len(fields) - PROFILE_MAX_FIELDS} more fields omitted)")
+    return "User's financial and property information (use it for personalized analysis):\n" + "\n".join(lines)
+
+
+def _snippet(message: Dict[str, str]) -> str:
+    text = " ".join(message["content"].split())
+    if len(text) > SUMMARY_SNIPPET_CHARS:
+        text = text[:SUMMARY_SNIPPET_CHARS - 3] + "..."
+    return f"{message['role']}: {text}"
+
+
+def summarize_history(messages: List[Dict[str, str]], max_tokens: int, model: str) -> Optional[str]:
+    """예산에 들어가지 않은 이전 메시지를 최신 것부터 앞부분만 남겨 요약"""
+    header = "Summary of earlier conversation (truncated):"
+    used = count_tokens(header, model) + MESSAGE_OVERHEAD_TOKENS
+    lines: List[str] = []
+    for message in reversed(messages):
+        line = _snippet(message)
+        cost = count_tokens(line, model) + 1
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    return header + "\n" + "\n".join(reversed(lines))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str) -> str:
+    """토큰 수가 max_tokens 이하가 되도록 뒤를 자름"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid], model) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def build_messages(
+    system_prompt: str,
+    history: List[Dict[str, str]],
+    mortgage_data: Optional[Dict[str, Any]] = None,
+    budget: int = PROMPT_TOKEN_BUDGET,
+    model: str = "gpt-3.5-turbo",
+) -> List[Dict[str, str]]:
+    """토큰 예산 안에서 OpenAI에 보낼 메시지 목록 구성
+
+    Args:
+        history: 대화 기록 (오래된 순, 마지막이 현재 사용자 메시지)
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    profile = summarize_mortgage_data(mortgage_data)
+    if profile:
+        messages.append({"role": "system", "content": profile})
+    remaining = budget - sum(message_tokens(message, model) for message in messages)
+
+    # 최신 메시지부터 예산 안에 들어가는 만큼 그대로 포함
+    kept: List[Dict[str, str]] = []
+    for index in range(len(history) - 1, -1, -1):
+        cost = message_tokens(history[index], model)
+        if cost > remaining:
+            break
+        kept.append(history[index])
+        remaining -= cost
+    else:
+        index = -1
+    kept.reverse()
+
+    if not kept and history:
+        # 현재 메시지 하나도 예산을 넘으면 잘라서라도 포함
+        current = history[-1]
+        content = truncate_to_tokens(current["content"], max(remaining - MESSAGE_OVERHEAD_TOKENS, 1), model)
+        return messages + [{"role": current["role"], "content": content}]
+
+    older = history[:index + 1]
+    if older:
+        summary = summarize_history(older, min(HISTORY_SUMMARY_TOKENS, remaining), model)
+        if summary:
+            messages.append({"role": "system", "content": summary})
+    return messages + kept
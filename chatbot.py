@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
+import anyio
+import asyncio
+import json
 import logging
-from typing import Dict, Any
-from openai import OpenAI
+import math
+from typing import AsyncIterator, Dict, Any, List, Optional
+import openai
+from openai import AsyncOpenAI
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from collections import defaultdict
+import chat_admission
+import chat_cache
+import chat_history
+import chat_prompt
+import openai_stub
 
 # 로거 설정
 logger = logging.getLogger(__name__)
@@ -16,14 +27,33 @@ logging.basicConfig(level=logging.INFO)
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
+# 오프라인 스텁 클라이언트 사용 여부 (테스트/로컬 개발용, API 키 불필요)
+OFFLINE_STUB = os.getenv("OPENAI_OFFLINE_STUB", "false").lower() in ("1", "true", "yes")
+
 # OpenAI API 키 설정
 api_key = os.getenv("OPENAI_API_KEY")
-if not api_key:
+if not api_key and not OFFLINE_STUB:
     raise ValueError("OpenAI API key not found")
 
-# OpenAI 클라이언트 초기화
-client = OpenAI(api_key=api_key)
-logger.info("OpenAI client initialized successfully")
+# OpenAI 클라이언트 초기화 (비동기 클라이언트라 응답을 기다리는 동안 이벤트 루프를 막지 않음)
+if OFFLINE_STUB:
+    client = openai_stub.StubAsyncOpenAI()
+    logger.info("Using offline OpenAI stub client")
+else:
+    # 재시도는 admission 컨트롤러가 담당하므로 SDK 자체 재시도는 끔
+    # (OPENAI_BASE_URL로 로컬 가짜 서버 등 다른 엔드포인트 지정 가능)
+    client = AsyncOpenAI(api_key=api_key, base_url=os.getenv("OPENAI_BASE_URL") or None, max_retries=0)
+    logger.info("OpenAI client initialized successfully")
+
+# 채팅 완성 요청 파라미터
+COMPLETION_PARAMS = {
+    "model": "gpt-3.5-turbo",
+    "temperature": 0.7,
+    "max_tokens": 300,
+    "presence_penalty": 0.6,
+    "frequency_penalty": 0.3,
+}
+NO_RESPONSE = "No response available."
 
 # FastAPI 라우터 설정
 router = APIRouter(
@@ -36,12 +66,34 @@ router = APIRouter(
 class ChatMessage(BaseModel):
     content: str
     mortgage_data: Dict[str, Any] = None
+    stream: bool = False  # True면 토큰을 Server-Sent Events로 전달
 
 class ChatResponse(BaseModel):
     content: str
 
-# 대화 기록 저장소
-conversation_history = defaultdict(list)
+# 대화 기록 저장소 (사용자별 최근 N턴만 유지, 유휴 사용자 제거)
+history_store = chat_history.create_history_store()
+# 프롬프트 후보로 가져오는 최근 메시지 수 (실제 포함 여부는 토큰 예산으로 결정)
+PROMPT_HISTORY_TURNS = chat_history.MAX_TURNS
+
+# 같은 질문 + 같은 재무 정보에 대한 응답 캐시
+response_cache = chat_cache.ResponseCache()
+
+# OpenAI 동시 호출 제한 / 사용자별 공정 대기열 / 재시도 / 동일 요청 병합
+admission = chat_admission.AdmissionController()
+
+def openai_http_error(e: Exception) -> HTTPException:
+    """OpenAI 호출 실패를 HTTP 오류로 변환 (과부하는 503/429 + Retry-After)"""
+    if isinstance(e, chat_admission.AdmissionRejected):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+    if isinstance(e, openai.RateLimitError):
+        retry_after = chat_admission.retry_after_seconds(e) or admission.max_delay
+        return HTTPException(
+            status_code=429,
+            detail="OpenAI rate limit exceeded; please retry",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
 
 # 시스템 메시지 설정
 def create_system_prompt():
@@ -74,13 +126,79 @@ def create_system_prompt():
     - Ask follow-up questions to better understand the user's needs
     - Format numbers with appropriate commas and currency symbols (e.g., $500,000)
     """
-    
+
+# 시스템 프롬프트는 고정이므로 한 번만 생성
+SYSTEM_PROMPT = create_system_prompt()
+
+def sse_event(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Server-Sent Events 형식의 이벤트 한 개"""
+    payload = json.dumps(data, ensure_ascii=False)
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+
+def wants_event_stream(message: ChatMessage, request: Request) -> bool:
+    return message.stream or "text/event-stream" in request.headers.get("accept", "")
+
+async def stream_cached(user_id: str, bot_response: str) -> AsyncIterator[str]:
+    """캐시된 응답을 스트리밍 형식으로 전달 (전체를 한 번에 보냄)"""
+    await history_store.append(user_id, {"role": "assistant", "content": bot_response})
+    yield sse_event({"content": bot_response})
+    yield sse_event({"content": bot_response}, event="done")
+
+async def stream_chat(
+    message: ChatMessage,
+    user_id: str,
+    messages: List[Dict[str, str]],
+    ticket: chat_admission.Ticket,
+    prior_turns: List[Dict[str, str]],
+) -> AsyncIterator[str]:
+    """OpenAI 스트리밍 응답을 도착하는 대로 SSE 이벤트로 전달
+
+    토큰마다 data 이벤트를 보내고, 끝나면 전체 응답을 담은 done 이벤트를 보냅니다.
+    클라이언트 연결이 끊기면 Starlette이 이 제너레이터를 취소하며, finally에서
+    OpenAI 스트림을 닫아 남은 생성을 중단합니다. 중단된 응답은 대화 기록에 남기지 않습니다.
+    admission 자리(ticket)는 스트림이 끝날 때까지 유지합니다.
+    """
+    stream = None
+    parts: List[str] = []
+    try:
+        stream = await admission.with_retries(
+            lambda: client.chat.completions.create(**COMPLETION_PARAMS, messages=messages, stream=True)
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                parts.append(token)
+                yield sse_event({"content": token})
+
+        bot_response = "".join(parts).strip() or NO_RESPONSE
+        await history_store.append(user_id, {"role": "assistant", "content": bot_response})
+        if parts and chat_cache.CACHE_ENABLED:
+            response_cache.store(message.content, message.mortgage_data, bot_response, prior_turns, user_id)
+        yield sse_event({"content": bot_response}, event="done")
+
+    except asyncio.CancelledError:
+        logger.info(f"Client disconnected; cancelled chat stream for {user_id} after {len(parts)} tokens")
+        raise
+    except Exception as e:
+        logger.error(f"OpenAI API error: {str(e)}")
+        yield sse_event({"detail": f"OpenAI API error: {str(e)}"}, event="error")
+    finally:
+        if stream is not None:
+            # 취소 중에도 연결 반환이 끝나도록 보호
+            with anyio.CancelScope(shield=True):
+                await stream.response.aclose()
+        ticket.release()
+
 @router.post("/with-history", 
     response_model=ChatResponse,
     summary="Chat with AI assistant",
     description="""
     Send a message to the AI assistant and get a response.
     The assistant uses conversation history and mortgage data to provide contextual responses.
+    Set `stream: true` (or send `Accept: text/event-stream`) to receive tokens as
+    Server-Sent Events as they are generated; the final `done` event carries the full response.
     """,
     responses={
         200: {
@@ -90,14 +208,19 @@ def create_system_prompt():
                     "example": {
                         "content": "Based on your mortgage data..."
                     }
+                },
+                "text/event-stream": {
+                    "example": 'data: {"content": "Based"}\n\nevent: done\ndata: {"content": "Based on your mortgage data..."}\n\n'
                 }
             }
         },
         400: {"description": "Missing mortgage data"},
-        500: {"description": "OpenAI API error"}
+        429: {"description": "OpenAI rate limit exceeded after retries"},
+        500: {"description": "OpenAI API error"},
+        503: {"description": "Too many queued chat requests"}
     }
 )
-async def chat_with_mortgage_info(message: ChatMessage):
+async def chat_with_mortgage_info(message: ChatMessage, request: Request):
     try:
         logger.info(f"Received message: {message.content}")
 
@@ -106,33 +229,82 @@ async def chat_with_mortgage_info(message: ChatMessage):
             raise HTTPException(status_code=400, detail="Mortgage data is required")
             
         user_id = message.mortgage_data.get("userId", "default")
-        conversation_history[user_id].append({"role": "user", "content": message.content})
+        await history_store.append(user_id, {"role": "user", "content": message.content})
+        history = await history_store.recent(user_id, PROMPT_HISTORY_TURNS)
+        # 이번 질문 이전의 대화 (캐시 키에 포함되어 같은 맥락에서만 답변을 재사용)
+        prior_turns = history[:-1]
+
+        stream = wants_event_stream(message, request)
+        sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
 
-        system_prompt = create_system_prompt()
-        messages = [{"role": "system", "content": system_prompt}] + conversation_history[user_id][-5:]
+        if chat_cache.CACHE_ENABLED:
+            cached, outcome = response_cache.lookup(message.content, message.mortgage_data, prior_turns, user_id)
+            if cached is not None:
+                logger.info(f"Chat response cache hit ({outcome}) for {user_id}")
+                if stream:
+                    return StreamingResponse(stream_cached(user_id, cached), media_type="text/event-stream", headers=sse_headers)
+                await history_store.append(user_id, {"role": "assistant", "content": cached})
+                return ChatResponse(content=cached)
+
+        messages = chat_prompt.build_messages(
+            SYSTEM_PROMPT, history, message.mortgage_data, model=COMPLETION_PARAMS["model"]
+        )
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=300,
-                presence_penalty=0.6,
-                frequency_penalty=0.3
+            if stream:
+                # 대기열 초과/시간 초과를 503으로 돌려주기 위해 응답을 시작하기 전에 자리 확보
+                ticket = await admission.acquire(user_id)
+                return StreamingResponse(
+                    stream_chat(message, user_id, messages, ticket, prior_turns),
+                    media_type="text/event-stream",
+                    headers=sse_headers,
+                    # 스트림이 시작되기 전에 연결이 끊겨도 자리를 반납
+                    background=BackgroundTask(ticket.release),
+                )
+
+            response = await admission.call(
+                user_id,
+                lambda: client.chat.completions.create(**COMPLETION_PARAMS, messages=messages),
+                key=chat_admission.request_key(**COMPLETION_PARAMS, messages=messages),
             )
 
             if response and response.choices:
                 bot_response = response.choices[0].message.content.strip()
+                if chat_cache.CACHE_ENABLED:
+                    response_cache.store(message.content, message.mortgage_data, bot_response, prior_turns, user_id)
             else:
-                bot_response = "No response available."
+                bot_response = NO_RESPONSE
 
-            conversation_history[user_id].append({"role": "assistant", "content": bot_response})
+            await history_store.append(user_id, {"role": "assistant", "content": bot_response})
             return ChatResponse(content=bot_response)
 
         except Exception as e:
             logger.error(f"OpenAI API error: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"OpenAI API error: {str(e)}")
+            raise openai_http_error(e)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat endpoint: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/history/stats",
+    response_model=Dict[str, Any],
+    summary="Get chat history store stats",
+    description="Returns the size, limits and eviction counters of the conversation history store")
+async def get_history_stats():
+    return await history_store.stats()
+
+@router.get("/cache/stats",
+    response_model=Dict[str, Any],
+    summary="Get chat response cache stats",
+    description="Returns entries, exact/similar hit counts and hit rate of the chat response cache")
+async def get_cache_stats():
+    return response_cache.stats()
+
+@router.get("/admission/stats",
+    response_model=Dict[str, Any],
+    summary="Get OpenAI admission controller stats",
+    description="Returns active calls, queue depth, wait time percentiles, retries and coalesced requests")
+async def get_admission_stats():
+    return admission.stats()
@@ -0,0 +1,381 @@
+"""Plaid 연동 item별 재무 프로필 (소득/부채)의 로컬 SQLite 저장소와 갱신 서비스
+
+item을 연결할 때 한 번 Plaid 데이터(잔액, 거래 내역)로 소득과 월 부채 상환액을
+계산해 저장하고, 분석 요청은 네트워크 없이 저장된 프로필로 응답합니다. 프로필이
+freshness window보다 오래되었거나 Plaid webhook이 오면 백그라운드에서 다시
+계산하며, 갱신이 실패해도 이전 프로필을 계속 사용합니다.
+
+access token은 백그라운드 갱신에 필요하므로 서버 로컬 DB에만 저장하고 응답이나
+로그에는 노출하지 않습니다.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import http_clients
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'data' / 'financial_profiles.sqlite3'
+DB_PATH = Path(os.getenv("FINANCIAL_PROFILE_DB_PATH", DEFAULT_DB_PATH))
+# 이 시간보다 오래된 프로필은 응답에 쓰되 백그라운드에서 다시 계산
+PROFILE_FRESH_SECONDS = float(os.getenv("FINANCIAL_PROFILE_FRESH_SECONDS", str(24 * 3600)))
+# 소득/부채 상환액 계산에 쓰는 거래 내역 기간 (연 소득, 월 상환액으로 환산)
+INCOME_LOOKBACK_DAYS = int(os.getenv("FINANCIAL_PROFILE_INCOME_DAYS", "180"))
+# 조회 시 예약하는 갱신의 item별 최소 간격 (Plaid 장애 중 요청마다 재시도하지 않도록)
+REFRESH_RETRY_SECONDS = float(os.getenv("FINANCIAL_PROFILE_RETRY_SECONDS", "300"))
+
+# 소득으로 보는 거래 분류 (personal_finance_category.primary, 이전 category 목록)
+INCOME_CATEGORIES = frozenset({"INCOME", "Payroll"})
+# 부채 상환으로 보는 거래 분류 (대출/카드 대금 납부)
+DEBT_PAYMENT_CATEGORIES = frozenset({"LOAN_PAYMENTS", "Credit Card", "Loan"})
+# 스키마 버전 (2: debt가 잔액 합계에서 월 상환액으로 바뀜)
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    item_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    access_token TEXT NOT NULL,
+    linked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_user_id ON items (user_id);
+CREATE TABLE IF NOT EXISTS profiles (
+    item_id TEXT PRIMARY KEY,
+    income REAL,
+    debt REAL,
+    accounts TEXT NOT NULL,
+    computed_at REAL NOT NULL
+);
+"""
+
+
+class ItemOwnerConflict(Exception):
+    """이미 다른 사용자에게 연결된 item을 다른 user_id로 저장하려 할 때"""
+
+
+def is_income(transaction: Dict[str, Any]) -> bool:
+    """입금(Plaid에서는 음수 금액) 중 급여/소득으로 분류된 거래"""
+    if transaction.get("amount", 0) >= 0:
+        return False
+    primary = (transaction.get("personal_finance_category") or {}).get("primary")
+    return primary in INCOME_CATEGORIES or bool(INCOME_CATEGORIES.intersection(transaction.get("category") or ()))
+
+
+def is_debt_payment(transaction: Dict[str, Any]) -> bool:
+    """출금(Plaid에서는 양수 금액) 중 대출/카드 대금 납부로 분류된 거래
+
+    카드 계좌 쪽에 찍히는 같은 납부(입금)는 제외되므로 두 계좌가 모두 연결되어
+    있어도 한 번만 셉니다.
+    """
+    if transaction.get("amount", 0) <= 0:
+        return False
+    primary = (transaction.get("personal_finance_category") or {}).get("primary")
+    return primary in DEBT_PAYMENT_CATEGORIES or bool(DEBT_PAYMENT_CATEGORIES.intersection(transaction.get("category") or ()))
+
+
+def compute_profile(
+    accounts: List[Dict[str, Any]],
+    transactions: Optional[List[Dict[str, Any]]],
+    lookback_days: int = INCOME_LOOKBACK_DAYS,
+) -> Dict[str, Any]:
+    """계좌 잔액과 거래 내역으로 소득/월 부채 상환액 계산
+
+    Args:
+        transactions: lookback_days 기간의 거래 내역. None이면 소득/부채를 계산하지 않음
+    Returns:
+        income(연 환산), debt(대출/카드 대금 납부의 월 평균, DTI의 분자),
+        accounts(요약). 거래 내역이 없으면 income/debt는 None
+    """
+    income = debt = None
+    if transactions is not None:
+        received = sum(-transaction["amount"] for transaction in transactions if is_income(transaction))
+        paid = sum(transaction["amount"] for transaction in transactions if is_debt_payment(transaction))
+        income = round(received * 365 / lookback_days, 2)
+        debt = round(paid * 365 / 12 / lookback_days, 2)
+    return {
+        "income": income,
+        "debt": debt,
+        "accounts": [
+            {
+                "account_id": account.get("account_id"),
+                "name": account.get("name"),
+                "type": account.get("type"),
+                "subtype": account.get("subtype"),
+                "current": account["balances"].get("current"),
+                "available": account["balances"].get("available"),
+            }
+            for account in accounts
+        ],
+    }
+
+
+def is_pending(item: Dict[str, Any]) -> bool:
+    """아직 계산되지 않았거나 거래 내역을 읽지 못해 소득을 모르는 item 프로필"""
+    return item["computed_at"] is None or item["income"] is None
+
+
+class FinancialProfileStore:
+    """item과 item별 프로필 저장소 (사용자 프로필은 item 프로필의 합계)"""
+
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                    # 프로필은 Plaid 데이터에서 다시 계산되므로 이전 형식은 버리고 item만 유지
+                    conn.execute("DROP TABLE IF EXISTS profiles")
+                    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def save_item(self, user_id: str, item_id: str, access_token: str):
+        """item 저장 (같은 사용자의 재연결은 access token만 갱신)
+
+        Raises:
+            ItemOwnerConflict: item이 이미 다른 사용자에게 연결되어 있음 (소유자는 바꾸지 않음)
+        """
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO items (item_id, user_id, access_token, linked_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(item_id) DO UPDATE SET access_token = excluded.access_token"
+                " WHERE items.user_id = excluded.user_id",
+                (item_id, user_id, access_token, time.time()),
+            )
+            if cursor.rowcount == 0:
+                raise ItemOwnerConflict(f"Item {item_id} is already linked to another user")
+
+    def item(self, item_id: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT items.item_id, user_id, access_token, income, debt FROM items"
+                " LEFT JOIN profiles ON profiles.item_id = items.item_id WHERE items.item_id = ?",
+                (item_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save_profile(self, item_id: str, profile: Dict[str, Any]):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (item_id, income, debt, accounts, computed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (item_id, profile["income"], profile["debt"], json.dumps(profile["accounts"]), time.time()),
+            )
+
+    def item_profiles(self, user_id: str) -> List[Dict[str, Any]]:
+        """사용자의 item별 프로필 (아직 계산되지 않은 item은 computed_at이 None)"""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT items.item_id, income, debt, accounts, computed_at FROM items"
+                " LEFT JOIN profiles ON profiles.item_id = items.item_id"
+                " WHERE user_id = ? ORDER BY linked_at",
+                (user_id,),
+            ).fetchall()
+        return [
+            {**dict(row), "accounts": json.loads(row["accounts"]) if row["accounts"] else []}
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM items) AS items, (SELECT COUNT(DISTINCT user_id) FROM items) AS users,"
+                " COUNT(*) AS profiles, MIN(computed_at) AS oldest FROM profiles"
+            ).fetchone()
+        return {
+            "path": str(self.path),
+            "users": row["users"],
+            "items": row["items"],
+            "profiles": row["profiles"],
+            "oldest_computed_at": row["oldest"],
+        }
+
+
+class FinancialProfileService:
+    """저장된 프로필을 바로 반환하고, 계산/갱신은 item 단위로 (백그라운드에서) 실행
+
+    프로필 조회만 하는 모듈(mortgage)이 Plaid 모듈에 의존하지 않도록, Plaid 조회
+    함수는 생성 시 또는 configure()로 나중에 연결합니다.
+
+    Args:
+        fetch_balances: access token을 받아 Plaid /accounts/balance/get 응답을 반환
+        fetch_transactions: (access token, 시작일, 종료일)을 받아 거래 목록을 반환
+    """
+
+    def __init__(
+        self,
+        fetch_balances: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+        fetch_transactions: Optional[Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]]] = None,
+        store: Optional[FinancialProfileStore] = None,
+        fresh_for: float = PROFILE_FRESH_SECONDS,
+        lookback_days: int = INCOME_LOOKBACK_DAYS,
+        retry_after: float = REFRESH_RETRY_SECONDS,
+    ):
+        self.fetch_balances = fetch_balances
+        self.fetch_transactions = fetch_transactions
+        self.store = store or FinancialProfileStore()
+        self.fresh_for = fresh_for
+        self.lookback_days = lookback_days
+        self.retry_after = retry_after
+        # item별 마지막 갱신 시도 시각 (time.monotonic)
+        self._attempted: Dict[str, float] = {}
+        # item별 진행 중인 갱신 (같은 item의 갱신 요청은 하나로 병합)
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._metrics = {
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "coalesced": 0,
+        }
+
+    def configure(
+        self,
+        fetch_balances: Callable[[str], Awaitable[Dict[str, Any]]],
+        fetch_transactions: Callable[[str, str, str], Awaitable[List[Dict[str, Any]]]],
+    ):
+        """Plaid 조회 함수 연결 (LinkToken 모듈이 로드될 때 호출)"""
+        self.fetch_balances = fetch_balances
+        self.fetch_transactions = fetch_transactions
+
+    async def link_item(self, user_id: str, item_id: str, access_token: str) -> Optional[Dict[str, Any]]:
+        """새로 연결된 item을 저장하고 프로필을 계산 (실패하면 백그라운드에서 재시도)
+
+        Raises:
+            ItemOwnerConflict: item이 이미 다른 사용자에게 연결되어 있음
+        """
+        await http_clients.run_blocking(self.store.save_item, user_id, item_id, access_token)
+        try:
+            await self.refresh(item_id)
+        except Exception as e:
+            logger.warning(f"Initial financial profile computation failed for item {item_id}: {e!r}")
+        return await self.get_profile(user_id)
+
+    def refresh(self, item_id: str) -> Awaitable[Dict[str, Any]]:
+        """item 프로필 다시 계산 (이미 진행 중이면 그 결과를 기다림)"""
+        # 기다리던 요청이 취소되어도 갱신은 계속 진행
+        return asyncio.shield(self.schedule_refresh(item_id))
+
+    def schedule_refresh(self, item_id: str) -> asyncio.Task:
+        """백그라운드 갱신 시작 (같은 item의 갱신이 진행 중이면 그 작업을 반환)"""
+        task = self._refreshing.get(item_id)
+        if task is not None:
+            self._metrics["coalesced"] += 1
+            return task
+
+        self._attempted[item_id] = time.monotonic()
+        task = asyncio.ensure_future(self._refresh(item_id))
+        self._refreshing[item_id] = task
+
+        def finished(done: asyncio.Task):
+            self._refreshing.pop(item_id, None)
+            # 백그라운드 갱신 실패는 로그만 남김 (_refresh에서 기록)
+            done.cancelled() or done.exception()
+
+        task.add_done_callback(finished)
+        return task
+
+    async def _refresh(self, item_id: str) -> Dict[str, Any]:
+        self._metrics["refreshes"] += 1
+        try:
+            if self.fetch_balances is None or self.fetch_transactions is None:
+                raise RuntimeError("Plaid fetchers are not configured")
+            item = await http_clients.run_blocking(self.store.item, item_id)
+            if item is None:
+                raise KeyError(f"Unknown item {item_id}")
+
+            end = date.today()
+            start = end - timedelta(days=self.lookback_days)
+            balances, transactions = await asyncio.gather(
+                self.fetch_balances(item["access_token"]),
+                self.fetch_transactions(item["access_token"], start.isoformat(), end.isoformat()),
+                return_exceptions=True,
+            )
+            if isinstance(balances, BaseException):
+                raise balances
+            if isinstance(transactions, BaseException):
+                # 거래 내역이 아직 준비되지 않았으면 (Plaid PRODUCT_NOT_READY 등) 계좌 잔액만 갱신
+                logger.warning(f"Transactions unavailable for item {item_id}; keeping previous income/debt: {transactions!r}")
+                transactions = None
+
+            profile = compute_profile(balances.get("accounts", []), transactions, self.lookback_days)
+            if transactions is None:
+                profile["income"], profile["debt"] = item["income"], item["debt"]
+            await http_clients.run_blocking(self.store.save_profile, item_id, profile)
+            logger.info(f"Financial profile refreshed for item {item_id}")
+            return profile
+        except Exception as e:
+            self._metrics["refresh_errors"] += 1
+            logger.warning(f"Financial profile refresh failed for item {item_id}: {e!r}")
+            raise
+
+    async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """사용자의 저장된 프로필 (연결된 item이 없으면 None)
+
+        네트워크 호출 없이 반환하며, 오래되었거나 아직 계산되지 않은 item은
+        백그라운드 갱신을 예약합니다. 거래 내역을 아직 한 번도 읽지 못한 item
+        (income이 None)은 계산 중으로 보고 retry_after 간격으로 다시 시도합니다.
+        """
+        items = await http_clients.run_blocking(self.store.item_profiles, user_id)
+        if not items:
+            return None
+
+        now = time.time()
+        for item in items:
+            attempted = self._attempted.get(item["item_id"])
+            if attempted is not None and time.monotonic() - attempted < self.retry_after:
+                continue
+            if is_pending(item) or now - item["computed_at"] > self.fresh_for:
+                self.schedule_refresh(item["item_id"])
+
+        computed = [item for item in items if item["computed_at"] is not None]
+        incomes = [item["income"] for item in computed if item["income"] is not None]
+        debts = [item["debt"] for item in computed if item["debt"] is not None]
+        return {
+            "user_id": user_id,
+            "income": round(sum(incomes), 2) if incomes else None,
+            "debt": round(sum(debts), 2) if debts else None,
+            "accounts": [account for item in computed for account in item["accounts"]],
+            "items": len(items),
+            "pending_items": sum(1 for item in items if is_pending(item)),
+            "computed_at": min(item["computed_at"] for item in computed) if computed else None,
+        }
+
+    async def shutdown(self):
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            **await http_clients.run_blocking(self.store.stats),
+            "fresh_seconds": self.fresh_for,
+            "refreshing": len(self._refreshing),
+            **self._metrics,
+        }
+
+
+_service: Optional[FinancialProfileService] = None
+
+
+def get_service() -> FinancialProfileService:
+    """프로세스 전역 프로필 서비스 (Plaid 조회 함수는 LinkToken 모듈이 연결)"""
+    global _service
+    if _service is None:
+        _service = FinancialProfileService()
+    return _service
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 외부 API 호출 설정
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_MAX_CONCURRENCY = int(os.getenv("HTTP_MAX_CONCURRENCY", "20"))
+
+# 동기 SDK 호출을 실행할 스레드 수
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "8"))
+
+
+class PooledClient:
+    """keep-alive 연결 풀과 동시 요청 제한을 가진 공유 httpx.AsyncClient
+
+    앱 lifespan 동안 하나의 클라이언트를 재사용하며, 처음 사용할 때 생성하고
+    shutdown()에서 닫습니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = HTTP_TIMEOUT,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_concurrency: int = HTTP_MAX_CONCURRENCY,
+    ):
+        self.name = name
+        self.timeout = httpx.Timeout(timeout, connect=HTTP_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(HTTP_MAX_KEEPALIVE, max_connections),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self._semaphore:
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+fred = PooledClient("fred")
+plaid = PooledClient("plaid")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _blocking_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BLOCKING_POOL_SIZE, thread_name_prefix="blocking-io")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """동기 함수(SDK 호출 등)를 제한된 스레드 풀에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor(), partial(func, *args, **kwargs))
+
+
+async def startup():
+    # 첫 요청에서 연결 풀을 만드는 비용을 피하기 위해 미리 생성
+    for pooled in (fred, plaid):
+        pooled.client
+    _blocking_executor()
+
+
+async def shutdown():
+    global _executor
+    for pooled in (fred, plaid):
+        await pooled.aclose()
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    logger.info("HTTP clients closed")
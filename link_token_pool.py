@@ -0,0 +1,159 @@
+"""미리 발급해 두는 Plaid Link 토큰 풀
+
+Link 토큰은 임시 client_user_id로 발급되므로 사용자에게 묶이기 전까지는 서로
+바꿔 써도 됩니다. 백그라운드 작업이 풀을 high watermark까지 채워 두고, 요청은
+메모리에서 바로 꺼내 갑니다.
+
+- 남은 유효 시간이 min_ttl보다 짧은 토큰은 버림 (오래된 것부터 내줌)
+- 남은 토큰이 low watermark 아래로 내려가면 즉시 보충
+- 풀이 비어 있으면 그 자리에서 발급 (on-demand fallback)
+"""
+import asyncio
+import bisect
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+POOL_ENABLED = os.getenv("PLAID_LINK_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+LOW_WATERMARK = int(os.getenv("PLAID_LINK_POOL_LOW", "5"))
+HIGH_WATERMARK = int(os.getenv("PLAID_LINK_POOL_HIGH", "20"))
+# 내줄 토큰에 최소한 남아 있어야 하는 유효 시간 (Plaid Link 토큰은 4시간 유효)
+MIN_TOKEN_TTL = float(os.getenv("PLAID_LINK_TOKEN_MIN_TTL_SECONDS", "1800"))
+# 보충 작업이 깨어나는 주기와 동시 발급 수
+REFILL_INTERVAL = float(os.getenv("PLAID_LINK_POOL_REFILL_INTERVAL_SECONDS", "60"))
+REFILL_CONCURRENCY = int(os.getenv("PLAID_LINK_POOL_REFILL_CONCURRENCY", "4"))
+
+
+@dataclass
+class PooledToken:
+    link_token: str
+    expiration: datetime
+    request_id: str
+
+    def as_response(self) -> Dict[str, str]:
+        return {
+            "link_token": self.link_token,
+            "expiration": self.expiration.isoformat().replace("+00:00", "Z"),
+            "request_id": self.request_id,
+        }
+
+
+class LinkTokenPool:
+    """백그라운드에서 채워지는 Link 토큰 풀 (이벤트 루프 안에서만 사용)
+
+    Args:
+        mint: 새 토큰을 발급하는 함수 (PooledToken 반환)
+    """
+
+    def __init__(
+        self,
+        mint: Callable[[], Awaitable[PooledToken]],
+        low_watermark: int = LOW_WATERMARK,
+        high_watermark: int = HIGH_WATERMARK,
+        min_ttl: float = MIN_TOKEN_TTL,
+        refill_interval: float = REFILL_INTERVAL,
+        refill_concurrency: int = REFILL_CONCURRENCY,
+    ):
+        self.mint = mint
+        self.low_watermark = low_watermark
+        self.high_watermark = max(high_watermark, low_watermark)
+        self.min_ttl = timedelta(seconds=min_ttl)
+        self.refill_interval = refill_interval
+        self.refill_concurrency = refill_concurrency
+        self._tokens: Deque[PooledToken] = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._metrics = {
+            "served_from_pool": 0,
+            "served_on_demand": 0,
+            "minted": 0,
+            "mint_errors": 0,
+            "expired": 0,
+        }
+
+    async def take(self) -> PooledToken:
+        """풀에서 토큰 하나를 꺼냄 (비어 있으면 바로 발급)"""
+        self._evict_expired()
+        if len(self._tokens) <= self.low_watermark:
+            self._wakeup.set()
+        if self._tokens:
+            self._metrics["served_from_pool"] += 1
+            return self._tokens.popleft()
+
+        self._metrics["served_on_demand"] += 1
+        token = await self.mint()
+        self._metrics["minted"] += 1
+        return token
+
+    def _evict_expired(self):
+        cutoff = datetime.now(timezone.utc) + self.min_ttl
+        while self._tokens and self._tokens[0].expiration <= cutoff:
+            self._tokens.popleft()
+            self._metrics["expired"] += 1
+
+    async def refill(self) -> int:
+        """high watermark까지 토큰 발급 (발급한 개수 반환)"""
+        self._evict_expired()
+        missing = self.high_watermark - len(self._tokens)
+        if missing <= 0:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.refill_concurrency)
+
+        async def mint_one() -> bool:
+            async with semaphore:
+                try:
+                    token = await self.mint()
+                except Exception as e:
+                    self._metrics["mint_errors"] += 1
+                    logger.warning(f"Failed to pre-mint Plaid link token: {str(e)}")
+                    return False
+            # 발급되는 즉시 풀에 넣되, 만료가 빠른 토큰부터 내주도록 순서 유지
+            bisect.insort(self._tokens, token, key=lambda pooled: pooled.expiration)
+            self._metrics["minted"] += 1
+            return True
+
+        return sum(await asyncio.gather(*(mint_one() for _ in range(missing))))
+
+    async def _run(self):
+        while True:
+            # 보충 중에 들어온 깨우기 요청은 다음 회차에서 처리
+            self._wakeup.clear()
+            try:
+                await self.refill()
+            except Exception as e:
+                logger.error(f"Plaid link token pool refill failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": POOL_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "size": len(self._tokens),
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "min_ttl_seconds": self.min_ttl.total_seconds(),
+            "next_expiration": self._tokens[0].expiration.isoformat() if self._tokens else None,
+            **self._metrics,
+        }
@@ -1,14 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import chatbot
 import mortgage
 import LinkToken
 from routes import properties
+import property_store
+import http_clients
+import rate_simulation
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_clients.startup()
+    if LinkToken.POOL_ENABLED:
+        LinkToken.link_token_pool.start()
+    # FRED 금리 이력은 백그라운드에서 동기화 (요청은 로컬 이력으로 바로 응답)
+    mortgage.sync_rate_history()
+
+    # 시작 시 속성 데이터셋을 한 번만 로드
+    try:
+        property_store.get_store().get()
+    except FileNotFoundError:
+        logger.warning("Property CSV not found at startup; it will be loaded on first request")
+    yield
+
+    # Link 토큰 보충/재무 프로필 갱신 작업, 공유 HTTP 클라이언트와 스레드/프로세스 풀 정리
+    await LinkToken.link_token_pool.stop()
+    await LinkToken.profile_service.shutdown()
+    await http_clients.shutdown()
+    await chatbot.client.close()
+    rate_simulation.shutdown()
+
 app = FastAPI(
     title="Bestia Real Estate API",
     description="""
@@ -20,7 +46,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS 설정 수정
@@ -1,12 +1,22 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import HTTPException, APIRouter
-import requests
-from datetime import datetime
-from pydantic import BaseModel, Field
+from fastapi import HTTPException, APIRouter, Query
+from fastapi.responses import StreamingResponse
+import http_clients
+import json
+import math
+import time
+from datetime import date, datetime
+from pydantic import BaseModel, Field, ValidationError
 import logging
-from typing import Dict, List
+import numpy as np
+from typing import Any, Dict, List, Literal, Optional
+from ttl_cache import AsyncTTLCache
+import mortgage_calc
+import rate_history
+import rate_simulation
+import financial_profile
 
 # APIRouter 설정
 router = APIRouter(
@@ -19,97 +29,161 @@ logger = logging.getLogger(__name__)
 env_path = Path(__file__).parents[1] / '.env'
 load_dotenv(dotenv_path=env_path)
 
-PLAID_API_KEY = os.getenv("Plaid_API_KEY")
 FRED_API_KEY = os.getenv("FRED_API_KEY")
+# 배치 분석 요청당 최대 신청 건수
+MAX_BATCH_SIZE = int(os.getenv("MORTGAGE_MAX_BATCH_SIZE", "10000"))
+# 시나리오 비교 행렬의 최대 셀 수
+MAX_SCENARIO_CELLS = int(os.getenv("MORTGAGE_MAX_SCENARIO_CELLS", "20000"))
+FRED_OBSERVATIONS_URL = "https://api.stlouisfed.org/fred/series/observations"
 
-def get_plaid_sandbox_data(user_id: str) -> dict:
-    """Plaid Sandbox API에서 사용자의 재무 정보 조회"""
-    try:
-        # Plaid API 엔드포인트 (Sandbox)
-        url = "https://sandbox.plaid.com/auth/get"
-        headers = {
-            "Content-Type": "application/json",
-            "PLAID-CLIENT-ID": PLAID_API_KEY,
-            # 실제 구현시 필요한 추가 인증 정보 포함
+# MORTGAGE30US는 주 1회 갱신되므로 로컬 이력의 증분 갱신은 TTL마다 한 번만 실행
+# (TTL이 지난 뒤 stale 기간 동안은 로컬 데이터로 응답하면서 백그라운드에서 갱신)
+FRED_RATE_TTL = float(os.getenv("FRED_RATE_TTL_SECONDS", "3600"))
+FRED_RATE_STALE_TTL = float(os.getenv("FRED_RATE_STALE_SECONDS", str(7 * 24 * 3600)))
+# FRED 갱신이 실패하면 이 시간 동안 다시 시도하지 않음 (장애 중 요청마다 타임아웃을 기다리지 않도록)
+FRED_RETRY_SECONDS = float(os.getenv("FRED_RETRY_SECONDS", "300"))
+fred_cache = AsyncTTLCache(
+    ttl=FRED_RATE_TTL, stale_ttl=FRED_RATE_STALE_TTL, name="fred", error_ttl=FRED_RETRY_SECONDS
+)
+
+# 금리 위험 시뮬레이션 설정
+MAX_SIMULATION_PATHS = int(os.getenv("RATE_SIMULATION_MAX_PATHS", "1000000"))
+# 모델 적합에 사용하는 최근 주간 관측치 수 (기본 약 30년)
+SIMULATION_HISTORY_WEEKS = int(os.getenv("RATE_SIMULATION_HISTORY_WEEKS", str(52 * 30)))
+# 같은 파라미터(해시)의 시뮬레이션 결과 캐시
+simulation_cache = AsyncTTLCache(
+    ttl=float(os.getenv("RATE_SIMULATION_CACHE_TTL_SECONDS", "3600")),
+    name="rate-simulation",
+    max_entries=int(os.getenv("RATE_SIMULATION_CACHE_ENTRIES", "128")),
+)
+
+async def fetch_fred_observations(observation_start: Optional[str] = None) -> List[Dict[str, Any]]:
+    """FRED API에서 MORTGAGE30US 관측치 조회 (오래된 순)
+
+    Args:
+        observation_start: 이 날짜(YYYY-MM-DD) 이후만 조회. None이면 전체 시계열
+    """
+    params = {
+        "series_id": rate_history.SERIES_ID,  # 30년 고정 모기지 금리
+        "api_key": FRED_API_KEY,
+        "file_type": "json",
+        "sort_order": "asc",
+    }
+    if observation_start:
+        params["observation_start"] = observation_start
+
+    response = await http_clients.fred.get(FRED_OBSERVATIONS_URL, params=params)
+    if response.status_code != 200:
+        raise Exception("FRED API 호출 실패")
+
+    return [
+        {
+            "date": item["date"],
+            "rate": float(item["value"])
         }
-        
-        response = requests.post(url, headers=headers, json={"user_id": user_id})
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "credit_score": data.get("credit_score", 700),  # 예시
-                "accounts": data.get("accounts", []),
-                "income": data.get("income", 0),
-                "debt": data.get("debt", 0)
-            }
-        else:
-            raise Exception("Plaid API 호출 실패")
+        for item in response.json()["observations"]
+        if item["value"] != "."  # 결측치
+    ]
+
+def _refresh_local_history():
+    return rate_history.get_store().refresh(fetch_fred_observations)
+
+async def refresh_rate_history() -> Optional[str]:
+    """로컬 금리 이력을 FRED에서 증분 갱신 (TTL마다 한 번, 동시 요청은 한 번의 호출로 병합)"""
+    return await fred_cache.get(rate_history.SERIES_ID, _refresh_local_history)
+
+def sync_rate_history():
+    """로컬 금리 이력 갱신을 백그라운드에서 시작 (시작 시와 조회 시 호출, 기다리지 않음)"""
+    fred_cache.prefetch(rate_history.SERIES_ID, _refresh_local_history)
+
+async def ensure_rate_history():
+    """로컬 이력이 있으면 바로 반환하고 갱신은 백그라운드에서 진행
+
+    저장된 데이터가 전혀 없을 때만 FRED 조회를 기다립니다. 실패는 로그만 남기며,
+    실패 후 FRED_RETRY_SECONDS 동안은 다시 기다리지 않습니다.
+    """
+    if (
+        fred_cache.peek(rate_history.SERIES_ID) is not None
+        or await http_clients.run_blocking(rate_history.get_store().latest_date) is not None
+    ):
+        sync_rate_history()
+        return
+    try:
+        await refresh_rate_history()
     except Exception as e:
-        print(f"Plaid API 에러: {str(e)}")
-        # 테스트용 더미 데이터 반환
-        return {
-            "credit_score": 700,
-            "accounts": [],
-            "income": 50000,
-            "debt": 10000
-        }
+        logger.warning(f"FRED refresh failed and no local rate history is stored: {str(e)}")
+
+async def load_rate_history(
+    start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """로컬 저장소에서 금리 이력 조회 (오래된 순)"""
+    await ensure_rate_history()
+    return await http_clients.run_blocking(rate_history.get_store().observations, start, end, limit)
 
-def get_current_mortgage_rate() -> float:
-    """FRED API에서 현재 모기지 금리 조회"""
+async def get_current_mortgage_rate() -> float:
+    """FRED 최신 모기지 금리 조회 (로컬 이력의 마지막 관측치)"""
     try:
-        # FRED API 엔드포인트
-        url = f"https://api.stlouisfed.org/fred/series/observations"
-        params = {
-            "series_id": "MORTGAGE30US",  # 30년 고정 모기지 금리
-            "api_key": FRED_API_KEY,
-            "file_type": "json",
-            "sort_order": "desc",
-            "limit": 1
-        }
-        
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            latest_rate = float(data["observations"][0]["value"])
-            return latest_rate
-        else:
-            raise Exception("FRED API 호출 실패")
+        observations = await load_rate_history(limit=1)
+        if observations:
+            return observations[-1]["rate"]
     except Exception as e:
-        print(f"FRED API 에러: {str(e)}")
-        # 테스트용 기본 금리 반환
-        return 3.5
+        logger.error(f"FRED API 에러: {str(e)}")
+    # 금리 이력이 전혀 없으면 기본 금리 사용
+    return mortgage_calc.DEFAULT_ANNUAL_RATE
 
 @router.get("/api/mortgage-analysis/")
 async def mortgage_analysis(
     user_id: str, 
     home_value: int,  # Zillow 대신 직접 전달받은 집값
     loan_amount: int, 
-    down_payment: int
+    down_payment: int,
+    credit_score: Optional[int] = Query(None, description="Credit score (Plaid does not provide one; if omitted the credit condition is reported as unknown and the status is Incomplete)")
 ):
     try:
-        # Plaid에서 사용자 재무 정보 조회
-        plaid_data = get_plaid_sandbox_data(user_id)
-        credit_score = plaid_data["credit_score"]
-        income = plaid_data["income"]
-        debt = plaid_data["debt"]
+        # 연결된 Plaid item으로 계산해 둔 재무 프로필 조회 (네트워크 호출 없음)
+        profile_service = financial_profile.get_service()
+        profile = await profile_service.get_profile(user_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="No linked Plaid account for this user")
+        if profile["income"] is None:
+            # 거래 내역이 아직 준비되지 않음 (백그라운드에서 재시도 중)
+            raise HTTPException(
+                status_code=503,
+                detail="Financial profile is still being computed; please retry",
+                headers={"Retry-After": str(math.ceil(profile_service.retry_after))},
+            )
+        if not profile["income"]:
+            raise HTTPException(status_code=422, detail="Income could not be determined from linked accounts")
+        # income은 연 소득, debt는 월 부채 상환액
+        income = profile["income"]
+        debt = profile["debt"] or 0
 
         # FRED에서 현재 모기지 금리 조회
-        mortgage_rate = get_current_mortgage_rate()
+        mortgage_rate = await get_current_mortgage_rate()
 
         # 계산
         LTV = (loan_amount / home_value) * 100
-        DTI = (debt / income) * 100
+        DTI = (debt / (income / 12)) * 100
         monthly_payment = (loan_amount * (mortgage_rate/100/12)) / (1 - (1 + mortgage_rate/100/12)**(-360))
 
-        # 승인 조건 체크
+        # 승인 조건 체크 (신용점수를 받지 못하면 None = 확인 불가)
         conditions = {
-            "credit_score": credit_score > 650,
+            "credit_score": credit_score > 650 if credit_score is not None else None,
             "dti": DTI < 43,
             "ltv": LTV < 80,
             "income_sufficient": monthly_payment < (income / 12) * 0.28
         }
 
-        approval = "Approved" if all(conditions.values()) else "Rejected"
+        # 충족하지 못한 조건이 있으면 거절, 확인할 수 없는 조건이 남아 있으면 승인하지 않고 보류
+        if any(ok is False for ok in conditions.values()):
+            approval = "Rejected"
+        elif any(ok is None for ok in conditions.values()):
+            approval = "Incomplete"
+        else:
+            approval = "Approved"
+
+        def mark(ok: Optional[bool]) -> str:
+            return "❔" if ok is None else ("✅" if ok else "❌")
         
         return {
             "credit_score": credit_score,
@@ -120,50 +194,68 @@ async def mortgage_analysis(
             "DTI_ratio": round(DTI, 2),
             "approval_status": approval,
             "approval_details": {
-                "신용점수 충족": "✅" if conditions["credit_score"] else "❌",
-                "DTI 비율 충족": "✅" if conditions["dti"] else "❌",
-                "LTV 비율 충족": "✅" if conditions["ltv"] else "❌",
-                "소득 대비 월상환액 충족": "✅" if conditions["income_sufficient"] else "❌"
-            }
+                "신용점수 충족": mark(conditions["credit_score"]),
+                "DTI 비율 충족": mark(conditions["dti"]),
+                "LTV 비율 충족": mark(conditions["ltv"]),
+                "소득 대비 월상환액 충족": mark(conditions["income_sufficient"])
+            },
+            # 판정에 쓰지 못한 조건 (입력 없음)
+            "unknown_conditions": [name for name, ok in conditions.items() if ok is None],
+            "profile_computed_at": profile["computed_at"],
+            # 거래 내역을 아직 읽지 못해 계산에서 빠진 연결 item 수
+            "pending_items": profile["pending_items"]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/mortgage-rates/historical/")
-async def get_historical_rates():
-    """FRED API에서 역사적 모기지 금리 데이터 조회"""
+async def get_historical_rates(
+    start: Optional[date] = Query(None, description="First date (inclusive)"),
+    end: Optional[date] = Query(None, description="Last date (inclusive)"),
+    frequency: Literal["weekly", "monthly", "yearly"] = Query("weekly", description="weekly = raw FRED observations; monthly/yearly = averages"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Return only the most recent N points"),
+):
+    """로컬에 저장된 FRED 모기지 금리 이력 조회 (오래된 순)
+
+    기간을 지정하지 않으면 최근 12개 관측치를 반환합니다. FRED에 연결할 수 없으면
+    저장된 데이터로 응답하고, 저장된 데이터도 없으면 503을 반환합니다.
+    """
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
     try:
-        url = f"https://api.stlouisfed.org/fred/series/observations"
-        params = {
-            "series_id": "MORTGAGE30US",
-            "api_key": FRED_API_KEY,
-            "file_type": "json",
-            "sort_order": "desc",
-            "limit": 12
-        }
-        
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            return [
-                {
-                    "date": item["date"],
-                    "rate": float(item["value"])
-                }
-                for item in data["observations"]
-            ]
+        start_key = start.isoformat() if start else None
+        end_key = end.isoformat() if end else None
+        if frequency == "weekly":
+            if limit is None and start is None and end is None:
+                limit = 12
+            rates = await load_rate_history(start_key, end_key, limit)
         else:
-            raise Exception("FRED API 호출 실패")
+            await ensure_rate_history()
+            rates = await http_clients.run_blocking(rate_history.get_store().resample, frequency, start_key, end_key)
+            if limit:
+                rates = rates[-limit:]
+
+        if not rates and await http_clients.run_blocking(rate_history.get_store().latest_date) is None:
+            raise HTTPException(status_code=503, detail="Rate history is unavailable")
+        return rates
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"FRED API 에러: {str(e)}")
-        # 테스트용 더미 데이터 반환
-        return [
-            {
-                "date": f"2024-{month:02d}-01",
-                "rate": 3.5 + (month * 0.1)
-            }
-            for month in range(1, 13)
-        ]
+        logger.error(f"Error loading rate history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/mortgage-rates/cache-stats",
+    response_model=Dict[str, Any],
+    summary="Get FRED rate cache stats",
+    description="Returns refresh metrics of the FRED rate provider and the local rate history store")
+async def get_rate_cache_stats():
+    return {
+        **fred_cache.stats(),
+        "history": await http_clients.run_blocking(rate_history.get_store().stats),
+        "simulation": simulation_cache.stats(),
+    }
 
 class MortgageAnalysisRequest(BaseModel):
     home_value: float = Field(..., description="Property value", example=500000)
@@ -180,6 +272,169 @@ class MortgageAnalysisResponse(BaseModel):
     LTV_ratio: float
     approval_details: Dict[str, str]
 
+class MortgageBatchRequest(BaseModel):
+    applications: List[Dict[str, Any]] = Field(..., description="Mortgage applications (MortgageAnalysisRequest fields)")
+    annual_rate: float = Field(mortgage_calc.DEFAULT_ANNUAL_RATE, ge=0, le=30, description="Annual interest rate (%)")
+    term_months: int = Field(mortgage_calc.DEFAULT_TERM_MONTHS, ge=1, le=600, description="Loan term in months")
+
+class MortgageBatchItem(BaseModel):
+    index: int
+    result: Optional[MortgageAnalysisResponse] = None
+    errors: Optional[List[Dict[str, Any]]] = None
+
+class MortgageBatchResponse(BaseModel):
+    results: List[MortgageBatchItem]
+    approved: int
+    denied: int
+    invalid: int
+
+def build_approval_details(credit_ok: bool, dti_ok: bool, ltv_ok: bool, down_payment_ok: bool) -> Dict[str, str]:
+    return {
+        "Credit Score": "✅ Sufficient" if credit_ok else "❌ Insufficient",
+        "DTI Ratio": "✅ Acceptable" if dti_ok else "❌ Too High",
+        "LTV Ratio": "✅ Within Limit" if ltv_ok else "❌ Too High",
+        "Down Payment": "✅ Sufficient" if down_payment_ok else "❌ Insufficient"
+    }
+
+def validate_application(item: Dict[str, Any]):
+    """배치 항목 하나를 검증 (실패 시 오류 목록 반환)"""
+    try:
+        application = MortgageAnalysisRequest.model_validate(item)
+    except ValidationError as e:
+        return None, e.errors(include_url=False, include_context=False)
+
+    errors = [
+        {"loc": [name], "msg": f"{name} must be greater than 0", "type": "greater_than"}
+        for name in ("home_value", "annual_income")
+        if getattr(application, name) <= 0
+    ]
+    return (None, errors) if errors else (application, None)
+
+class MortgageScenarioRequest(BaseModel):
+    home_value: float = Field(..., gt=0, description="Property value", example=500000)
+    annual_income: float = Field(..., gt=0, description="Annual income", example=120000)
+    total_debt: float = Field(..., ge=0, description="Total current debt", example=1500)
+    credit_score: int = Field(..., description="Credit score", example=720)
+    rates: Optional[List[float]] = Field(None, description="Annual rates (%) to compare", example=[5.5, 6.0, 6.5])
+    rate_start: Optional[float] = Field(None, ge=0, le=30, description="Rate range start (%)")
+    rate_stop: Optional[float] = Field(None, ge=0, le=30, description="Rate range end (%), inclusive")
+    rate_step: float = Field(0.125, gt=0, description="Rate range step (%)")
+    terms_years: List[int] = Field(list(mortgage_calc.SCENARIO_TERMS_YEARS), description="Loan terms in years (10/15/20/30)")
+    down_payment_pcts: List[float] = Field([5, 10, 20, 25], description="Down payment percentages to compare")
+
+def scenario_rates(request: MortgageScenarioRequest) -> Optional[List[float]]:
+    """요청의 금리 목록 또는 범위를 금리 리스트로 변환 (없으면 None)"""
+    if request.rates:
+        return request.rates
+    if request.rate_start is None:
+        return None
+    stop = request.rate_stop if request.rate_stop is not None else request.rate_start
+    if stop < request.rate_start:
+        raise HTTPException(status_code=400, detail="rate_stop must be >= rate_start")
+    count = int(np.floor((stop - request.rate_start) / request.rate_step + 1e-9)) + 1
+    if count > MAX_SCENARIO_CELLS:
+        raise HTTPException(status_code=400, detail="Too many rates in range")
+    return (request.rate_start + np.arange(count) * request.rate_step).tolist()
+
+class AmortizationRequest(BaseModel):
+    loan_amount: float = Field(..., gt=0, description="Loan principal", example=400000)
+    annual_rate: Optional[float] = Field(None, ge=0, le=30, description="Annual rate (%); defaults to the current FRED 30-year rate")
+    term_months: int = Field(mortgage_calc.DEFAULT_TERM_MONTHS, ge=1, le=600, description="Loan term in months")
+    extra_monthly_principal: float = Field(0, ge=0, description="Extra principal paid every month")
+    extra_payments: Dict[int, float] = Field({}, description="One-off extra principal payments keyed by payment number (1-based)")
+    year: Optional[int] = Field(None, ge=1, description="Include interest/principal paid in this loan year")
+    summary_only: bool = Field(False, description="Return only the closed-form summary")
+    stream: bool = Field(False, description="Stream the schedule as NDJSON")
+
+class RateRiskRequest(BaseModel):
+    loan_amount: float = Field(..., gt=0, description="Loan principal", example=400000)
+    initial_rate: Optional[float] = Field(None, ge=0, le=30, description="Initial (teaser) rate (%); defaults to the current FRED 30-year rate")
+    term_months: int = Field(mortgage_calc.DEFAULT_TERM_MONTHS, ge=12, le=600, description="Loan term in months")
+    fixed_months: int = Field(60, ge=1, description="Initial fixed-rate period in months (60 = 5/1 ARM)")
+    reset_months: int = Field(12, ge=1, le=120, description="Months between rate resets")
+    margin: Optional[float] = Field(None, ge=-10, le=10, description="Reset rate = index + margin; defaults to initial_rate - current index")
+    initial_cap: float = Field(2.0, ge=0, description="Max change at the first reset (%p)")
+    periodic_cap: float = Field(2.0, ge=0, description="Max change at later resets (%p)")
+    lifetime_cap: float = Field(5.0, ge=0, description="Max rate above the initial rate (%p)")
+    floor: float = Field(0.0, ge=0, description="Minimum rate (%)")
+    model: Literal["mean_reverting", "bootstrap"] = Field("mean_reverting", description="Rate path model fitted to the FRED history")
+    paths: int = Field(100000, ge=1000, description="Number of simulated rate paths")
+    seed: int = Field(0, ge=0, description="RNG seed; the same parameters and seed give the same result")
+
+class AffordabilityRequest(BaseModel):
+    annual_income: float = Field(..., gt=0, description="Annual income", example=120000)
+    total_debt: float = Field(0, ge=0, description="Monthly debt payments", example=500)
+    credit_score: int = Field(..., description="Credit score", example=720)
+    annual_rate: Optional[float] = Field(None, ge=0, le=30, description="Annual rate (%); defaults to the current FRED 30-year rate")
+    term_months: int = Field(mortgage_calc.DEFAULT_TERM_MONTHS, ge=1, le=600, description="Loan term in months")
+    down_payment: Optional[float] = Field(None, ge=0, description="Available down payment cash; if omitted down_payment_pct of the price is assumed")
+    down_payment_pct: float = Field(mortgage_calc.MIN_DOWN_PAYMENT_RATIO, ge=0, lt=100, description="Down payment percentage when down_payment is omitted")
+    tax_insurance_rate: float = Field(0, ge=0, le=10, description="Annual property tax + insurance as % of price")
+    hoa_monthly: float = Field(0, ge=0, description="Monthly HOA dues")
+
+class AffordabilityBatchRequest(BaseModel):
+    applicants: List[AffordabilityRequest]
+
+def solve_affordability(requests: List[AffordabilityRequest], fred_rate: float) -> List[Dict[str, Any]]:
+    """여러 신청자의 최대 구매 가능 집값을 한 번에 계산"""
+    # 계약금 현금을 준 신청자와 비율만 준 신청자를 나눠 계산
+    groups = [
+        [i for i, r in enumerate(requests) if r.down_payment is not None],
+        [i for i, r in enumerate(requests) if r.down_payment is None],
+    ]
+    results: List[Dict[str, Any]] = [None] * len(requests)
+    for fixed_down, indexes in zip((True, False), groups):
+        if not indexes:
+            continue
+        subset = [requests[i] for i in indexes]
+        solved = mortgage_calc.max_affordable_price(
+            annual_income=np.array([r.annual_income for r in subset]),
+            total_debt=np.array([r.total_debt for r in subset]),
+            credit_score=np.array([r.credit_score for r in subset]),
+            annual_rate=np.array([fred_rate if r.annual_rate is None else r.annual_rate for r in subset]),
+            term_months=np.array([r.term_months for r in subset]),
+            down_payment=np.array([r.down_payment for r in subset]) if fixed_down else None,
+            down_payment_pct=np.array([r.down_payment_pct for r in subset]),
+            tax_insurance_rate=np.array([r.tax_insurance_rate for r in subset]),
+            hoa_monthly=np.array([r.hoa_monthly for r in subset]),
+        )
+        rounded = {name: values.round(2).tolist() for name, values in solved.items() if values.dtype != bool}
+        flags = {name: values.tolist() for name, values in solved.items() if values.dtype == bool}
+        for j, i in enumerate(indexes):
+            r = requests[i]
+            results[i] = {
+                "max_home_value": rounded["max_home_value"][j],
+                "loan_amount": rounded["loan_amount"][j],
+                "down_payment": rounded["down_payment"][j],
+                "monthly_payment": rounded["monthly_payment"][j],
+                "housing_payment": rounded["housing_payment"][j],
+                "annual_rate": fred_rate if r.annual_rate is None else r.annual_rate,
+                "approvable": flags["credit_ok"][j] and rounded["max_home_value"][j] > 0,
+                "limiting_factor": (
+                    "credit_score" if not flags["credit_ok"][j]
+                    else "down_payment" if flags["limited_by_down_payment"][j]
+                    else "income"
+                ),
+            }
+    return results
+
+# 스트리밍 시 한 번에 직렬화하는 회차 수
+AMORTIZATION_STREAM_CHUNK = 120
+
+def schedule_rows(schedule: Dict[str, np.ndarray], start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+    names = ("period", "payment", "principal", "interest", "balance")
+    columns = [schedule["period"][start:stop].tolist()] + [
+        schedule[name][start:stop].round(2).tolist() for name in names[1:]
+    ]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+def amortization_ndjson(summary: Dict[str, Any], schedule: Dict[str, np.ndarray]):
+    """첫 줄은 요약, 이후 회차별 행을 청크 단위로 직렬화"""
+    yield json.dumps({"summary": summary}) + "\n"
+    for start in range(0, len(schedule["period"]), AMORTIZATION_STREAM_CHUNK):
+        rows = schedule_rows(schedule, start, start + AMORTIZATION_STREAM_CHUNK)
+        yield "".join(json.dumps(row) + "\n" for row in rows)
+
 @router.post("/mortgage-analysis",
     response_model=MortgageAnalysisResponse,
     summary="Analyze mortgage application",
@@ -209,9 +464,9 @@ async def analyze_mortgage(request: MortgageAnalysisRequest):
         ltv_ratio = (request.loan_amount / request.home_value) * 100
         
         # 월 상환액 계산 (30년 고정금리 기준, 연 3.5% 가정)
-        annual_rate = 3.5
+        annual_rate = mortgage_calc.DEFAULT_ANNUAL_RATE
         monthly_rate = annual_rate / 12 / 100
-        loan_term_months = 30 * 12
+        loan_term_months = mortgage_calc.DEFAULT_TERM_MONTHS
         
         monthly_payment = (
             request.loan_amount * 
@@ -220,12 +475,12 @@ async def analyze_mortgage(request: MortgageAnalysisRequest):
         )
         
         # 승인 조건 검사
-        approval_details = {
-            "Credit Score": "✅ Sufficient" if request.credit_score >= 620 else "❌ Insufficient",
-            "DTI Ratio": "✅ Acceptable" if dti_ratio <= 43 else "❌ Too High",
-            "LTV Ratio": "✅ Within Limit" if ltv_ratio <= 80 else "❌ Too High",
-            "Down Payment": "✅ Sufficient" if (request.down_payment / request.home_value * 100) >= 20 else "❌ Insufficient"
-        }
+        approval_details = build_approval_details(
+            request.credit_score >= mortgage_calc.MIN_CREDIT_SCORE,
+            dti_ratio <= mortgage_calc.MAX_DTI_RATIO,
+            ltv_ratio <= mortgage_calc.MAX_LTV_RATIO,
+            (request.down_payment / request.home_value * 100) >= mortgage_calc.MIN_DOWN_PAYMENT_RATIO,
+        )
         
         # 전체 승인 여부 결정
         is_approved = all(detail.startswith("✅") for detail in approval_details.values())
@@ -245,6 +500,257 @@ async def analyze_mortgage(request: MortgageAnalysisRequest):
         logger.error(f"Error analyzing mortgage: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/mortgage-analysis/batch",
+    response_model=MortgageBatchResponse,
+    summary="Analyze mortgage applications in batch",
+    description="""
+    Analyzes many mortgage applications in one request using vectorized NumPy evaluation.
+    Results are returned in input order; invalid items carry per-item validation errors.
+    """)
+async def analyze_mortgage_batch(request: MortgageBatchRequest):
+    if len(request.applications) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {MAX_BATCH_SIZE} applications")
+
+    try:
+        logger.info(f"Analyzing {len(request.applications)} mortgage applications in batch")
+
+        results: List[Dict[str, Any]] = []
+        valid_indexes = []
+        valid_applications = []
+        for index, item in enumerate(request.applications):
+            application, errors = validate_application(item)
+            if errors:
+                results.append({"index": index, "errors": errors})
+            else:
+                results.append({"index": index})
+                valid_indexes.append(index)
+                valid_applications.append(application)
+
+        if valid_applications:
+            columns = {
+                name: np.fromiter((getattr(a, name) for a in valid_applications), dtype='float64', count=len(valid_applications))
+                for name in MortgageAnalysisRequest.model_fields
+            }
+            # 전체 신청을 배열 연산으로 한 번에 평가
+            evaluated = mortgage_calc.evaluate_applications(
+                **columns,
+                annual_rate=request.annual_rate,
+                term_months=request.term_months,
+            )
+
+            rows = zip(
+                valid_indexes,
+                evaluated["monthly_payment"].round(2).tolist(),
+                evaluated["dti_ratio"].round(2).tolist(),
+                evaluated["ltv_ratio"].round(2).tolist(),
+                evaluated["credit_ok"].tolist(),
+                evaluated["dti_ok"].tolist(),
+                evaluated["ltv_ok"].tolist(),
+                evaluated["down_payment_ok"].tolist(),
+                evaluated["approved"].tolist(),
+            )
+            for index, payment, dti, ltv, credit_ok, dti_ok, ltv_ok, down_ok, approved in rows:
+                results[index]["result"] = {
+                    "approval_status": "Approved" if approved else "Denied",
+                    "monthly_payment": payment,
+                    "DTI_ratio": dti,
+                    "LTV_ratio": ltv,
+                    "approval_details": build_approval_details(credit_ok, dti_ok, ltv_ok, down_ok)
+                }
+
+        approved_count = sum(1 for item in results if item.get("result", {}).get("approval_status") == "Approved")
+        invalid_count = len(results) - len(valid_applications)
+        return {
+            "results": results,
+            "approved": approved_count,
+            "denied": len(valid_applications) - approved_count,
+            "invalid": invalid_count
+        }
+
+    except Exception as e:
+        logger.error(f"Error analyzing mortgage batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mortgage-analysis/scenarios",
+    response_model=Dict[str, Any],
+    summary="Compare mortgage scenarios",
+    description="""
+    Computes the monthly payment and approval matrix for every combination of
+    rate, term (10/15/20/30 years) and down payment percentage in one vectorized pass.
+    Matrices are indexed as [rate][term][down_payment]. If no rates are given the
+    current FRED 30-year rate is used.
+    """)
+async def mortgage_scenarios(request: MortgageScenarioRequest):
+    try:
+        invalid_terms = sorted(set(request.terms_years) - set(mortgage_calc.SCENARIO_TERMS_YEARS))
+        if invalid_terms or not request.terms_years:
+            raise HTTPException(status_code=400, detail=f"terms_years must be chosen from {list(mortgage_calc.SCENARIO_TERMS_YEARS)}")
+        if not request.down_payment_pcts or any(not 0 <= pct < 100 for pct in request.down_payment_pcts):
+            raise HTTPException(status_code=400, detail="down_payment_pcts must be in [0, 100)")
+
+        rates = scenario_rates(request)
+        if rates is None:
+            rates = [await get_current_mortgage_rate()]
+        if any(not 0 <= rate <= 30 for rate in rates):
+            raise HTTPException(status_code=400, detail="rates must be in [0, 30]")
+
+        cells = len(rates) * len(request.terms_years) * len(request.down_payment_pcts)
+        if cells > MAX_SCENARIO_CELLS:
+            raise HTTPException(status_code=400, detail=f"Scenario grid exceeds {MAX_SCENARIO_CELLS} cells")
+
+        # 입력을 반올림해 캐시 키로 사용 (슬라이더 드래그 중 같은 조합 재사용)
+        return mortgage_calc.scenario_grid(
+            round(request.home_value),
+            round(request.annual_income),
+            round(request.total_debt),
+            request.credit_score,
+            tuple(round(rate, 3) for rate in rates),
+            tuple(request.terms_years),
+            tuple(round(pct, 2) for pct in request.down_payment_pcts),
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing mortgage scenarios: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mortgage-analysis/amortization",
+    response_model=Dict[str, Any],
+    summary="Generate amortization schedule",
+    description="""
+    Returns the per-period principal/interest/balance schedule and a summary.
+    Totals come from closed-form formulas, so `summary_only` requests without
+    one-off extra payments cost O(1). With `stream=true` the schedule is sent as
+    NDJSON: a summary line followed by one line per payment.
+    """)
+async def mortgage_amortization(request: AmortizationRequest):
+    try:
+        annual_rate = request.annual_rate
+        if annual_rate is None:
+            annual_rate = await get_current_mortgage_rate()
+        if request.year is not None and request.year * 12 > request.term_months + 11:
+            raise HTTPException(status_code=400, detail="year is beyond the loan term")
+        if any(amount < 0 for amount in request.extra_payments.values()):
+            raise HTTPException(status_code=400, detail="extra_payments must be non-negative")
+
+        args = (request.loan_amount, annual_rate, request.term_months)
+        one_off = {period: amount for period, amount in request.extra_payments.items() if amount > 0}
+
+        if not one_off:
+            # 닫힌 형식 요약 (일정 전체를 만들지 않음)
+            summary = mortgage_calc.amortization_summary(*args, request.extra_monthly_principal, request.year)
+            if request.summary_only:
+                return {"summary": summary}
+
+        schedule = mortgage_calc.amortization_schedule(*args, request.extra_monthly_principal, one_off)
+        if one_off:
+            summary = mortgage_calc.schedule_summary(schedule, *args, request.year)
+            if request.summary_only:
+                return {"summary": summary}
+
+        if request.stream:
+            return StreamingResponse(amortization_ndjson(summary, schedule), media_type="application/x-ndjson")
+        return {"summary": summary, "schedule": schedule_rows(schedule)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating amortization schedule: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mortgage-analysis/affordability",
+    response_model=Dict[str, Any],
+    summary="Maximum affordable home price",
+    description="""
+    Returns the maximum home value that satisfies the credit score, DTI <= 43%,
+    LTV <= 80% and 28% payment-to-income rules, solved analytically.
+    """)
+async def mortgage_affordability(request: AffordabilityRequest):
+    try:
+        fred_rate = await get_current_mortgage_rate() if request.annual_rate is None else None
+        return solve_affordability([request], fred_rate)[0]
+    except Exception as e:
+        logger.error(f"Error solving affordability: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mortgage-analysis/affordability/batch",
+    response_model=List[Dict[str, Any]],
+    summary="Maximum affordable home price (batch)",
+    description="Solves the maximum affordable home price for many applicants at once; results are in input order")
+async def mortgage_affordability_batch(request: AffordabilityBatchRequest):
+    if len(request.applicants) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size exceeds {MAX_BATCH_SIZE} applicants")
+    try:
+        needs_rate = any(applicant.annual_rate is None for applicant in request.applicants)
+        fred_rate = await get_current_mortgage_rate() if needs_rate else None
+        return solve_affordability(request.applicants, fred_rate)
+    except Exception as e:
+        logger.error(f"Error solving affordability batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mortgage-analysis/rate-risk",
+    response_model=Dict[str, Any],
+    summary="Monte Carlo rate-risk simulation for an ARM",
+    description="""
+    Fits a mean-reverting (AR(1)) or bootstrap model to the FRED MORTGAGE30US
+    history, samples future index paths and reports payment percentiles per
+    rate period, the peak payment, total interest and payment shock probabilities.
+    Results are cached by a hash of the parameters and the fitted model.
+    """)
+async def mortgage_rate_risk(request: RateRiskRequest):
+    if request.paths > MAX_SIMULATION_PATHS:
+        raise HTTPException(status_code=413, detail=f"paths exceeds {MAX_SIMULATION_PATHS}")
+    if request.fixed_months >= request.term_months:
+        raise HTTPException(status_code=422, detail="fixed_months must be shorter than term_months")
+    try:
+        try:
+            history = await load_rate_history(limit=SIMULATION_HISTORY_WEEKS)
+            model = rate_simulation.fit_rate_model(history, request.model)
+        except Exception as e:
+            logger.error(f"Rate history unavailable for simulation: {str(e)}")
+            raise HTTPException(status_code=503, detail="Rate history is unavailable")
+
+        initial_rate = model.current if request.initial_rate is None else request.initial_rate
+        terms = rate_simulation.ArmTerms(
+            principal=request.loan_amount,
+            initial_rate=initial_rate,
+            term_months=request.term_months,
+            fixed_months=request.fixed_months,
+            reset_months=request.reset_months,
+            margin=initial_rate - model.current if request.margin is None else request.margin,
+            initial_cap=request.initial_cap,
+            periodic_cap=request.periodic_cap,
+            lifetime_cap=request.lifetime_cap,
+            floor=request.floor,
+        )
+        key = rate_simulation.params_hash(terms, model, request.paths, request.seed)
+        computed = []
+
+        def run():
+            computed.append(True)
+            return rate_simulation.simulate(terms, model, request.paths, request.seed)
+
+        started = time.perf_counter()
+        result = await simulation_cache.get(key, run)
+        return {
+            **result,
+            # 실행 정보는 캐시 항목이 아니라 이 요청 기준 (캐시에서 꺼냈으면 "cache")
+            "executor": rate_simulation.executor_kind(request.paths) if computed else "cache",
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "initial_rate": initial_rate,
+            "margin": round(terms.margin, 4),
+            "paths": request.paths,
+            "seed": request.seed,
+            "model": model.describe(),
+            "params_hash": key,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error running rate-risk simulation: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/")  # prefix가 /api/mortgage이므로 여기서는 /만 사용
 async def get_mortgage():
     try:
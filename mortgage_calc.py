@@ -0,0 +1,402 @@
+import numpy as np
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+# analyze_mortgage 기본 가정 (30년 고정, 연 3.5%)
+DEFAULT_ANNUAL_RATE = 3.5
+DEFAULT_TERM_MONTHS = 30 * 12
+
+# 승인 조건
+MIN_CREDIT_SCORE = 620
+MAX_DTI_RATIO = 43
+MAX_LTV_RATIO = 80
+MIN_DOWN_PAYMENT_RATIO = 20
+# 월 소득 대비 월 상환액 상한 (mortgage_analysis의 income_sufficient 조건)
+MAX_PAYMENT_TO_INCOME_RATIO = 28
+
+# 시나리오 비교에서 허용하는 상환 기간 (년)
+SCENARIO_TERMS_YEARS = (10, 15, 20, 30)
+
+
+def amortized_payment(principal, annual_rate, term_months) -> np.ndarray:
+    """원리금 균등 상환 월 납입액 (배열 브로드캐스팅 지원)
+
+    Args:
+        principal: 대출 원금
+        annual_rate: 연 이자율 (%)
+        term_months: 상환 기간 (개월)
+    """
+    principal = np.asarray(principal, dtype='float64')
+    monthly_rate = np.asarray(annual_rate, dtype='float64') / 12 / 100
+    term_months = np.asarray(term_months, dtype='float64')
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # 0에 가까운 금리에서도 정확하도록 log1p/expm1 사용
+        log_growth = term_months * np.log1p(monthly_rate)
+        payment = principal * (monthly_rate * np.exp(log_growth)) / np.expm1(log_growth)
+    # 금리 0%면 원금을 기간으로 나눔
+    return np.where(monthly_rate == 0, principal / term_months, payment)
+
+
+def evaluate_applications(
+    home_value,
+    loan_amount,
+    down_payment,
+    annual_income,
+    total_debt,
+    credit_score,
+    annual_rate=DEFAULT_ANNUAL_RATE,
+    term_months=DEFAULT_TERM_MONTHS,
+) -> Dict[str, np.ndarray]:
+    """여러 대출 신청을 한 번에 평가 (analyze_mortgage와 같은 기준)
+
+    모든 인자는 스칼라 또는 같은 길이의 배열이며, 계산은 배열 연산으로 수행합니다.
+    total_debt는 월 부채 상환액으로 보고 월 소득 대비 비율(DTI)을 계산합니다.
+    """
+    home_value = np.asarray(home_value, dtype='float64')
+    loan_amount = np.asarray(loan_amount, dtype='float64')
+    monthly_income = np.asarray(annual_income, dtype='float64') / 12
+
+    dti_ratio = np.asarray(total_debt, dtype='float64') / monthly_income * 100
+    ltv_ratio = loan_amount / home_value * 100
+    down_payment_ratio = np.asarray(down_payment, dtype='float64') / home_value * 100
+    monthly_payment = amortized_payment(loan_amount, annual_rate, term_months)
+
+    credit_ok = np.asarray(credit_score) >= MIN_CREDIT_SCORE
+    dti_ok = dti_ratio <= MAX_DTI_RATIO
+    ltv_ok = ltv_ratio <= MAX_LTV_RATIO
+    down_payment_ok = down_payment_ratio >= MIN_DOWN_PAYMENT_RATIO
+
+    return {
+        "monthly_payment": monthly_payment,
+        "dti_ratio": dti_ratio,
+        "ltv_ratio": ltv_ratio,
+        "down_payment_ratio": down_payment_ratio,
+        "credit_ok": credit_ok,
+        "dti_ok": dti_ok,
+        "ltv_ok": ltv_ok,
+        "down_payment_ok": down_payment_ok,
+        "approved": credit_ok & dti_ok & ltv_ok & down_payment_ok,
+    }
+
+
+@lru_cache(maxsize=512)
+def scenario_grid(
+    home_value: float,
+    annual_income: float,
+    total_debt: float,
+    credit_score: int,
+    rates: Tuple[float, ...],
+    terms_years: Tuple[int, ...],
+    down_payment_pcts: Tuple[float, ...],
+) -> Dict[str, Any]:
+    """금리 x 기간 x 계약금 비율 조합의 상환액/승인 행렬
+
+    (금리, 기간, 계약금) 축으로 브로드캐스팅해 한 번에 계산하며, 결과는
+    반올림된 입력 튜플 단위로 캐시됩니다. 반환된 dict는 공유되므로 수정하면
+    안 됩니다.
+
+    Returns:
+        행렬 값은 [금리][기간][계약금] 순서의 중첩 리스트
+    """
+    rate = np.asarray(rates, dtype='float64')[:, None, None]
+    term_months = np.asarray(terms_years, dtype='float64')[None, :, None] * 12
+    down_pct = np.asarray(down_payment_pcts, dtype='float64')[None, None, :]
+
+    loan_amount = home_value * (1 - down_pct / 100)
+    monthly_payment = amortized_payment(loan_amount, rate, term_months)
+    monthly_income = annual_income / 12
+    shape = monthly_payment.shape
+
+    dti_ratio = total_debt / monthly_income * 100
+    ltv_ratio = loan_amount / home_value * 100
+    payment_to_income = monthly_payment / monthly_income * 100
+
+    credit_ok = credit_score >= MIN_CREDIT_SCORE
+    dti_ok = dti_ratio <= MAX_DTI_RATIO
+    ltv_ok = ltv_ratio <= MAX_LTV_RATIO
+    down_payment_ok = down_pct >= MIN_DOWN_PAYMENT_RATIO
+    payment_ok = payment_to_income <= MAX_PAYMENT_TO_INCOME_RATIO
+    approved = credit_ok & dti_ok & ltv_ok & down_payment_ok & payment_ok
+
+    return {
+        "rates": list(rates),
+        "terms_years": list(terms_years),
+        "down_payment_pcts": list(down_payment_pcts),
+        "loan_amounts": loan_amount.ravel().round(2).tolist(),
+        "LTV_ratios": ltv_ratio.ravel().round(2).tolist(),
+        "DTI_ratio": round(float(dti_ratio), 2),
+        "credit_score_ok": bool(credit_ok),
+        "dti_ok": bool(dti_ok),
+        "monthly_payment": monthly_payment.round(2).tolist(),
+        "total_interest": (monthly_payment * term_months - loan_amount).round(2).tolist(),
+        "payment_to_income_ratio": payment_to_income.round(2).tolist(),
+        "approved": np.broadcast_to(approved, shape).tolist(),
+        "approved_count": int(np.broadcast_to(approved, shape).sum()),
+    }
+
+
+def balance_after(principal, annual_rate, payment, periods):
+    """매월 payment씩 periods번 납부한 뒤의 잔액 (닫힌 형식)"""
+    r = annual_rate / 12 / 100
+    if r == 0:
+        return principal - payment * periods
+    growth = (1 + r) ** periods
+    return principal * growth - payment * (growth - 1) / r
+
+
+def payoff_periods(principal: float, annual_rate: float, payment: float) -> int:
+    """매월 payment씩 납부할 때 상환 완료까지의 납부 횟수"""
+    r = annual_rate / 12 / 100
+    if r == 0:
+        exact = principal / payment
+    else:
+        exact = -np.log1p(-r * principal / payment) / np.log1p(r)
+    return int(np.ceil(exact - 1e-9))
+
+
+def amortization_summary(
+    principal: float,
+    annual_rate: float,
+    term_months: int,
+    extra_monthly: float = 0.0,
+    year: int = None,
+) -> Dict[str, Any]:
+    """상환 일정 요약 (O(1), 일정 전체를 만들지 않음)
+
+    매월 같은 금액의 추가 원금 상환(extra_monthly)까지는 닫힌 형식으로 계산합니다.
+    year를 지정하면 해당 연도(1부터)의 이자/원금 합계도 포함합니다.
+    """
+    r = annual_rate / 12 / 100
+    base_payment = float(amortized_payment(principal, annual_rate, term_months))
+    payment = base_payment + extra_monthly
+
+    num_payments = min(payoff_periods(principal, annual_rate, payment), term_months)
+    # 마지막 회차는 남은 잔액과 이자만 납부
+    last_payment = balance_after(principal, annual_rate, payment, num_payments - 1) * (1 + r)
+    total_paid = payment * (num_payments - 1) + last_payment
+    total_interest = total_paid - principal
+    base_total_interest = base_payment * term_months - principal
+
+    summary = {
+        "principal": round(principal, 2),
+        "annual_rate": annual_rate,
+        "term_months": term_months,
+        "monthly_payment": round(base_payment, 2),
+        "extra_monthly_principal": round(extra_monthly, 2),
+        "num_payments": num_payments,
+        "last_payment": round(last_payment, 2),
+        "total_paid": round(total_paid, 2),
+        "total_interest": round(total_interest, 2),
+        "interest_saved": round(base_total_interest - total_interest, 2),
+        "months_saved": term_months - num_payments,
+    }
+
+    if year is not None:
+        first = 12 * (year - 1) + 1
+        last = min(12 * year, num_payments)
+        if first > num_payments:
+            interest = principal_paid = 0.0
+        else:
+            start_balance = balance_after(principal, annual_rate, payment, first - 1)
+            end_balance = 0.0 if last == num_payments else balance_after(principal, annual_rate, payment, last)
+            principal_paid = start_balance - end_balance
+            paid = payment * (last - first + 1) if last < num_payments else payment * (last - first) + last_payment
+            interest = paid - principal_paid
+        summary["year"] = {
+            "year": year,
+            "interest_paid": round(interest, 2),
+            "principal_paid": round(principal_paid, 2),
+        }
+    return summary
+
+
+def amortization_schedule(
+    principal: float,
+    annual_rate: float,
+    term_months: int,
+    extra_monthly: float = 0.0,
+    extra_payments: Dict[int, float] = None,
+) -> Dict[str, np.ndarray]:
+    """회차별 원금/이자/잔액 일정 (벡터 누적 계산)
+
+    잔액 B_k = g^k * (P - Σ pay_j * g^-j) 를 cumsum으로 한 번에 구한 뒤
+    잔액이 0 이하가 되는 회차에서 일정을 끝냅니다.
+
+    Args:
+        extra_payments: 회차(1부터) -> 일시 추가 원금 상환액
+    """
+    r = annual_rate / 12 / 100
+    base_payment = float(amortized_payment(principal, annual_rate, term_months))
+    periods = np.arange(1, term_months + 1)
+
+    payments = np.full(term_months, base_payment + extra_monthly)
+    for period, amount in (extra_payments or {}).items():
+        if 1 <= period <= term_months:
+            payments[period - 1] += amount
+
+    growth = (1 + r) ** periods.astype('float64')
+    balance = growth * (principal - np.cumsum(payments / growth))
+    # 부동소수점 오차로 인한 아주 작은 잔액은 0으로 처리
+    balance[np.abs(balance) < 1e-6] = 0.0
+
+    paid_off = np.nonzero(balance <= 0)[0]
+    count = int(paid_off[0]) + 1 if len(paid_off) else term_months
+    balance = balance[:count]
+    previous = np.concatenate(([principal], balance[:-1]))
+
+    interest = previous * r
+    payments = payments[:count].copy()
+    # 마지막 회차는 남은 잔액과 이자만 납부
+    payments[-1] = previous[-1] + interest[-1]
+    balance[-1] = 0.0
+
+    return {
+        "period": periods[:count],
+        "payment": payments,
+        "principal": payments - interest,
+        "interest": interest,
+        "balance": balance,
+    }
+
+
+def schedule_summary(
+    schedule: Dict[str, np.ndarray],
+    principal: float,
+    annual_rate: float,
+    term_months: int,
+    year: int = None,
+) -> Dict[str, Any]:
+    """이미 만든 일정으로부터 요약 계산 (일시 추가 상환이 있을 때 사용)"""
+    base_payment = float(amortized_payment(principal, annual_rate, term_months))
+    total_paid = float(schedule["payment"].sum())
+    total_interest = float(schedule["interest"].sum())
+    num_payments = len(schedule["period"])
+    extra = schedule["payment"][:-1] - base_payment
+
+    summary = {
+        "principal": round(principal, 2),
+        "annual_rate": annual_rate,
+        "term_months": term_months,
+        "monthly_payment": round(base_payment, 2),
+        "extra_principal_total": round(float(extra.sum()), 2),
+        "num_payments": num_payments,
+        "last_payment": round(float(schedule["payment"][-1]), 2),
+        "total_paid": round(total_paid, 2),
+        "total_interest": round(total_interest, 2),
+        "interest_saved": round(base_payment * term_months - principal - total_interest, 2),
+        "months_saved": term_months - num_payments,
+    }
+    if year is not None:
+        in_year = (schedule["period"] > 12 * (year - 1)) & (schedule["period"] <= 12 * year)
+        summary["year"] = {
+            "year": year,
+            "interest_paid": round(float(schedule["interest"][in_year].sum()), 2),
+            "principal_paid": round(float(schedule["principal"][in_year].sum()), 2),
+        }
+    return summary
+
+
+def _affordability_feasible(home_value, down_payment, monthly_income, total_debt, credit_ok, k, t, hoa):
+    """주어진 집값이 모든 승인 조건을 만족하는지 (배열)"""
+    loan = np.maximum(home_value - down_payment, 0)
+    housing = k * loan + t * home_value + hoa
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ltv_ok = loan <= home_value * MAX_LTV_RATIO / 100 + 1e-6
+    return (
+        credit_ok
+        & ltv_ok
+        & (housing <= monthly_income * MAX_PAYMENT_TO_INCOME_RATIO / 100 + 1e-6)
+        & (total_debt + housing <= monthly_income * MAX_DTI_RATIO / 100 + 1e-6)
+    )
+
+
+def max_affordable_price(
+    annual_income,
+    total_debt,
+    credit_score,
+    annual_rate,
+    term_months,
+    down_payment=None,
+    down_payment_pct=MIN_DOWN_PAYMENT_RATIO,
+    tax_insurance_rate=0.0,
+    hoa_monthly=0.0,
+    search_iterations: int = 60,
+) -> Dict[str, np.ndarray]:
+    """승인 조건을 모두 만족하는 최대 집값 (배열 입력 지원)
+
+    조건: 신용점수, 월 주거비 ≤ 월 소득의 28%, (월 부채 + 월 주거비) ≤ 월 소득의 43%,
+    LTV ≤ 80% (= 계약금 20% 이상). 주거비(원리금 + 재산세/보험 + HOA)는 집값에
+    대해 선형이므로 닫힌 형식으로 역산하고, 검증에 실패한 항목(대출이 필요 없는
+    경우 등)만 [0, 상한] 구간 이분 탐색으로 구합니다.
+
+    Args:
+        total_debt: 월 부채 상환액 (analyze_mortgage와 같은 기준)
+        down_payment: 보유 계약금 (None이면 집값의 down_payment_pct%로 가정)
+        tax_insurance_rate: 집값 대비 연 재산세+보험료 (%)
+    """
+    monthly_income = np.asarray(annual_income, dtype='float64') / 12
+    total_debt = np.asarray(total_debt, dtype='float64')
+    credit_ok = np.asarray(credit_score) >= MIN_CREDIT_SCORE
+    k = amortized_payment(1.0, annual_rate, term_months)  # 대출 1달러당 월 원리금
+    t = np.asarray(tax_insurance_rate, dtype='float64') / 100 / 12
+    hoa = np.asarray(hoa_monthly, dtype='float64')
+    fixed_down = down_payment is not None
+    if fixed_down:
+        down_cash = np.asarray(down_payment, dtype='float64')
+    else:
+        pct = np.asarray(down_payment_pct, dtype='float64') / 100
+
+    def down_for(home_value):
+        return np.broadcast_to(down_cash, np.shape(home_value)) if fixed_down else home_value * pct
+
+    # 월 주거비 한도 (28% 규칙과 43% DTI 규칙 중 작은 값, HOA 제외)
+    budget = np.minimum(
+        monthly_income * MAX_PAYMENT_TO_INCOME_RATIO / 100,
+        monthly_income * MAX_DTI_RATIO / 100 - total_debt,
+    ) - hoa
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if fixed_down:
+            # k(H - D) + tH ≤ budget 그리고 D ≥ 20% H
+            by_payment = (budget + k * down_cash) / (k + t)
+            by_down_payment = down_cash / (MIN_DOWN_PAYMENT_RATIO / 100)
+        else:
+            # k(1 - p)H + tH ≤ budget, 계약금 비율이 20% 미만이면 승인 불가
+            by_payment = budget / (k * (1 - pct) + t)
+            by_down_payment = np.where(pct >= MIN_DOWN_PAYMENT_RATIO / 100, np.inf, 0.0)
+    approvable = credit_ok & (budget > 0)
+    home_value = np.where(approvable, np.maximum(np.minimum(by_payment, by_down_payment), 0), 0.0)
+
+    # 닫힌 형식 결과 검증 (실패한 항목만 이분 탐색)
+    feasible_args = (monthly_income, total_debt, credit_ok, k, t, hoa)
+    with np.errstate(invalid='ignore'):
+        checked = home_value * (1 - 1e-9)
+        valid = np.isfinite(home_value) & (
+            (home_value == 0) | _affordability_feasible(checked, down_for(checked), *feasible_args)
+        )
+    if not np.all(valid):
+        high = np.where(np.isfinite(home_value) & (home_value > 0), home_value, monthly_income * 12 * 50)
+        low = np.zeros_like(high)
+        for _ in range(search_iterations):
+            mid = (low + high) / 2
+            feasible = _affordability_feasible(mid, down_for(mid), *feasible_args)
+            low = np.where(feasible, mid, low)
+            high = np.where(feasible, high, mid)
+        home_value = np.where(valid, home_value, low)
+
+    down = np.minimum(down_for(home_value), home_value)
+    loan = home_value - down
+    principal_interest = k * loan
+    housing_payment = principal_interest + t * home_value + np.where(home_value > 0, hoa, 0)
+    shape = home_value.shape
+
+    return {
+        "max_home_value": home_value,
+        "loan_amount": loan,
+        "down_payment": down,
+        "monthly_payment": principal_interest,
+        "housing_payment": housing_payment,
+        "credit_ok": np.broadcast_to(credit_ok, shape),
+        "limited_by_down_payment": np.broadcast_to(approvable & (by_down_payment <= by_payment), shape),
+    }
@@ -0,0 +1,93 @@
+"""네트워크 없이 동작하는 AsyncOpenAI 대체 클라이언트 (테스트/오프라인 개발용)
+
+client.chat.completions.create(...)만 흉내 내며, 마지막 사용자 메시지를 그대로
+돌려주는 결정적인 응답을 만듭니다. OPENAI_OFFLINE_STUB=true면 chatbot이 이
+클라이언트를 사용합니다.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice, ChoiceDelta
+
+
+def stub_reply(messages: List[Dict[str, str]]) -> str:
+    question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    return f"[offline] {question}\n\nBestie, Senior Mortgage Advisor"
+
+
+class _StubResponse:
+    async def aclose(self):
+        pass
+
+
+class StubStream:
+    """AsyncStream처럼 청크를 비동기로 내보내는 스트림"""
+
+    def __init__(self, model: str, text: str, delay: float):
+        self.response = _StubResponse()
+        self._model = model
+        self._tokens = text.split(" ")
+        self._delay = delay
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        for i, token in enumerate(self._tokens):
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield ChatCompletionChunk(
+                id="stub",
+                object="chat.completion.chunk",
+                created=int(time.time()),
+                model=self._model,
+                choices=[ChunkChoice(
+                    index=0,
+                    delta=ChoiceDelta(content=token if i == 0 else f" {token}"),
+                    finish_reason="stop" if i == len(self._tokens) - 1 else None,
+                )],
+            )
+
+
+class _StubCompletions:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def create(self, *, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs: Any):
+        self.calls += 1
+        text = stub_reply(messages)
+        if stream:
+            return StubStream(model, text, self.delay)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return ChatCompletion(
+            id="stub",
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[Choice(
+                index=0,
+                finish_reason="stop",
+                message=ChatCompletionMessage(role="assistant", content=text),
+            )],
+        )
+
+
+class _StubChat:
+    def __init__(self, delay: float):
+        self.completions = _StubCompletions(delay)
+
+
+class StubAsyncOpenAI:
+    """AsyncOpenAI와 같은 모양의 오프라인 클라이언트
+
+    Args:
+        delay: 응답(스트리밍이면 토큰)마다 기다릴 시간(초)
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.chat = _StubChat(delay)
+
+    async def close(self):
+        pass
@@ -0,0 +1,93 @@
+"""Plaid webhook 서명(Plaid-Verification 헤더) 검증
+
+Plaid는 webhook마다 ES256으로 서명한 JWT를 Plaid-Verification 헤더에 담아
+보냅니다. 검증 순서는 다음과 같습니다.
+
+- JWT 헤더의 alg가 ES256인지 확인하고, kid로 /webhook_verification_key/get의
+  공개 키(JWK)를 조회 (kid별로 캐시, 만료된 키는 거부)
+- 공개 키로 서명 확인
+- 발급 시각(iat)이 max_age 이내인지 확인 (재전송 공격 방지)
+- 원본 본문의 SHA-256이 request_body_sha256 claim과 같은지 확인
+"""
+import hashlib
+import hmac
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from jose import JWTError, jwt
+
+from ttl_cache import AsyncTTLCache
+
+ALGORITHM = "ES256"
+# 이보다 오래 전에 서명된 webhook은 거부
+MAX_AGE_SECONDS = float(os.getenv("PLAID_WEBHOOK_MAX_AGE_SECONDS", "300"))
+# 공개 키 캐시 기간 (키가 교체되면 expired_at이 채워지므로 주기적으로 다시 조회)
+KEY_TTL_SECONDS = float(os.getenv("PLAID_WEBHOOK_KEY_TTL_SECONDS", str(24 * 3600)))
+# 키 조회 실패를 기억하는 시간 (잘못된 kid마다 Plaid를 다시 호출하지 않도록)
+KEY_RETRY_SECONDS = float(os.getenv("PLAID_WEBHOOK_KEY_RETRY_SECONDS", "60"))
+
+
+class WebhookVerificationError(Exception):
+    """서명이 없거나 올바르지 않은 webhook"""
+
+
+class WebhookVerifier:
+    """Plaid-Verification JWT와 요청 본문 검증
+
+    Args:
+        fetch_key: kid를 받아 Plaid /webhook_verification_key/get 응답의 key(JWK)를 반환
+    """
+
+    def __init__(
+        self,
+        fetch_key: Callable[[str], Awaitable[Dict[str, Any]]],
+        max_age: float = MAX_AGE_SECONDS,
+        key_ttl: float = KEY_TTL_SECONDS,
+    ):
+        self.fetch_key = fetch_key
+        self.max_age = max_age
+        self._keys = AsyncTTLCache(
+            ttl=key_ttl,
+            name="plaid-webhook-keys",
+            max_entries=64,
+            error_ttl=KEY_RETRY_SECONDS,
+        )
+
+    async def verify(self, body: bytes, signed_jwt: Optional[str]) -> Dict[str, Any]:
+        """검증된 JWT claim 반환
+
+        Raises:
+            WebhookVerificationError: 헤더가 없거나 서명, 발급 시각, 본문 해시 중 하나라도 맞지 않음
+        """
+        if not signed_jwt:
+            raise WebhookVerificationError("Missing Plaid-Verification header")
+        try:
+            header = jwt.get_unverified_header(signed_jwt)
+        except JWTError as e:
+            raise WebhookVerificationError(f"Malformed verification token: {e}")
+        if header.get("alg") != ALGORITHM:
+            raise WebhookVerificationError(f"Unexpected signing algorithm {header.get('alg')!r}")
+        key_id = header.get("kid")
+        if not key_id:
+            raise WebhookVerificationError("Verification token has no key id")
+
+        try:
+            key = await self._keys.get(key_id, lambda: self.fetch_key(key_id))
+        except Exception as e:
+            raise WebhookVerificationError(f"Verification key {key_id} is unavailable: {e!r}")
+        if key.get("expired_at"):
+            raise WebhookVerificationError(f"Verification key {key_id} has expired")
+
+        try:
+            claims = jwt.decode(signed_jwt, key, algorithms=[ALGORITHM])
+        except JWTError as e:
+            raise WebhookVerificationError(f"Invalid signature: {e}")
+
+        issued_at = claims.get("iat")
+        if not isinstance(issued_at, (int, float)) or time.time() - issued_at > self.max_age:
+            raise WebhookVerificationError("Verification token is too old")
+        body_hash = hashlib.sha256(body).hexdigest()
+        if not hmac.compare_digest(body_hash, str(claims.get("request_body_sha256", ""))):
+            raise WebhookVerificationError("Request body does not match the signed hash")
+        return claims
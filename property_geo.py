@@ -0,0 +1,214 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LAT = 69.0
+
+# 셀 키 = row * KEY_STRIDE + (col + KEY_OFFSET)
+KEY_STRIDE = 1 << 32
+KEY_OFFSET = 1 << 31
+
+
+def haversine_miles(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """한 지점에서 여러 지점까지의 대원 거리 (마일)"""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlng = np.radians(lngs) - math.radians(lng)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GridIndex:
+    """위도/경도 격자 버킷 기반 공간 인덱스
+
+    좌표를 cell_size 도 단위 셀로 나누고 셀 키 순으로 정렬해 두므로, 각 셀은
+    정렬된 배열의 연속 구간이 됩니다. 질의는 겹치는 셀만 확인하므로 전체
+    행 수가 아니라 영역 안의 셀/행 수에 비례합니다.
+    """
+
+    # 스냅샷에 저장되는 배열 (셀 키 순으로 정렬된 행과 셀별 구간)
+    ARRAYS = ("positions", "lats", "lngs", "cell_keys", "cell_starts", "cell_ends")
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        lats: np.ndarray,
+        lngs: np.ndarray,
+        cell_keys: np.ndarray,
+        cell_starts: np.ndarray,
+        cell_ends: np.ndarray,
+        cell_size: float = 0.05,
+    ):
+        """이미 셀 키 순으로 정렬된 배열로 구성 (스냅샷의 메모리 맵을 그대로 사용)"""
+        self.cell_size = cell_size
+        self.positions = positions
+        self.lats = lats
+        self.lngs = lngs
+        self.cell_keys = cell_keys
+        self.cell_starts = cell_starts
+        self.cell_ends = cell_ends
+        self.cell_rows = cell_keys // KEY_STRIDE
+        self.cell_cols = cell_keys % KEY_STRIDE - KEY_OFFSET
+
+        if len(self.cell_keys):
+            self.row_range = (int(self.cell_rows.min()), int(self.cell_rows.max()))
+            self.col_range = (int(self.cell_cols.min()), int(self.cell_cols.max()))
+        else:
+            self.row_range = self.col_range = (0, -1)
+
+    @classmethod
+    def build(cls, positions: np.ndarray, lats: np.ndarray, lngs: np.ndarray, cell_size: float = 0.05) -> "GridIndex":
+        """행 위치와 좌표로 격자 인덱스 생성"""
+        rows = np.floor(np.asarray(lats) / cell_size).astype('int64')
+        cols = np.floor(np.asarray(lngs) / cell_size).astype('int64')
+        keys = rows * KEY_STRIDE + (cols + KEY_OFFSET)
+        order = np.argsort(keys, kind='stable')
+
+        sorted_keys = keys[order]
+        cell_keys, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], len(sorted_keys))
+        return cls(positions[order], lats[order], lngs[order], cell_keys, starts, ends, cell_size)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _cell(self, lats, lngs):
+        rows = np.floor(np.asarray(lats) / self.cell_size).astype('int64')
+        cols = np.floor(np.asarray(lngs) / self.cell_size).astype('int64')
+        return rows, cols
+
+    def _block_slots(self, row0: int, row1: int, col0: int, col1: int) -> np.ndarray:
+        """셀 블록 [row0, row1] x [col0, col1]에 속한 정렬 배열 순번"""
+        row0, row1 = max(row0, self.row_range[0]), min(row1, self.row_range[1])
+        col0, col1 = max(col0, self.col_range[0]), min(col1, self.col_range[1])
+        if row0 > row1 or col0 > col1:
+            return np.empty(0, dtype='int64')
+
+        cell_count = (row1 - row0 + 1) * (col1 - col0 + 1)
+        if cell_count <= len(self.cell_keys):
+            # 작은 영역: 블록 안의 셀 키만 정렬된 키 배열에서 이진 탐색
+            rows = np.arange(row0, row1 + 1, dtype='int64')
+            cols = np.arange(col0, col1 + 1, dtype='int64')
+            keys = (rows[:, None] * KEY_STRIDE + (cols + KEY_OFFSET)).ravel()
+            found = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+            found = found[self.cell_keys[found] == keys]
+            starts, ends = self.cell_starts[found], self.cell_ends[found]
+        else:
+            # 넓은 영역: 데이터가 있는 셀 목록에 벡터 마스크 적용
+            mask = (
+                (self.cell_rows >= row0) & (self.cell_rows <= row1)
+                & (self.cell_cols >= col0) & (self.cell_cols <= col1)
+            )
+            starts, ends = self.cell_starts[mask], self.cell_ends[mask]
+        return _expand_ranges(starts, ends)
+
+    def _ring_slots(self, row: int, col: int, ring: int) -> np.ndarray:
+        """(row, col) 셀을 중심으로 한 ring 번째 테두리 셀들의 순번"""
+        if ring == 0:
+            return self._block_slots(row, row, col, col)
+        parts = [
+            self._block_slots(row - ring, row - ring, col - ring, col + ring),
+            self._block_slots(row + ring, row + ring, col - ring, col + ring),
+            self._block_slots(row - ring + 1, row + ring - 1, col - ring, col - ring),
+            self._block_slots(row - ring + 1, row + ring - 1, col + ring, col + ring),
+        ]
+        return np.concatenate(parts)
+
+    def bbox(self, south: float, west: float, north: float, east: float) -> np.ndarray:
+        """영역 안의 행 위치 (셀 키 순)"""
+        (row0, row1), (col0, col1) = self._cell([south, north], [west, east])
+        slots = self._block_slots(int(row0), int(row1), int(col0), int(col1))
+        lats, lngs = self.lats[slots], self.lngs[slots]
+        inside = (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+        return self.positions[slots[inside]]
+
+    def radius(
+        self, lat: float, lng: float, radius_miles: float, limit: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """반경 안의 행 위치와 거리 (가까운 순)"""
+        dlat = radius_miles / MILES_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + dlat, 89.9))), 1e-6)
+        dlng = min(radius_miles / (MILES_PER_DEGREE_LAT * cos_lat), 180.0)
+
+        (row0, row1), (col0, col1) = self._cell([lat - dlat, lat + dlat], [lng - dlng, lng + dlng])
+        slots = self._block_slots(int(row0), int(row1), int(col0), int(col1))
+        distances = haversine_miles(lat, lng, self.lats[slots], self.lngs[slots])
+        inside = distances <= radius_miles
+        slots, distances = slots[inside], distances[inside]
+
+        order = _nearest_order(distances, limit)
+        return self.positions[slots[order]], distances[order]
+
+    def nearest(
+        self, lat: float, lng: float, k: int, max_radius_miles: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """가장 가까운 k개 행 위치와 거리
+
+        중심 셀에서 바깥 테두리로 넓혀 가며 후보를 모으고, 아직 보지 않은 셀의
+        최소 거리가 현재 k번째 거리보다 멀어지면 멈춥니다.
+        """
+        if not len(self.cell_keys) or k <= 0:
+            return np.empty(0, dtype='int64'), np.empty(0)
+
+        row, col = (int(v[0]) for v in self._cell([lat], [lng]))
+        max_ring = max(
+            abs(row - self.row_range[0]), abs(row - self.row_range[1]),
+            abs(col - self.col_range[0]), abs(col - self.col_range[1]),
+        )
+
+        found_slots: List[np.ndarray] = []
+        found_distances: List[np.ndarray] = []
+        count = 0
+        kth = math.inf
+        for ring in range(max_ring + 1):
+            # 이번 테두리 셀까지의 최소 거리 (보수적으로 경도 방향 축척 사용)
+            edge_lat = min(abs(lat) + (ring + 1) * self.cell_size, 89.9)
+            lower_bound = max(ring - 1, 0) * self.cell_size * MILES_PER_DEGREE_LAT * math.cos(math.radians(edge_lat))
+            if count >= k and lower_bound > kth:
+                break
+            if max_radius_miles is not None and lower_bound > max_radius_miles:
+                break
+
+            slots = self._ring_slots(row, col, ring)
+            if len(slots):
+                distances = haversine_miles(lat, lng, self.lats[slots], self.lngs[slots])
+                found_slots.append(slots)
+                found_distances.append(distances)
+                count += len(slots)
+                if count >= k:
+                    kth = np.partition(np.concatenate(found_distances), k - 1)[k - 1]
+
+        if not found_slots:
+            return np.empty(0, dtype='int64'), np.empty(0)
+        slots = np.concatenate(found_slots)
+        distances = np.concatenate(found_distances)
+        if max_radius_miles is not None:
+            inside = distances <= max_radius_miles
+            slots, distances = slots[inside], distances[inside]
+
+        order = _nearest_order(distances, k)
+        return self.positions[slots[order]], distances[order]
+
+
+def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """[start, end) 구간들을 하나의 순번 배열로 펼침"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype='int64')
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(total, dtype='int64') + offsets
+
+
+def _nearest_order(distances: np.ndarray, limit: Optional[int]) -> np.ndarray:
+    """거리 오름차순 순번 (limit개만 부분 정렬)"""
+    if limit is not None and limit < len(distances):
+        top = np.argpartition(distances, limit - 1)[:limit]
+        return top[np.argsort(distances[top], kind='stable')]
+    return np.argsort(distances, kind='stable')
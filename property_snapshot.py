@@ -0,0 +1,186 @@
+"""속성 데이터셋의 바이너리 컬럼 스냅샷
+
+CSV를 한 번 변환해 컬럼별 .npy 파일과 문자열 테이블, 그리고 조회용 파생
+배열(정렬 인덱스, 값 인덱스, 공간 격자)로 저장합니다. 워커들은 스냅샷을 메모리
+맵으로 열기 때문에 CSV를 다시 파싱하거나 인덱스를 따로 만들지 않고, 같은
+페이지를 OS 페이지 캐시를 통해 공유합니다.
+
+사용법:
+    python property_snapshot.py [CSV 경로] [스냅샷 디렉터리]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+VALID_NAME = "valid"
+# 문자열 테이블(유니코드 배열)과 파생 인덱스 배열을 두는 하위 디렉터리
+STRINGS_DIR = "strings"
+INDEX_DIR = "index"
+
+
+@dataclass
+class Snapshot:
+    """메모리 맵으로 연 스냅샷 (모든 배열은 읽기 전용)"""
+    columns: Dict[str, np.ndarray]
+    # 문자열 응답 필드 -> 문자열 테이블 (파생 테이블 포함)
+    tables: Dict[str, np.ndarray]
+    valid: np.ndarray
+    # 이름 -> 파생 인덱스 배열
+    index: Dict[str, np.ndarray]
+    # 인덱스를 만들 때 쓴 설정과 집계 값 (격자 크기, 중복 행 수 등)
+    metadata: Dict[str, Any]
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _save_arrays(directory: Path, arrays: Dict[str, np.ndarray]):
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(directory / f"{name}.npy", np.ascontiguousarray(values))
+
+
+def _load_arrays(directory: Path, names) -> Dict[str, np.ndarray]:
+    return {name: np.load(directory / f"{name}.npy", mmap_mode='r') for name in names}
+
+
+def write_snapshot(
+    snapshot_dir: Path,
+    csv_path: Path,
+    signature: Tuple[int, int],
+    columns: Dict[str, np.ndarray],
+    tables: Dict[str, np.ndarray],
+    valid: np.ndarray,
+    index: Dict[str, np.ndarray],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """컬럼 데이터와 파생 인덱스를 스냅샷 디렉터리에 기록
+
+    임시 디렉터리에 모두 쓴 뒤 이름을 바꾸므로, 읽는 쪽은 항상 완전한
+    스냅샷만 보게 됩니다.
+
+    Args:
+        signature: 변환에 사용한 CSV의 (mtime_ns, size)
+        tables: 문자열 테이블 (메모리 맵으로 열 수 있도록 유니코드 배열로 저장)
+        index: 로드 후 그대로 쓰는 파생 배열 (이름 -> 배열)
+        metadata: 인덱스를 만들 때 쓴 설정과 집계 값 (JSON 직렬화 가능)
+    """
+    snapshot_dir = Path(snapshot_dir)
+    tmp_dir = snapshot_dir.with_name(f"{snapshot_dir.name}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    _save_arrays(tmp_dir, columns)
+    np.save(tmp_dir / f"{VALID_NAME}.npy", np.ascontiguousarray(valid, dtype=bool))
+    _save_arrays(tmp_dir / STRINGS_DIR, {name: np.asarray(table, dtype=str) for name, table in tables.items()})
+    _save_arrays(tmp_dir / INDEX_DIR, index)
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "rows": int(len(valid)),
+        "columns": {name: str(values.dtype) for name, values in columns.items()},
+        "string_tables": sorted(tables),
+        "index": {name: str(values.dtype) for name, values in index.items()},
+        "metadata": metadata or {},
+        "source": {
+            "path": str(csv_path),
+            "mtime_ns": signature[0],
+            "size": signature[1],
+            "sha256": file_sha256(csv_path),
+        },
+        "created_at": time.time(),
+    }
+    with open(tmp_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    # 기존 스냅샷을 치운 뒤 교체 (이미 열린 메모리 맵은 그대로 유효)
+    old_dir = None
+    if snapshot_dir.exists():
+        old_dir = snapshot_dir.with_name(f"{snapshot_dir.name}.old-{os.getpid()}")
+        os.replace(snapshot_dir, old_dir)
+    os.replace(tmp_dir, snapshot_dir)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"Wrote property snapshot with {manifest['rows']} rows to {snapshot_dir}")
+    return snapshot_dir
+
+
+def load_snapshot(snapshot_dir: Path, csv_path: Path, signature: Tuple[int, int]) -> Optional[Snapshot]:
+    """CSV와 일치하는 스냅샷을 메모리 맵으로 로드
+
+    CSV 크기가 다르거나, mtime이 다르면서 내용 해시도 다르면 오래된 스냅샷으로
+    보고 None을 반환합니다.
+    """
+    snapshot_dir = Path(snapshot_dir)
+    manifest_path = snapshot_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != FORMAT_VERSION:
+            logger.info(f"Ignoring property snapshot with unsupported format: {manifest.get('format')}")
+            return None
+
+        source = manifest["source"]
+        mtime_ns, size = signature
+        if source["size"] != size or (
+            source["mtime_ns"] != mtime_ns and source["sha256"] != file_sha256(csv_path)
+        ):
+            logger.info(f"Property snapshot is stale for {csv_path}; loading CSV instead")
+            return None
+
+        rows = manifest["rows"]
+        columns = _load_arrays(snapshot_dir, manifest["columns"])
+        valid = np.load(snapshot_dir / f"{VALID_NAME}.npy", mmap_mode='r')
+        tables = _load_arrays(snapshot_dir / STRINGS_DIR, manifest["string_tables"])
+        index = _load_arrays(snapshot_dir / INDEX_DIR, manifest["index"])
+
+        if len(valid) != rows or any(len(values) != rows for values in columns.values()):
+            logger.warning(f"Property snapshot at {snapshot_dir} is inconsistent; loading CSV instead")
+            return None
+        return Snapshot(columns, tables, valid, index, manifest.get("metadata", {}))
+
+    except Exception as e:
+        logger.warning(f"Failed to load property snapshot, loading CSV instead: {str(e)}")
+        return None
+
+
+def main(argv=None):
+    import property_store
+
+    parser = argparse.ArgumentParser(description="Build a binary columnar snapshot of the properties CSV")
+    parser.add_argument("csv_path", nargs="?", default=str(property_store.CSV_PATH))
+    parser.add_argument("snapshot_dir", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    csv_path = Path(args.csv_path)
+    snapshot_dir = Path(args.snapshot_dir) if args.snapshot_dir else property_store.snapshot_dir_for(csv_path)
+    property_store.build_snapshot(csv_path, snapshot_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
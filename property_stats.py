@@ -0,0 +1,254 @@
+"""그룹별(city/state/zipcode) 가격 통계
+
+데이터셋 버전마다 한 번 pandas groupby로 그룹별 건수, 평균, 중앙값, p10/p90,
+최소/최대와 히스토그램을 계산해 두고, 질의는 그룹 수에 비례하는 정렬/자르기만
+수행합니다. 필터(city/state/zipcode/가격 범위)는 캐시된 행 마스크를 AND로
+결합해 적용하며, 필터 조합별 집계 결과도 캐시합니다.
+
+그룹은 필터와 같은 정규화된 값(앞뒤 공백 제거, 소문자)으로 묶으므로 "Seattle"과
+"seattle "은 한 그룹이 되고, 그룹 이름은 그 그룹에서 가장 많이 쓰인 표기입니다.
+
+캐시는 PropertyDataset에 붙어 있으므로 CSV가 리로드되면 함께 버려집니다.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 가격 히스토그램 구간 수 (데이터셋 전체 가격 범위를 로그 간격으로 나눔)
+HISTOGRAM_BINS = int(os.getenv("PROPERTY_STATS_HISTOGRAM_BINS", "10"))
+# 데이터셋 버전별로 보관하는 필터 조합별 집계 결과/행 마스크 수
+AGGREGATE_CACHE_ENTRIES = int(os.getenv("PROPERTY_STATS_CACHE_ENTRIES", "128"))
+MASK_CACHE_ENTRIES = int(os.getenv("PROPERTY_STATS_MASK_ENTRIES", "256"))
+
+QUANTILES = {"p10": 0.1, "median": 0.5, "p90": 0.9}
+
+
+class AggregateCache:
+    """집계 결과와 필터 마스크의 LRU 캐시 (데이터셋 스냅샷마다 하나)"""
+
+    def __init__(self, max_results: int = AGGREGATE_CACHE_ENTRIES, max_masks: int = MASK_CACHE_ENTRIES):
+        self.max_results = max_results
+        self.max_masks = max_masks
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._masks: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def result(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        return self._get_or_compute(self._results, self.max_results, key, compute)
+
+    def mask(self, key: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        return self._get_or_compute(self._masks, self.max_masks, key, compute)
+
+    def _get_or_compute(self, items: OrderedDict, max_entries: int, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in items:
+                items.move_to_end(key)
+                self.hits += 1
+                return items[key]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            items.setdefault(key, value)
+            while len(items) > max_entries:
+                items.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "results": len(self._results),
+            "masks": len(self._masks),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def histogram_edges(prices: np.ndarray, bins: int = HISTOGRAM_BINS) -> np.ndarray:
+    """가격 히스토그램 구간 경계 (양수 가격 범위의 로그 간격, 정수로 반올림)"""
+    positive = prices[prices > 0]
+    if len(positive) == 0 or positive.min() == positive.max():
+        low = float(positive.min()) if len(positive) else 0.0
+        return np.linspace(low, low + bins, bins + 1).round()
+    return np.geomspace(positive.min(), positive.max(), bins + 1).round()
+
+
+def bucket_counts(prices: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """구간별 건수 (범위 밖 가격은 양 끝 구간에 포함)"""
+    buckets = np.searchsorted(edges[1:-1], prices, side='right')
+    return np.bincount(buckets, minlength=len(edges) - 1)
+
+
+def summarize_prices(prices: np.ndarray, edges: np.ndarray) -> Dict[str, Any]:
+    """가격 배열 하나의 요약 통계"""
+    if len(prices) == 0:
+        return {"count": 0}
+    p10, median, p90 = np.quantile(prices, list(QUANTILES.values())).tolist()
+    return {
+        "count": int(len(prices)),
+        "mean": round(float(prices.mean()), 2),
+        "median": round(median, 2),
+        "p10": round(p10, 2),
+        "p90": round(p90, 2),
+        "min": float(prices.min()),
+        "max": float(prices.max()),
+        "histogram": bucket_counts(prices, edges).tolist(),
+    }
+
+
+def group_table(codes: np.ndarray, labels: np.ndarray, prices: np.ndarray, edges: np.ndarray) -> pd.DataFrame:
+    """그룹 코드별 가격 통계 표 (행 = 그룹, 정렬되지 않음)
+
+    Args:
+        codes: 행별 그룹 코드 (labels의 인덱스)
+        labels: 코드 -> 그룹 이름
+    """
+    columns = ["key", "count", "mean", "median", "p10", "p90", "min", "max", "histogram"]
+    if len(codes) == 0:
+        return pd.DataFrame(columns=columns)
+
+    grouped = pd.DataFrame({"code": codes, "price": prices}).groupby("code", sort=False)["price"]
+    table = grouped.agg(["count", "mean", "min", "max"])
+    quantiles = grouped.quantile(list(QUANTILES.values())).unstack()
+    for name, q in QUANTILES.items():
+        table[name] = quantiles[q]
+
+    # 그룹 x 구간 건수를 bincount 한 번으로 계산
+    bins = len(edges) - 1
+    buckets = np.searchsorted(edges[1:-1], prices, side='right')
+    histograms = np.bincount(codes * bins + buckets, minlength=len(labels) * bins).reshape(len(labels), bins)
+
+    table["key"] = labels[table.index.to_numpy()]
+    table["histogram"] = list(histograms[table.index.to_numpy()])
+    table[["mean", "median", "p10", "p90"]] = table[["mean", "median", "p10", "p90"]].round(2)
+    return table.reset_index(drop=True)[columns]
+
+
+def group_codes(dataset, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """정규화된 값 기준 그룹 코드 (sorted_positions 순번 기준)와 그룹별 표시 이름 (캐시)
+
+    Returns:
+        (순번별 그룹 코드, 코드 -> 그룹에서 가장 많이 쓰인 원래 표기(앞뒤 공백 제거))
+    """
+    def compute() -> Tuple[np.ndarray, np.ndarray]:
+        index = dataset.value_index[name]
+        codes = np.empty(len(index.order), dtype=np.int32)
+        codes[index.order] = np.repeat(np.arange(len(index.keys), dtype=np.int32), np.diff(index.bounds))
+
+        # 그룹별로 가장 많은 원래 표기 (같으면 문자열 순으로 앞선 것)
+        raw = dataset.columns[name][dataset.sorted_positions]
+        counts = pd.DataFrame({"group": codes, "raw": raw}).value_counts(sort=False).reset_index(name="rows")
+        counts["label"] = dataset.string_tables[name][counts["raw"].to_numpy()]
+        best = counts.sort_values(["group", "rows", "label"], ascending=[True, False, True]).drop_duplicates("group")
+        labels = np.empty(len(index.keys), dtype=object)
+        labels[best["group"].to_numpy()] = best["label"].str.strip().to_numpy()
+        return codes, labels
+
+    return dataset.aggregates.result(("groups", name), compute)
+
+
+def filter_mask(dataset, name: str, value: str) -> np.ndarray:
+    """문자열 필터 하나의 행 마스크 (sorted_positions 순번 기준, 캐시)
+
+    Args:
+        value: normalize_filter_value로 정규화된 값
+    """
+    def compute() -> np.ndarray:
+        mask = np.zeros(len(dataset.sorted_positions), dtype=bool)
+        matched = dataset.value_index[name].get(value)
+        if matched is not None:
+            mask[matched] = True
+        return mask
+
+    return dataset.aggregates.mask((name, value), compute)
+
+
+def price_mask(dataset, min_price: Optional[float], max_price: Optional[float]) -> np.ndarray:
+    def compute() -> np.ndarray:
+        mask = np.ones(len(dataset.sorted_prices), dtype=bool)
+        if min_price is not None:
+            mask &= dataset.sorted_prices >= min_price
+        if max_price is not None:
+            mask &= dataset.sorted_prices <= max_price
+        return mask
+
+    return dataset.aggregates.mask(("price", min_price, max_price), compute)
+
+
+def aggregate(
+    dataset,
+    group_by: str,
+    filters: Optional[Dict[str, str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> Dict[str, Any]:
+    """그룹별 가격 통계 (데이터셋 버전 + 필터 조합별로 한 번만 계산)
+
+    Args:
+        filters: 필터 컬럼 -> normalize_filter_value로 정규화된 값
+    Returns:
+        {"table": 그룹별 통계 DataFrame, "overall": 전체 요약, "edges": 히스토그램 경계}
+    """
+    filters = filters or {}
+    edges = dataset.aggregates.result(("edges",), lambda: histogram_edges(dataset.sorted_prices))
+
+    def compute() -> Dict[str, Any]:
+        ranks = None
+        if filters or min_price is not None or max_price is not None:
+            mask = np.ones(len(dataset.sorted_positions), dtype=bool)
+            for name, value in filters.items():
+                mask &= filter_mask(dataset, name, value)
+            if min_price is not None or max_price is not None:
+                mask &= price_mask(dataset, min_price, max_price)
+            ranks = mask.nonzero()[0]
+
+        codes, labels = group_codes(dataset, group_by)
+        prices = dataset.sorted_prices if ranks is None else dataset.sorted_prices[ranks]
+        codes = codes if ranks is None else codes[ranks]
+        return {
+            "table": group_table(codes, labels, prices, edges),
+            "overall": summarize_prices(prices, edges),
+            "edges": edges,
+        }
+
+    key = (group_by, tuple(sorted(filters.items())), min_price, max_price)
+    return dataset.aggregates.result(key, compute)
+
+
+def group_records(
+    table: pd.DataFrame,
+    sort: str = "count",
+    descending: bool = True,
+    min_count: int = 1,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """집계 표를 정렬/자른 응답 레코드 (그룹 수에 비례)
+
+    Returns:
+        (레코드 리스트, min_count 적용 후 그룹 수)
+    """
+    if min_count > 1:
+        table = table[table["count"] >= min_count]
+    if sort == "key":
+        table = table.sort_values("key", ascending=not descending, kind='stable')
+    else:
+        # 같은 값이면 그룹 이름 순
+        table = table.sort_values([sort, "key"], ascending=[not descending, True], kind='stable')
+    total = len(table)
+    if limit is not None:
+        table = table.head(limit)
+
+    # 컬럼 단위로 파이썬 값 리스트를 만든 뒤 한 번에 묶음
+    fields = ("key", "count", "mean", "median", "p10", "p90", "min", "max")
+    values = [table[name].tolist() for name in fields]
+    histograms = [counts.tolist() for counts in table["histogram"]]
+    records = [
+        {**dict(zip(fields, row)), "histogram": histogram}
+        for row, histogram in zip(zip(*values), histograms)
+    ]
+    return records, total
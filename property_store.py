@@ -0,0 +1,598 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from property_geo import GridIndex
+from property_stats import AggregateCache
+from property_snapshot import Snapshot, load_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
+
+# 기본 CSV 경로 (환경 변수로 변경 가능)
+DEFAULT_CSV_PATH = Path(__file__).parent / 'data' / 'california_properties.csv'
+CSV_PATH = Path(os.getenv("PROPERTY_CSV_PATH", DEFAULT_CSV_PATH))
+# 바이너리 컬럼 스냅샷 디렉터리 (기본값: CSV 옆의 <이름>.snapshot)
+SNAPSHOT_DIR = os.getenv("PROPERTY_SNAPSHOT_DIR")
+
+# 파일 변경 여부를 확인하는 최소 간격 (초)
+CHECK_INTERVAL = float(os.getenv("PROPERTY_STORE_CHECK_INTERVAL", "1.0"))
+
+# 스트리밍 응답에서 한 번에 변환하는 행 수
+STREAM_BATCH_SIZE = int(os.getenv("PROPERTY_STREAM_BATCH_SIZE", "1000"))
+
+# 공간 인덱스 격자 크기 (도 단위, 0.05도 ≈ 3.5마일)
+GEO_CELL_SIZE = float(os.getenv("PROPERTY_GEO_CELL_SIZE", "0.05"))
+
+# 데이터셋 버전별로 보관하는 직렬화된 응답 수/총 바이트
+RENDER_CACHE_ENTRIES = int(os.getenv("PROPERTY_RENDER_CACHE_ENTRIES", "256"))
+RENDER_CACHE_BYTES = int(os.getenv("PROPERTY_RENDER_CACHE_BYTES", str(256 * 1024 * 1024)))
+
+# 값 인덱스를 만들어 두는 문자열 필터 컬럼
+FILTER_FIELDS = ("city", "state", "zipcode")
+
+# 스냅샷에 그대로 저장되는 숫자 컬럼
+NUMERIC_COLUMNS = ("region_id", "price", "latitude", "longitude")
+# 코드 배열 + 문자열 테이블로 저장되는 문자열 컬럼
+STRING_COLUMNS = ("city", "state", "zipcode")
+# 문자열 응답 필드 -> 코드 배열 컬럼 (region_name/metro/county_name은 city에서 파생)
+STRING_FIELD_SOURCES = {
+    "region_name": "city",
+    "city": "city",
+    "state": "state",
+    "metro": "city",
+    "county_name": "city",
+    "zipcode": "zipcode",
+}
+
+# PropertyResponse 필드 순서
+RECORD_FIELDS = (
+    "id", "region_id", "region_name", "city", "state", "metro",
+    "county_name", "price", "latitude", "longitude", "zipcode",
+)
+
+
+class RenderCache:
+    """직렬화된 응답 바이트의 LRU 캐시
+
+    데이터셋 스냅샷마다 하나씩 두므로 리로드되면 자연스럽게 버려집니다.
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_ENTRIES, max_bytes: int = RENDER_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return body
+            self.misses += 1
+
+        body = render()
+        if len(body) > self.max_bytes:
+            return body
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = body
+                self._bytes += len(body)
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted)
+        return body
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._items), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+@dataclass(frozen=True)
+class PropertyDataset:
+    """한 번 로드된 속성 데이터 스냅샷 (읽기 전용)
+
+    요청 처리 중에는 하나의 스냅샷만 참조하므로, 리로드가 일어나도
+    진행 중인 요청은 항상 완전히 로드된 테이블을 보게 됩니다.
+    """
+    source_mtime_ns: int
+    source_size: int
+    loaded_at: float
+    load_seconds: float
+    version: int
+    # 숫자 컬럼 및 문자열 코드 컬럼 (모든 행과 정렬됨, 스냅샷이면 메모리 맵)
+    columns: Dict[str, np.ndarray]
+    # 문자열 응답 필드 -> 코드로 인덱싱하는 문자열 테이블
+    string_tables: Dict[str, np.ndarray]
+    # 응답으로 변환 가능한 행의 위치 (오름차순)
+    valid_positions: np.ndarray
+    # 중복 제거된 유효 행을 RegionID 오름차순으로 정렬한 위치/ID/가격
+    # (중복 ID는 파일에서 처음 나온 행이 우선, ID 조회와 목록 조회에 공용)
+    sorted_positions: np.ndarray
+    sorted_ids: np.ndarray
+    sorted_prices: np.ndarray
+    # 필터 컬럼 -> 값 인덱스
+    value_index: Dict[str, "ValueIndex"]
+    # 위도/경도 격자 공간 인덱스
+    geo: GridIndex
+    bad_row_count: int = 0
+    duplicate_id_count: int = 0
+    # 데이터 출처 ("csv" 또는 "snapshot")
+    source: str = "csv"
+    render_cache: RenderCache = field(default_factory=RenderCache, compare=False, repr=False)
+    # 그룹별 가격 통계와 필터 마스크 (property_stats)
+    aggregates: AggregateCache = field(default_factory=AggregateCache, compare=False, repr=False)
+
+    @property
+    def content_version(self) -> str:
+        """원본 파일 기준 버전 (워커 간에 동일)"""
+        return f"{self.source_mtime_ns:x}-{self.source_size:x}"
+
+    @property
+    def last_modified(self) -> float:
+        return self.source_mtime_ns / 1e9
+
+    def etag(self, key: Hashable) -> str:
+        """데이터셋 버전과 질의 형태에 대한 strong ETag"""
+        digest = hashlib.sha1(f"{self.content_version}|{key!r}".encode()).hexdigest()[:24]
+        return f'"{digest}"'
+
+    @property
+    def row_count(self) -> int:
+        return len(self.columns["region_id"])
+
+    def position_of(self, region_id: int) -> Optional[int]:
+        """RegionID에 해당하는 행 위치 (정렬된 ID 배열에서 이진 탐색)"""
+        rank = int(np.searchsorted(self.sorted_ids, region_id))
+        if rank < len(self.sorted_ids) and self.sorted_ids[rank] == region_id:
+            return int(self.sorted_positions[rank])
+        return None
+
+
+class ValueIndex:
+    """필터 컬럼 하나의 정규화된 값 -> sorted_positions 내 순번 배열
+
+    값 목록(정렬됨), 값 순서로 묶은 순번 배열, 값별 구간 경계 세 배열로만
+    이루어져 있어 스냅샷의 메모리 맵을 그대로 사용합니다.
+    """
+
+    ARRAYS = ("keys", "order", "bounds")
+
+    def __init__(self, keys: np.ndarray, order: np.ndarray, bounds: np.ndarray):
+        self.keys = keys
+        self.order = order
+        self.bounds = bounds
+
+    @classmethod
+    def build(cls, values: np.ndarray) -> "ValueIndex":
+        keys = pd.Series(values, dtype=object).str.strip().str.lower()
+        codes, uniques = pd.factorize(keys, sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return cls(np.asarray(uniques, dtype=str), order, bounds)
+
+    def get(self, value: str) -> Optional[np.ndarray]:
+        """정규화된 값과 일치하는 순번 배열 (오름차순, 없으면 None)"""
+        i = int(np.searchsorted(self.keys, value))
+        if i < len(self.keys) and self.keys[i] == value:
+            return self.order[self.bounds[i]:self.bounds[i + 1]]
+        return None
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+
+def _string_column(series: pd.Series) -> np.ndarray:
+    """문자열 응답 필드용 object 배열 (결측치는 빈 문자열)"""
+    if pd.api.types.is_float_dtype(series):
+        # 결측치 때문에 float로 읽힌 정수 컬럼 (예: 94105.0 -> "94105")
+        present = series.dropna()
+        if (present == present.round()).all():
+            series = series.astype('Int64')
+    return series.astype(str).where(series.notna(), "").to_numpy(dtype=object)
+
+
+def _encode_strings(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """문자열 컬럼을 (int32 코드 배열, 유니코드 문자열 테이블)로 변환"""
+    codes, uniques = pd.factorize(_string_column(series))
+    return codes.astype('int32'), np.asarray(uniques, dtype=str)
+
+
+def derive_string_tables(tables: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """기본 문자열 테이블에 파생 필드 테이블(metro, county_name 등)을 추가
+
+    파생 문자열은 행이 아니라 고유 값마다 한 번만 만듭니다.
+    """
+    city = tables["city"]
+    derived = dict(tables)
+    derived["region_name"] = city
+    derived["metro"] = np.char.add(city, " Metro")
+    derived["county_name"] = np.char.add(city, " County")
+    return derived
+
+
+def build_columns(df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray]:
+    """CSV 프레임을 타입이 정해진 NumPy 컬럼으로 한 번에 변환
+
+    Returns:
+        (컬럼 딕셔너리, 기본 문자열 테이블, 숫자 필드가 모두 유효한 행 마스크)
+    """
+    region_id = pd.to_numeric(df['RegionID'], errors='coerce')
+    price = pd.to_numeric(df['price'], errors='coerce')
+    latitude = pd.to_numeric(df['latitude'], errors='coerce')
+    longitude = pd.to_numeric(df['longitude'], errors='coerce')
+    valid = (region_id.notna() & price.notna() & latitude.notna() & longitude.notna()).to_numpy()
+
+    columns = {
+        "region_id": region_id.fillna(0).astype('int64').to_numpy(),
+        "price": price.to_numpy(dtype='float64'),
+        "latitude": latitude.to_numpy(dtype='float64'),
+        "longitude": longitude.to_numpy(dtype='float64'),
+    }
+    tables = {}
+    for name, csv_column in (("city", "City"), ("state", "State"), ("zipcode", "zipcode")):
+        columns[name], tables[name] = _encode_strings(df[csv_column])
+    return columns, tables, valid
+
+
+def unique_id_positions(region_ids: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, int]:
+    """RegionID마다 하나씩 남긴 유효 행 위치 (오름차순)
+
+    ID가 중복되면 파일 순서상 첫 번째 행을 사용하므로 결과가 항상 같습니다.
+
+    Returns:
+        (행 위치 배열, 버려진 중복 행 수)
+    """
+    # 중복은 유효한 행끼리만 판단 (무효 행의 ID는 0 등으로 채워져 있음)
+    valid_positions = valid.nonzero()[0]
+    duplicated = pd.Index(region_ids[valid_positions]).duplicated(keep='first')
+    return valid_positions[~duplicated], int(duplicated.sum())
+
+
+def normalize_filter_value(value: str) -> str:
+    return value.strip().lower()
+
+
+def build_index(
+    columns: Dict[str, np.ndarray],
+    tables: Dict[str, np.ndarray],
+    valid: np.ndarray,
+    cell_size: float = GEO_CELL_SIZE,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """조회에 쓰는 파생 배열을 한 번에 생성 (스냅샷에 그대로 저장됨)
+
+    커서 페이지네이션과 ID 조회를 위해 중복 제거된 유효 행을 RegionID
+    오름차순으로 정렬하고, 그 순서를 기준으로 필터 컬럼별 값 인덱스와
+    공간 격자를 만듭니다.
+
+    Returns:
+        (이름 -> 배열, 메타데이터)
+    """
+    positions, duplicate_id_count = unique_id_positions(columns["region_id"], valid)
+    ids = columns["region_id"][positions]
+    order = np.argsort(ids, kind='stable')
+    sorted_positions = positions[order]
+
+    index = {
+        "valid_positions": valid.nonzero()[0],
+        "sorted_positions": sorted_positions,
+        "sorted_ids": ids[order],
+        "sorted_prices": columns["price"][sorted_positions],
+    }
+    for name in FILTER_FIELDS:
+        values = ValueIndex.build(tables[name][columns[name][sorted_positions]])
+        index.update({f"values.{name}.{part}": array for part, array in values.arrays().items()})
+    geo = GridIndex.build(
+        sorted_positions,
+        columns["latitude"][sorted_positions],
+        columns["longitude"][sorted_positions],
+        cell_size=cell_size,
+    )
+    index.update({f"geo.{part}": array for part, array in geo.arrays().items()})
+
+    metadata = {
+        "geo_cell_size": cell_size,
+        "bad_row_count": int((~valid).sum()),
+        "duplicate_id_count": duplicate_id_count,
+    }
+    return index, metadata
+
+
+def query_positions(
+    dataset: PropertyDataset,
+    filters: Optional[Dict[str, str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Tuple[np.ndarray, Optional[int], int]:
+    """필터와 커서를 적용한 행 위치 조회
+
+    문자열 필터는 미리 만든 값 인덱스를 교집합하고, 가격 범위는 정렬된 가격
+    배열에 벡터 마스크로 적용합니다.
+
+    Args:
+        filters: 필터 컬럼 -> 값 (대소문자/앞뒤 공백 무시)
+        cursor: 이전 페이지의 마지막 RegionID (이 값보다 큰 ID부터 반환)
+        limit: 페이지 크기 (None이면 전체)
+
+    Returns:
+        (행 위치 배열, 다음 커서 또는 None, 전체 일치 건수)
+    """
+    ranks = None
+    for name, value in (filters or {}).items():
+        matched = dataset.value_index[name].get(normalize_filter_value(value))
+        if matched is None:
+            return np.empty(0, dtype='int64'), None, 0
+        ranks = matched if ranks is None else np.intersect1d(ranks, matched, assume_unique=True)
+
+    if min_price is not None or max_price is not None:
+        prices = dataset.sorted_prices if ranks is None else dataset.sorted_prices[ranks]
+        mask = np.ones(len(prices), dtype=bool)
+        if min_price is not None:
+            mask &= prices >= min_price
+        if max_price is not None:
+            mask &= prices <= max_price
+        ranks = mask.nonzero()[0] if ranks is None else ranks[mask]
+
+    if ranks is None:
+        total = len(dataset.sorted_ids)
+        start = 0 if cursor is None else int(np.searchsorted(dataset.sorted_ids, cursor, side='right'))
+        stop = total if limit is None else min(start + limit, total)
+        ranks = np.arange(start, stop)
+    else:
+        total = len(ranks)
+        start = 0 if cursor is None else int(np.searchsorted(dataset.sorted_ids[ranks], cursor, side='right'))
+        stop = total if limit is None else min(start + limit, total)
+        ranks = ranks[start:stop]
+
+    next_cursor = None
+    if stop < total and len(ranks):
+        next_cursor = int(dataset.sorted_ids[ranks[-1]])
+    return dataset.sorted_positions[ranks], next_cursor, total
+
+
+def to_records(
+    dataset: PropertyDataset,
+    positions: Optional[Sequence[int]] = None,
+    fields: Sequence[str] = RECORD_FIELDS,
+) -> List[Dict[str, Any]]:
+    """컬럼 데이터를 PropertyResponse 형태의 dict 리스트로 변환
+
+    행마다 캐스팅하지 않고 컬럼 단위로 파이썬 값 리스트를 만든 뒤 한 번에 묶습니다.
+    fields를 지정하면 해당 필드만 포함합니다.
+    """
+    if positions is None:
+        positions = dataset.valid_positions
+    fields = tuple(fields)
+    values = [field_values(dataset, name, positions) for name in fields]
+    return [dict(zip(fields, row)) for row in zip(*values)]
+
+
+def field_values(dataset: PropertyDataset, name: str, positions) -> List[Any]:
+    """주어진 행들의 응답 필드 값 (파이썬 값 리스트)"""
+    if name == "id":
+        return [str(value) for value in dataset.columns["region_id"][positions].tolist()]
+    source = STRING_FIELD_SOURCES.get(name)
+    if source is not None:
+        return dataset.string_tables[name][dataset.columns[source][positions]].tolist()
+    return dataset.columns[name][positions].tolist()
+
+
+def iter_record_batches(
+    dataset: PropertyDataset,
+    positions: np.ndarray,
+    fields: Sequence[str] = RECORD_FIELDS,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[List[Dict[str, Any]]]:
+    """고정 크기 배치 단위로 레코드 생성 (메모리 사용량은 배치 크기에 비례)"""
+    for start in range(0, len(positions), batch_size):
+        yield to_records(dataset, positions[start:start + batch_size], fields)
+
+
+def snapshot_dir_for(csv_path: Path) -> Path:
+    return Path(SNAPSHOT_DIR) if SNAPSHOT_DIR else Path(csv_path).with_suffix('.snapshot')
+
+
+def build_snapshot(csv_path: Path = CSV_PATH, snapshot_dir: Optional[Path] = None) -> Path:
+    """CSV를 파싱해 바이너리 컬럼 스냅샷으로 저장"""
+    csv_path = Path(csv_path)
+    st = csv_path.stat()
+    columns, tables, valid = build_columns(pd.read_csv(csv_path))
+    tables = derive_string_tables(tables)
+    index, metadata = build_index(columns, tables, valid)
+    return write_snapshot(
+        snapshot_dir or snapshot_dir_for(csv_path),
+        csv_path,
+        (st.st_mtime_ns, st.st_size),
+        columns,
+        tables,
+        valid,
+        index,
+        metadata,
+    )
+
+
+class PropertyStore:
+    """프로세스 전역 속성 데이터 저장소
+
+    CSV를 한 번만 읽고, 파일의 mtime 또는 크기가 바뀌면 새 데이터를
+    완전히 로드한 뒤 참조를 교체합니다. CSV와 일치하는 스냅샷이 있으면
+    CSV 대신 스냅샷을 메모리 맵으로 엽니다.
+    """
+
+    def __init__(
+        self,
+        csv_path: Path = CSV_PATH,
+        check_interval: float = CHECK_INTERVAL,
+        snapshot_dir: Optional[Path] = None,
+    ):
+        self.csv_path = Path(csv_path)
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir else snapshot_dir_for(self.csv_path)
+        self.check_interval = check_interval
+        self.reload_count = 0
+        self._dataset: Optional[PropertyDataset] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> PropertyDataset:
+        """현재 데이터셋을 반환 (필요하면 리로드)
+
+        Raises:
+            FileNotFoundError: 한 번도 로드되지 않았고 CSV 파일도 없는 경우
+        """
+        dataset = self._dataset
+        if dataset is not None and time.monotonic() - self._last_check < self.check_interval:
+            return dataset
+        return self._refresh()
+
+    def _refresh(self) -> PropertyDataset:
+        with self._lock:
+            dataset = self._dataset
+            # 락을 기다리는 동안 다른 스레드가 이미 확인한 경우
+            if dataset is not None and time.monotonic() - self._last_check < self.check_interval:
+                return dataset
+
+            try:
+                signature = self._signature()
+            except FileNotFoundError:
+                if dataset is None:
+                    raise
+                logger.warning(f"CSV file disappeared, keeping loaded data: {self.csv_path}")
+                self._last_check = time.monotonic()
+                return dataset
+
+            if dataset is None or signature != (dataset.source_mtime_ns, dataset.source_size):
+                try:
+                    new_dataset = self._load(signature)
+                except Exception as e:
+                    if dataset is None:
+                        raise
+                    # 파일이 쓰이는 도중일 수 있으므로 이전 데이터를 유지
+                    logger.error(f"Property reload failed, keeping previous data: {str(e)}")
+                    self._last_check = time.monotonic()
+                    return dataset
+
+                # 로드 도중 파일이 바뀌었다면 다음 확인 때 다시 로드
+                if self._signature_or_none() != signature:
+                    logger.warning("CSV changed while loading; will reload on next check")
+                if dataset is not None:
+                    self.reload_count += 1
+                # 참조 교체는 원자적이므로 진행 중인 요청은 이전 스냅샷을 계속 사용
+                self._dataset = dataset = new_dataset
+
+            self._last_check = time.monotonic()
+            return dataset
+
+    def _signature(self):
+        st = self.csv_path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def _signature_or_none(self):
+        try:
+            return self._signature()
+        except FileNotFoundError:
+            return None
+
+    def _load(self, signature) -> PropertyDataset:
+        started = time.perf_counter()
+        source = "snapshot"
+        snapshot = load_snapshot(self.snapshot_dir, self.csv_path, signature)
+        if snapshot is not None and snapshot.metadata.get("geo_cell_size") != GEO_CELL_SIZE:
+            # 격자 크기 설정이 바뀐 경우 컬럼은 그대로 쓰고 인덱스만 다시 생성
+            logger.info("Property snapshot was built with a different geo cell size; rebuilding index")
+            snapshot.index, snapshot.metadata = build_index(
+                snapshot.columns, snapshot.tables, snapshot.valid, cell_size=GEO_CELL_SIZE
+            )
+        if snapshot is None:
+            source = "csv"
+            columns, tables, valid = build_columns(pd.read_csv(self.csv_path))
+            tables = derive_string_tables(tables)
+            index, metadata = build_index(columns, tables, valid)
+            snapshot = Snapshot(columns, tables, valid, index, metadata)
+
+        index = snapshot.index
+        bad_row_count = snapshot.metadata["bad_row_count"]
+        duplicate_id_count = snapshot.metadata["duplicate_id_count"]
+        elapsed = time.perf_counter() - started
+
+        version = self._dataset.version + 1 if self._dataset is not None else 1
+        logger.info(f"Loaded {len(snapshot.valid)} properties from {source} in {elapsed:.3f}s (version {version})")
+        if bad_row_count:
+            logger.warning(f"{bad_row_count} rows have missing or non-numeric id/price/coordinates and are skipped")
+        if duplicate_id_count:
+            logger.warning(f"{duplicate_id_count} rows have duplicate RegionIDs; the first occurrence is used")
+        return PropertyDataset(
+            source_mtime_ns=signature[0],
+            source_size=signature[1],
+            loaded_at=time.time(),
+            load_seconds=elapsed,
+            version=version,
+            columns=snapshot.columns,
+            string_tables=snapshot.tables,
+            valid_positions=index["valid_positions"],
+            sorted_positions=index["sorted_positions"],
+            sorted_ids=index["sorted_ids"],
+            sorted_prices=index["sorted_prices"],
+            value_index={
+                name: ValueIndex(*(index[f"values.{name}.{part}"] for part in ValueIndex.ARRAYS))
+                for name in FILTER_FIELDS
+            },
+            geo=GridIndex(
+                *(index[f"geo.{part}"] for part in GridIndex.ARRAYS),
+                cell_size=snapshot.metadata["geo_cell_size"],
+            ),
+            bad_row_count=bad_row_count,
+            duplicate_id_count=duplicate_id_count,
+            source=source,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """로드 시간, 행 수, 리로드 횟수 등 저장소 상태"""
+        dataset = self._dataset
+        return {
+            "csv_path": str(self.csv_path),
+            "loaded": dataset is not None,
+            "source": dataset.source if dataset else None,
+            "version": dataset.version if dataset else None,
+            "row_count": dataset.row_count if dataset else 0,
+            "load_seconds": round(dataset.load_seconds, 4) if dataset else None,
+            "loaded_at": (
+                datetime.fromtimestamp(dataset.loaded_at, tz=timezone.utc).isoformat()
+                if dataset else None
+            ),
+            "reload_count": self.reload_count,
+            "indexed_ids": len(dataset.sorted_ids) if dataset else 0,
+            "bad_row_count": dataset.bad_row_count if dataset else 0,
+            "duplicate_id_count": dataset.duplicate_id_count if dataset else 0,
+            "render_cache": dataset.render_cache.stats() if dataset else None,
+            "aggregate_cache": dataset.aggregates.stats() if dataset else None,
+        }
+
+
+_store: Optional[PropertyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> PropertyStore:
+    """프로세스 전역 PropertyStore 인스턴스"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PropertyStore()
+    return _store
@@ -0,0 +1,179 @@
+"""FRED 금리 시계열의 로컬 SQLite 저장소
+
+전체 MORTGAGE30US 시계열을 로컬 DB에 보관하고, 갱신할 때는 마지막 저장 날짜
+이후의 관측치만 FRED에서 가져옵니다. 기간 조회와 월/연 평균 리샘플링은 모두
+로컬 데이터로 처리하므로 네트워크가 필요 없습니다.
+"""
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import http_clients
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).parent / 'data' / 'fred_rates.sqlite3'
+DB_PATH = Path(os.getenv("RATE_HISTORY_DB_PATH", DEFAULT_DB_PATH))
+SERIES_ID = "MORTGAGE30US"
+
+# 리샘플링 단위별 (기간 키로 쓸 날짜 앞부분 길이, 기간 첫날을 만드는 접미사)
+FREQUENCY_PERIODS = {
+    "monthly": (7, "-01"),
+    "yearly": (4, "-01-01"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    series_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (series_id, date)
+);
+CREATE TABLE IF NOT EXISTS refresh_log (
+    series_id TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    fetched INTEGER NOT NULL
+);
+"""
+
+
+class RateHistoryStore:
+    """한 FRED 시계열의 관측치 저장소 (날짜는 YYYY-MM-DD 문자열)"""
+
+    def __init__(self, path: Path = DB_PATH, series_id: str = SERIES_ID):
+        self.path = Path(path)
+        self.series_id = series_id
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            with conn:
+                conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    def latest_date(self) -> Optional[str]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(date) AS date FROM observations WHERE series_id = ?", (self.series_id,)
+            ).fetchone()
+        return row["date"]
+
+    def upsert(self, observations: Iterable[Dict[str, Any]]) -> int:
+        """관측치 저장 (같은 날짜는 FRED 수정값으로 덮어씀)"""
+        rows = [(self.series_id, item["date"], float(item["rate"])) for item in observations]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO observations (series_id, date, rate) VALUES (?, ?, ?)", rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO refresh_log (series_id, refreshed_at, fetched) VALUES (?, ?, ?)",
+                (self.series_id, time.time(), len(rows)),
+            )
+        return len(rows)
+
+    def observations(
+        self, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """기간 내 관측치 (오래된 순). limit이 있으면 가장 최근 limit개"""
+        query = "SELECT date, rate FROM observations WHERE series_id = ?"
+        params: List[Any] = [self.series_id]
+        if start:
+            query += " AND date >= ?"
+            params.append(start)
+        if end:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " ORDER BY date DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [{"date": row["date"], "rate": row["rate"]} for row in reversed(rows)]
+
+    def resample(
+        self, frequency: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """월/연 단위 평균 (오래된 순). date는 기간의 첫날"""
+        width, suffix = FREQUENCY_PERIODS[frequency]
+        query = (
+            f"SELECT substr(date, 1, {width}) AS period, AVG(rate) AS rate, MIN(rate) AS min,"
+            " MAX(rate) AS max, COUNT(*) AS count FROM observations WHERE series_id = ?"
+        )
+        params: List[Any] = [self.series_id]
+        if start:
+            query += " AND date >= ?"
+            params.append(start)
+        if end:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " GROUP BY period ORDER BY period"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                "date": row["period"] + suffix,
+                "rate": round(row["rate"], 4),
+                "min": row["min"],
+                "max": row["max"],
+                "count": row["count"],
+            }
+            for row in rows
+        ]
+
+    async def refresh(self, fetch: Callable[[Optional[str]], Awaitable[List[Dict[str, Any]]]]) -> Optional[str]:
+        """마지막 저장 날짜 이후의 관측치만 받아 저장
+
+        마지막 날짜도 다시 받아 FRED의 수정값을 반영합니다. 저장소가 비어 있으면
+        전체 시계열을 받습니다.
+
+        Args:
+            fetch: observation_start(YYYY-MM-DD 또는 None)를 받아 관측치를 반환하는 함수
+        Returns:
+            갱신 후 마지막 관측 날짜
+        """
+        latest = await http_clients.run_blocking(self.latest_date)
+        observations = await fetch(latest)
+        await http_clients.run_blocking(self.upsert, observations)
+        latest = await http_clients.run_blocking(self.latest_date)
+        logger.info(f"Refreshed {self.series_id}: {len(observations)} observations fetched, latest {latest}")
+        return latest
+
+    def stats(self) -> Dict[str, Any]:
+        with closing(self._connect()) as conn:
+            summary = conn.execute(
+                "SELECT COUNT(*) AS count, MIN(date) AS first, MAX(date) AS last"
+                " FROM observations WHERE series_id = ?",
+                (self.series_id,),
+            ).fetchone()
+            refresh = conn.execute(
+                "SELECT refreshed_at, fetched FROM refresh_log WHERE series_id = ?", (self.series_id,)
+            ).fetchone()
+        return {
+            "series_id": self.series_id,
+            "path": str(self.path),
+            "observations": summary["count"],
+            "first_date": summary["first"],
+            "last_date": summary["last"],
+            "last_refreshed_at": refresh["refreshed_at"] if refresh else None,
+            "last_fetched": refresh["fetched"] if refresh else None,
+        }
+
+
+_store: Optional[RateHistoryStore] = None
+
+
+def get_store() -> RateHistoryStore:
+    global _store
+    if _store is None:
+        _store = RateHistoryStore()
+    return _store
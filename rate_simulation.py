@@ -0,0 +1,291 @@
+"""변동금리(ARM) 대출의 금리 위험 몬테카를로 시뮬레이션
+
+FRED MORTGAGE30US 이력으로 금리 모델(평균 회귀 AR(1) 또는 부트스트랩)을 적합한 뒤,
+금리 재조정 시점마다의 지수 경로를 경로 전체에 대해 한 번에(벡터화) 샘플링하고
+캡/플로어를 적용한 월 납입액 분포를 계산합니다.
+
+시드가 같으면 결과가 같도록 경로를 고정 크기 청크로 나누고 청크마다
+SeedSequence로 파생한 난수 생성기를 사용합니다. 따라서 청크를 프로세스 풀에서
+실행하든 한 스레드에서 순서대로 실행하든 결과는 동일합니다.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import mortgage_calc
+
+logger = logging.getLogger(__name__)
+
+# 청크당 경로 수 (결과 재현성을 위해 워커 수와 무관하게 고정)
+CHUNK_PATHS = int(os.getenv("RATE_SIMULATION_CHUNK_PATHS", "50000"))
+# 이 경로 수 이상이면 프로세스 풀 사용 (워커 수 0이면 사용 안 함)
+PROCESS_THRESHOLD = int(os.getenv("RATE_SIMULATION_PROCESS_THRESHOLD", "250000"))
+PROCESS_WORKERS = int(os.getenv("RATE_SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 프로세스 풀 아래 규모의 시뮬레이션과 결과 요약을 실행하는 전용 스레드 수
+# (Plaid/DB 호출용 공유 스레드 풀을 CPU 작업이 점유하지 않도록 분리)
+THREAD_WORKERS = int(os.getenv("RATE_SIMULATION_THREADS", str(min(4, os.cpu_count() or 1))))
+
+PERCENTILES = (5, 25, 50, 75, 95)
+MODEL_KINDS = ("mean_reverting", "bootstrap")
+
+# 평균 회귀 모델이 사실상 랜덤 워크로 적합될 때의 월간 자기상관 상한
+MAX_PHI = 0.995
+
+
+@dataclass(frozen=True)
+class ArmTerms:
+    """ARM 대출 조건 (금리는 모두 연 %)"""
+    principal: float
+    initial_rate: float
+    term_months: int = mortgage_calc.DEFAULT_TERM_MONTHS
+    fixed_months: int = 60
+    reset_months: int = 12
+    margin: float = 0.0  # 재조정 금리 = 지수 + margin
+    initial_cap: float = 2.0
+    periodic_cap: float = 2.0
+    lifetime_cap: float = 5.0
+    floor: float = 0.0
+
+    def reset_starts(self) -> List[int]:
+        """각 금리 구간이 시작되는 회차 (0 = 첫 회차)"""
+        return [0] + list(range(self.fixed_months, self.term_months, self.reset_months))
+
+
+@dataclass(frozen=True)
+class RateModel:
+    """월별 MORTGAGE30US 수준에 적합한 금리 지수 모델"""
+    kind: str
+    current: float
+    levels: Tuple[float, ...]  # 월 평균 금리 (오래된 순)
+    start_date: str
+    end_date: str
+    mu: float = 0.0
+    phi: float = 0.0
+    sigma: float = 0.0
+
+    def step(self, index: np.ndarray, months: int, rng: np.random.Generator) -> np.ndarray:
+        """months개월 뒤의 지수를 모든 경로에 대해 샘플링"""
+        if self.kind == "mean_reverting":
+            # AR(1)의 months 단계 전이를 한 번에 적용 (정확한 분포)
+            decay = self.phi ** months
+            scale = self.sigma * np.sqrt((1 - decay ** 2) / (1 - self.phi ** 2))
+            return self.mu + decay * (index - self.mu) + scale * rng.standard_normal(index.shape[0])
+
+        levels = np.asarray(self.levels)
+        if len(levels) > months + 24:
+            # 겹치는 months개월 변화량을 통째로 뽑아 이력의 자기상관을 보존
+            changes = levels[months:] - levels[:-months]
+            return index + changes[rng.integers(0, len(changes), index.shape[0])]
+        # 이력이 짧으면 월 변화량을 months번 뽑아 합산
+        monthly = np.diff(levels)
+        draws = rng.integers(0, len(monthly), (index.shape[0], months))
+        return index + monthly[draws].sum(axis=1)
+
+    def describe(self) -> Dict[str, Any]:
+        info = {
+            "kind": self.kind,
+            "current_index": self.current,
+            "history_start": self.start_date,
+            "history_end": self.end_date,
+            "history_months": len(self.levels),
+        }
+        if self.kind == "mean_reverting":
+            info.update(long_run_mean=round(self.mu, 4), monthly_phi=round(self.phi, 6), monthly_sigma=round(self.sigma, 6))
+        return info
+
+
+def monthly_levels(observations: Sequence[Dict[str, Any]]) -> pd.Series:
+    """주간 관측치를 월 평균 금리 시계열로 변환 (오래된 순)"""
+    series = pd.Series(
+        [item["rate"] for item in observations],
+        index=pd.to_datetime([item["date"] for item in observations]),
+    ).sort_index()
+    return series.resample("MS").mean().dropna()
+
+
+def fit_rate_model(observations: Sequence[Dict[str, Any]], kind: str = "mean_reverting") -> RateModel:
+    """FRED 관측치로 금리 모델 적합
+
+    mean_reverting: r[t] = c + phi * r[t-1] + e 를 최소제곱으로 적합합니다. phi가
+    1에 가까우면(랜덤 워크) 장기 평균이 불안정하므로 phi를 MAX_PHI로 제한하고
+    이력 평균을 장기 평균으로 사용합니다.
+    bootstrap: 이력의 금리 변화량을 그대로 재표본추출합니다.
+    """
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown rate model: {kind}")
+
+    levels = monthly_levels(observations)
+    if len(levels) < 13:
+        raise ValueError("At least 12 months of rate history are required")
+
+    values = levels.to_numpy(dtype='float64')
+    model = dict(
+        kind=kind,
+        current=float(sorted(observations, key=lambda item: item["date"])[-1]["rate"]),
+        levels=tuple(values.tolist()),
+        start_date=levels.index[0].strftime("%Y-%m-%d"),
+        end_date=levels.index[-1].strftime("%Y-%m-%d"),
+    )
+    if kind == "bootstrap":
+        return RateModel(**model)
+
+    previous, current = values[:-1], values[1:]
+    phi, c = np.polyfit(previous, current, 1)
+    if 0 <= phi <= MAX_PHI:
+        mu = c / (1 - phi)
+    else:
+        phi = float(np.clip(phi, 0, MAX_PHI))
+        mu = float(values.mean())
+    residuals = current - (mu + phi * (previous - mu))
+    sigma = float(residuals.std(ddof=2))
+    return RateModel(**model, mu=float(mu), phi=float(phi), sigma=sigma)
+
+
+def simulate_chunk(terms: ArmTerms, model: RateModel, paths: int, seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+    """paths개 경로의 구간별 월 납입액과 총 이자 계산
+
+    Returns:
+        (payments: (paths, 구간 수) float32, total_interest: (paths,) float64)
+    """
+    rng = np.random.default_rng(seed)
+    starts = terms.reset_starts()
+    ends = starts[1:] + [terms.term_months]
+    rate_ceiling = terms.initial_rate + terms.lifetime_cap
+
+    balance = np.full(paths, float(terms.principal))
+    rate = np.full(paths, float(terms.initial_rate))
+    index = np.full(paths, model.current)
+    payment = np.full(paths, float(mortgage_calc.amortized_payment(terms.principal, terms.initial_rate, terms.term_months)))
+    payments = np.empty((paths, len(starts)), dtype='float32')
+    total_interest = np.zeros(paths)
+
+    for j, (start, end) in enumerate(zip(starts, ends)):
+        if j > 0:
+            index = model.step(index, start - starts[j - 1], rng)
+            cap = terms.initial_cap if j == 1 else terms.periodic_cap
+            rate = np.clip(index + terms.margin, rate - cap, rate + cap)
+            rate = np.clip(rate, terms.floor, rate_ceiling)
+            payment = mortgage_calc.amortized_payment(balance, rate, terms.term_months - start)
+        payments[:, j] = payment
+
+        # 구간 말 잔액 (balance_after의 배열 버전)
+        months = end - start
+        r = rate / 12 / 100
+        log_growth = months * np.log1p(r)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            accrued = np.expm1(log_growth) / r
+        remaining = balance * np.exp(log_growth) - payment * np.where(r == 0, months, accrued)
+        total_interest += payment * months - (balance - remaining)
+        balance = remaining
+
+    return payments, total_interest
+
+
+def chunk_plan(paths: int, seed: int) -> List[Tuple[int, np.random.SeedSequence]]:
+    sizes = [CHUNK_PATHS] * (paths // CHUNK_PATHS)
+    if paths % CHUNK_PATHS:
+        sizes.append(paths % CHUNK_PATHS)
+    return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def percentiles(values: np.ndarray, digits: int = 2) -> Dict[str, float]:
+    points = np.percentile(values, PERCENTILES, axis=0)
+    summary = {f"p{q}": round(float(p), digits) for q, p in zip(PERCENTILES, points)}
+    summary["mean"] = round(float(values.mean()), digits)
+    return summary
+
+
+def summarize(terms: ArmTerms, parts: List[Tuple[np.ndarray, np.ndarray]]) -> Dict[str, Any]:
+    """청크 결과를 합쳐 납입액 분포 요약"""
+    payments = np.concatenate([p for p, _ in parts])
+    total_interest = np.concatenate([t for _, t in parts])
+    initial_payment = float(payments[0, 0])
+    peak = payments.max(axis=1)
+
+    points = np.percentile(payments, PERCENTILES, axis=0)
+    means = payments.mean(axis=0, dtype='float64')
+    schedule = [
+        {
+            "month": start + 1,
+            **{f"p{q}": round(float(points[i, j]), 2) for i, q in enumerate(PERCENTILES)},
+            "mean": round(float(means[j]), 2),
+        }
+        for j, start in enumerate(terms.reset_starts())
+    ]
+    return {
+        "initial_payment": round(initial_payment, 2),
+        "payment_by_period": schedule,
+        "max_payment": percentiles(peak),
+        "total_interest": percentiles(total_interest),
+        "probability_payment_increase": round(float((peak > initial_payment * (1 + 1e-9)).mean()), 4),
+        "probability_payment_shock_25pct": round(float((peak > initial_payment * 1.25).mean()), 4),
+    }
+
+
+def run_simulation(terms: ArmTerms, model: RateModel, paths: int, seed: int) -> Dict[str, Any]:
+    """현재 스레드에서 모든 청크를 순서대로 실행"""
+    parts = [simulate_chunk(terms, model, size, seq) for size, seq in chunk_plan(paths, seed)]
+    return summarize(terms, parts)
+
+
+def params_hash(terms: ArmTerms, model: RateModel, paths: int, seed: int) -> str:
+    """시뮬레이션 입력(대출 조건, 모델, 경로 수, 시드)의 해시"""
+    payload = repr((sorted(asdict(terms).items()), asdict(model), paths, seed))
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_threads: Optional[ThreadPoolExecutor] = None
+
+
+def _process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS)
+    return _pool
+
+
+def _thread_pool() -> ThreadPoolExecutor:
+    global _threads
+    if _threads is None:
+        _threads = ThreadPoolExecutor(max_workers=THREAD_WORKERS, thread_name_prefix="rate-simulation")
+    return _threads
+
+
+def executor_kind(paths: int) -> str:
+    """경로 수에 따라 시뮬레이션을 실행할 곳 ("process" 또는 "thread")"""
+    return "process" if PROCESS_WORKERS > 1 and paths >= PROCESS_THRESHOLD else "thread"
+
+
+async def simulate(terms: ArmTerms, model: RateModel, paths: int, seed: int) -> Dict[str, Any]:
+    """이벤트 루프를 막지 않고 시뮬레이션 실행
+
+    경로 수가 PROCESS_THRESHOLD 이상이면 청크를 프로세스 풀에 나눠 실행하고,
+    그 외에는 시뮬레이션 전용 스레드 풀에서 실행합니다.
+    """
+    loop = asyncio.get_running_loop()
+    if executor_kind(paths) == "process":
+        pool = _process_pool()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(pool, simulate_chunk, terms, model, size, seq)
+            for size, seq in chunk_plan(paths, seed)
+        ))
+        return await loop.run_in_executor(_thread_pool(), summarize, terms, list(parts))
+    return await loop.run_in_executor(_thread_pool(), run_simulation, terms, model, paths, seed)
+
+
+def shutdown():
+    global _pool, _threads
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    if _threads is not None:
+        _threads.shutdown(wait=False, cancel_futures=True)
+        _threads = None
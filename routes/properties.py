@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Response, HTTPException
-import pandas as pd
-from pathlib import Path
+from fastapi import APIRouter, Request, Response, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from email.utils import formatdate, parsedate_to_datetime
+import json
 import logging
 import os
-from typing import List, Optional
+import numpy as np
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel
+from property_store import (
+    RECORD_FIELDS, get_store, iter_record_batches, normalize_filter_value, query_positions, to_records
+)
+import property_stats
 
 # Pydantic 모델 정의
 class PropertyDetails(BaseModel):
@@ -28,20 +34,105 @@ class PropertyResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class PropertyPage(BaseModel):
+    properties: List[Dict[str, Any]]
+    next_cursor: Optional[int] = None
+    total: int
+
+class PriceGroupStats(BaseModel):
+    key: str
+    count: int
+    mean: float
+    median: float
+    p10: float
+    p90: float
+    min: float
+    max: float
+    histogram: List[int]
+
+class PriceStatsResponse(BaseModel):
+    group_by: str
+    histogram_edges: List[float]
+    overall: Dict[str, Any]
+    groups: List[PriceGroupStats]
+    total_groups: int
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 브라우저/CDN 캐시 유지 시간 (0이면 매번 재검증하고 변경이 없으면 304)
+CACHE_MAX_AGE = int(os.getenv("PROPERTY_CACHE_MAX_AGE", "0"))
+
+def cache_headers(dataset, etag: str) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(dataset.last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={CACHE_MAX_AGE}, must-revalidate",
+    }
+
+def is_not_modified(request: Request, dataset, etag: str) -> bool:
+    """If-None-Match / If-Modified-Since 조건부 요청 검사"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(dataset.last_modified) <= since
+    return False
+
+def json_bytes(payload) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """?stream=1 또는 Accept: application/x-ndjson 요청 여부"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def ndjson_lines(batches):
+    """레코드 배치를 NDJSON 청크로 직렬화"""
+    for batch in batches:
+        if batch:
+            yield "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in batch)
+
+def parse_fields(fields: Optional[str]):
+    """fields 쿼리 파라미터 (쉼표 구분)를 응답 필드 튜플로 변환"""
+    if not fields:
+        return RECORD_FIELDS
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in selected if name not in RECORD_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(RECORD_FIELDS)}"
+        )
+    return selected
+
 @router.get("/api/properties",
-    response_model=List[PropertyResponse],
+    response_model=PropertyPage,
     summary="Get all properties",
-    description="Retrieves a list of all available properties",
+    description="""
+    Retrieves a list of available properties.
+    Supports cursor pagination ordered by RegionID (`cursor`, `limit`),
+    field projection (`fields=id,price,latitude,longitude`) and
+    filters on price range, city, state and zipcode.
+    With `stream=1` or `Accept: application/x-ndjson` the matching rows are
+    streamed as newline-delimited JSON in fixed-size batches.
+    """,
     responses={
         200: {
-            "description": "List of properties",
+            "description": "Page of properties",
             "content": {
                 "application/json": {
-                    "example": [{
+                    "example": {
+                        "properties": [{
                         "id": "prop123",
                         "region_id": 12345,
                         "region_name": "San Francisco",
@@ -53,62 +144,94 @@ router = APIRouter()
                         "latitude": 37.7749,
                         "longitude": -122.4194,
                         "zipcode": "94105"
-                    }]
+                        }],
+                        "next_cursor": 12345,
+                        "total": 1200
+                    }
                 }
             }
-        }
+        },
+        400: {"description": "Invalid query parameters"}
     }
 )
-async def get_properties(response: Response):
+async def get_properties(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="Return properties with RegionID greater than this value"),
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Page size (all matching rows if omitted)"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to include"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    zipcode: Optional[str] = None,
+    stream: bool = Query(False, description="Stream rows as NDJSON instead of a single JSON body"),
+):
     try:
         logger.info("Properties API called")  # API 호출 시작
-        
-        # 캐시 방지를 위한 헤더 설정
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        response.headers["Pragma"] = "no-cache"
-        response.headers["Expires"] = "0"
-
-        # CSV 파일 경로 변경
-        csv_path = Path(__file__).parents[1] / 'data' / 'california_properties.csv'
-        logger.info(f"CSV path: {csv_path}")
-        logger.info(f"CSV exists: {csv_path.exists()}")  # 파일 존재 여부
-        
-        if not csv_path.exists():
-            logger.error(f"CSV file not found at: {csv_path}")
+
+        # 메모리에 로드된 데이터셋 사용 (파일이 바뀌면 자동 리로드)
+        try:
+            dataset = get_store().get()
+        except FileNotFoundError:
+            logger.error(f"CSV file not found at: {get_store().csv_path}")
             raise HTTPException(status_code=404, detail="Data file not found")
 
-        # CSV 파일 읽기
-        df = pd.read_csv(csv_path)
-        logger.info(f"CSV loaded with {len(df)} rows")  # 로드된 행 수
-        logger.info(f"CSV columns: {df.columns.tolist()}")  # 컬럼 목록
-        logger.info(f"First row: {df.iloc[0].to_dict()}")  # 첫 번째 행
-        
-        # 데이터 변환
-        properties = []
-        for _, row in df.iterrows():
-            try:
-                property_data = {
-                    "id": int(row['RegionID']),
-                    "region_id": int(row['RegionID']),
-                    "region_name": str(row['City']),
-                    "city": str(row['City']),
-                    "state": str(row['State']),
-                    "metro": f"{row['City']} Metro",
-                    "county_name": f"{row['City']} County",
-                    "price": float(row['price']),
-                    "latitude": float(row['latitude']),
-                    "longitude": float(row['longitude']),
-                    "zipcode": str(row['zipcode'])
-                }
-                logger.info(f"Processed property: {property_data}")  # 각 속성 데이터 로깅
-                properties.append(property_data)
-            except Exception as e:
-                logger.error(f"Error processing row: {e}, Row data: {row}")
-                continue
-        
-        logger.info(f"Returning {len(properties)} properties")  # 반환할 속성 수
-        return {"properties": properties}
+        selected_fields = parse_fields(fields)
+        filters = {
+            name: value
+            for name, value in (("city", city), ("state", state), ("zipcode", zipcode))
+            if value
+        }
+        streaming = wants_stream(request, stream)
+
+        # 데이터셋 버전 + 질의 형태로 ETag 생성 (변경이 없으면 본문 없이 304)
+        query_key = (
+            "ndjson" if streaming else "json",
+            cursor, limit, selected_fields, min_price, max_price,
+            tuple(sorted((name, normalize_filter_value(value)) for name, value in filters.items())),
+        )
+        etag = dataset.etag(query_key)
+        headers = cache_headers(dataset, etag)
+        if is_not_modified(request, dataset, etag):
+            return Response(status_code=304, headers=headers)
+
+        def query():
+            # 인덱스와 벡터 마스크로 필터/페이지 적용
+            return query_positions(
+                dataset,
+                filters=filters,
+                min_price=min_price,
+                max_price=max_price,
+                cursor=cursor,
+                limit=limit,
+            )
+
+        if streaming:
+            # 배치 단위로 변환/전송하여 전체 목록을 메모리에 만들지 않음
+            positions, next_cursor, total = query()
+            headers["X-Total-Count"] = str(total)
+            if next_cursor is not None:
+                headers["X-Next-Cursor"] = str(next_cursor)
+            logger.info(f"Streaming {len(positions)} of {total} properties")
+            return StreamingResponse(
+                ndjson_lines(iter_record_batches(dataset, positions, selected_fields)),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=headers,
+            )
+
+        def render() -> bytes:
+            positions, next_cursor, total = query()
+            # 컬럼 단위로 한 번에 응답 데이터 변환
+            properties = to_records(dataset, positions, selected_fields)
+            logger.info(f"Rendered {len(properties)} of {total} properties")
+            return json_bytes({"properties": properties, "next_cursor": next_cursor, "total": total})
+
+        # 같은 데이터셋 버전/질의 형태의 직렬화 결과는 재사용
+        body = dataset.render_cache.get_or_render(query_key, render)
+        return Response(content=body, media_type="application/json", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"API error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
@@ -139,41 +262,206 @@ async def get_properties(response: Response):
         404: {"description": "Property not found"}
     }
 )
-async def get_property_by_id(property_id: str):
+async def get_property_by_id(property_id: str, request: Request):
     try:
-        # CSV 파일 경로
-        csv_path = Path(__file__).parents[1] / 'data' / 'california_properties.csv'
-        
-        if not csv_path.exists():
+        try:
+            dataset = get_store().get()
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Data file not found")
-
-        # CSV 파일 읽기
-        df = pd.read_csv(csv_path)
         
-        # property_id로 속성 찾기
-        property_row = df[df['RegionID'] == int(property_id)]
+        # 정렬된 RegionID 배열에서 속성 찾기
+        position = dataset.position_of(int(property_id))
         
-        if property_row.empty:
+        if position is None:
             raise HTTPException(status_code=404, detail="Property not found")
             
-        row = property_row.iloc[0]
-        
-        return {
-            "id": str(row['RegionID']),
-            "region_id": int(row['RegionID']),
-            "region_name": str(row['City']),
-            "city": str(row['City']),
-            "state": str(row['State']),
-            "metro": f"{row['City']} Metro",
-            "county_name": f"{row['City']} County",
-            "price": float(row['price']),
-            "latitude": float(row['latitude']),
-            "longitude": float(row['longitude']),
-            "zipcode": str(row['zipcode'])
-        }
+        etag = dataset.etag(("property", position))
+        headers = cache_headers(dataset, etag)
+        if is_not_modified(request, dataset, etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=json_bytes(to_records(dataset, [position])[0]),
+            media_type="application/json",
+            headers=headers,
+        )
         
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid property ID")
     except Exception as e:
         logger.error(f"Error getting property: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/properties/store/stats",
+    response_model=Dict[str, Any],
+    summary="Get property store stats",
+    description="Returns load time, row count and reload count of the in-memory property dataset")
+async def get_property_store_stats():
+    return get_store().stats()
+
+def current_dataset():
+    """현재 속성 데이터셋 (CSV가 없으면 404)"""
+    try:
+        return get_store().get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Data file not found")
+
+def with_distances(records: List[Dict[str, Any]], distances) -> List[Dict[str, Any]]:
+    for record, distance in zip(records, distances.round(3).tolist()):
+        record["distance_miles"] = distance
+    return records
+
+@router.get("/api/properties/geo/bbox",
+    response_model=PropertyPage,
+    summary="Get properties in a bounding box",
+    description="Retrieves properties inside the given map viewport using the spatial grid index",
+    responses={400: {"description": "Invalid bounding box"}}
+)
+async def get_properties_in_bbox(
+    south: float = Query(..., ge=-90, le=90),
+    west: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    fields: Optional[str] = None,
+):
+    try:
+        if south > north or west > east:
+            raise HTTPException(status_code=400, detail="Invalid bounding box: south <= north and west <= east required")
+        selected_fields = parse_fields(fields)
+        dataset = current_dataset()
+
+        positions = dataset.geo.bbox(south, west, north, east)
+        total = len(positions)
+        # 페이지 간 결과가 일정하도록 RegionID 순으로 반환
+        positions = positions[np.argsort(dataset.columns["region_id"][positions], kind='stable')][:limit]
+
+        return {"properties": to_records(dataset, positions, selected_fields), "total": total}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bbox search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/properties/geo/radius",
+    response_model=PropertyPage,
+    summary="Get properties within a radius",
+    description="Retrieves properties within radius_miles of a point, nearest first, with haversine distance",
+)
+async def get_properties_in_radius(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_miles: float = Query(..., gt=0, le=500),
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    fields: Optional[str] = None,
+):
+    try:
+        selected_fields = parse_fields(fields)
+        dataset = current_dataset()
+
+        positions, distances = dataset.geo.radius(lat, lng, radius_miles)
+        total = len(positions)
+        positions, distances = positions[:limit], distances[:limit]
+
+        records = with_distances(to_records(dataset, positions, selected_fields), distances)
+        return {"properties": records, "total": total}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in radius search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/properties/geo/nearest",
+    response_model=PropertyPage,
+    summary="Get nearest properties",
+    description="Retrieves the k nearest properties to a point by haversine distance",
+)
+async def get_nearest_properties(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=1000),
+    max_radius_miles: Optional[float] = Query(None, gt=0),
+    fields: Optional[str] = None,
+):
+    try:
+        selected_fields = parse_fields(fields)
+        dataset = current_dataset()
+
+        positions, distances = dataset.geo.nearest(lat, lng, k, max_radius_miles)
+
+        records = with_distances(to_records(dataset, positions, selected_fields), distances)
+        return {"properties": records, "total": len(records)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in nearest search: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/api/properties/stats/{group_by}",
+    response_model=PriceStatsResponse,
+    summary="Get price statistics by city, state or zipcode",
+    description="""
+    Returns count, mean, median, p10/p90, min/max and a price histogram per group.
+    Aggregates are computed once per dataset version (and per filter combination)
+    and reused until the CSV is reloaded. Histogram buckets share the same edges
+    across groups so they can be compared directly.
+    """,
+    responses={400: {"description": "Invalid query parameters"}}
+)
+async def get_price_stats(
+    request: Request,
+    group_by: Literal["city", "state", "zipcode"],
+    sort: Literal["count", "mean", "median", "p10", "p90", "min", "max", "key"] = "count",
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=10000, description="Maximum number of groups"),
+    min_count: int = Query(1, ge=1, description="Skip groups with fewer properties"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    zipcode: Optional[str] = None,
+):
+    try:
+        dataset = current_dataset()
+        filters = {
+            name: normalize_filter_value(value)
+            for name, value in (("city", city), ("state", state), ("zipcode", zipcode))
+            if value
+        }
+
+        query_key = (
+            "stats", group_by, sort, order, limit, min_count, min_price, max_price,
+            tuple(sorted(filters.items())),
+        )
+        etag = dataset.etag(query_key)
+        headers = cache_headers(dataset, etag)
+        if is_not_modified(request, dataset, etag):
+            return Response(status_code=304, headers=headers)
+
+        def render() -> bytes:
+            # 집계는 필터 조합별로 한 번만 계산하고, 여기서는 그룹 정렬/자르기만 수행
+            result = property_stats.aggregate(dataset, group_by, filters, min_price, max_price)
+            groups, total_groups = property_stats.group_records(
+                result["table"], sort=sort, descending=order == "desc", min_count=min_count, limit=limit
+            )
+            return json_bytes({
+                "group_by": group_by,
+                "histogram_edges": result["edges"].tolist(),
+                "overall": result["overall"],
+                "groups": groups,
+                "total_groups": total_groups,
+            })
+
+        body = dataset.render_cache.get_or_render(query_key, render)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing price stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
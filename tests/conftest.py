@@ -0,0 +1,41 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 저장소 루트의 최상위 모듈(chatbot, chat_cache 등)을 import할 수 있도록
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# 챗봇 엔드포인트 테스트는 네트워크 없는 OpenAI 대체 클라이언트를 사용
+os.environ.setdefault("OPENAI_OFFLINE_STUB", "true")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("CHAT_HISTORY_BACKEND", "memory")
+
+
+@pytest.fixture
+def anyio_backend():
+    # pytest.mark.anyio 비동기 테스트는 asyncio 이벤트 루프에서 실행
+    return "asyncio"
+
+
+# 속성 테스트용 작은 CSV (대소문자/공백만 다른 도시, 중복 ID, 숫자가 아닌 ID, 가격 누락 포함)
+PROPERTIES_CSV = """RegionID,City,State,price,latitude,longitude,zipcode
+10,Seattle,WA,500000,47.60,-122.33,98101
+11,"seattle ",WA,700000,47.61,-122.34,98102
+12,Seattle,WA,600000,47.62,-122.35,98101
+20,Portland,OR,400000,45.52,-122.68,97201
+21,Portland,OR,450000,45.53,-122.67,97202
+30,Los Angeles,CA,900000,34.05,-118.24,90001
+10,Seattle,WA,1,47.00,-122.00,98101
+abc,Nowhere,CA,100,34.00,-118.00,90002
+31,Los Angeles,CA,800000,34.06,-118.25,90001
+40,San Diego,CA,,32.70,-117.10,92101
+"""
+
+
+@pytest.fixture
+def properties_csv(tmp_path):
+    path = tmp_path / "properties.csv"
+    path.write_text(PROPERTIES_CSV)
+    return path
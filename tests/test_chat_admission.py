@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from chat_admission import AdmissionController, AdmissionRejected, request_key
+from openai_stub import StubAsyncOpenAI
+
+pytestmark = pytest.mark.anyio
+
+
+def rate_limit_error() -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+async def test_round_robin_between_users():
+    controller = AdmissionController(max_concurrency=1, max_wait=5, max_queued_per_user=4)
+    holder = await controller.acquire("holder")
+    order = []
+
+    async def request(user_id, n):
+        async with controller.slot(user_id):
+            order.append(f"{user_id}{n}")
+            await asyncio.sleep(0)
+
+    # a가 먼저 세 건을 줄 세워도 b는 a의 두 번째 요청보다 먼저 배정됨
+    tasks = [asyncio.create_task(request("a", n)) for n in range(3)]
+    tasks.append(asyncio.create_task(request("b", 0)))
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 4
+
+    holder.release()
+    await asyncio.gather(*tasks)
+
+    stats = controller.stats()
+    assert order == ["a0", "b0", "a1", "a2"]
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["admitted"] == 5
+
+
+async def test_queue_wait_timeout_rejects_and_frees_queue():
+    controller = AdmissionController(max_concurrency=1, max_wait=0.05)
+    holder = await controller.acquire("holder")
+    with pytest.raises(AdmissionRejected) as rejected:
+        await controller.acquire("waiter")
+    assert rejected.value.retry_after == 0.05
+    holder.release()
+
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["queued_users"] == 0
+    assert stats["active"] == 0
+
+
+async def test_per_user_queue_limit():
+    controller = AdmissionController(max_concurrency=1, max_wait=5, max_queued_per_user=1)
+    holder = await controller.acquire("holder")
+    waiting = asyncio.create_task(controller.acquire("a"))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire("a")
+    # 다른 사용자는 여전히 줄을 설 수 있음
+    other = asyncio.create_task(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    holder.release()
+    (await waiting).release()
+    (await other).release()
+
+    assert controller.stats()["rejected_queue_full"] == 1
+    assert controller.stats()["active"] == 0
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    controller = AdmissionController(max_concurrency=1, max_wait=5)
+    holder = await controller.acquire("holder")
+    waiting = asyncio.create_task(controller.acquire("a"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    holder.release()
+
+    # 취소된 대기자에게 자리가 넘어가지 않았으므로 바로 배정됨
+    ticket = await asyncio.wait_for(controller.acquire("b"), timeout=1)
+    ticket.release()
+    ticket.release()
+
+    assert controller.stats()["active"] == 0
+    assert controller.stats()["queue_depth"] == 0
+
+
+async def test_identical_requests_are_coalesced():
+    controller = AdmissionController(max_concurrency=4, max_wait=5)
+    client = StubAsyncOpenAI(delay=0.05)
+    messages = [{"role": "user", "content": "What is PMI?"}]
+    key = request_key(model="stub", messages=messages)
+
+    def call():
+        return client.chat.completions.create(model="stub", messages=messages)
+
+    results = await asyncio.gather(*(controller.call(user_id, call, key=key) for user_id in ("a", "b", "c")))
+
+    assert client.chat.completions.calls == 1
+    assert results[0] is results[1] is results[2]
+    assert "What is PMI?" in results[0].choices[0].message.content
+    assert controller.stats()["coalesced"] == 2
+    assert controller.stats()["inflight_coalescing_keys"] == 0
+
+
+async def test_retries_retryable_errors_only():
+    controller = AdmissionController(max_concurrency=1, max_wait=5, max_retries=3, base_delay=0, max_delay=0)
+    attempts = {"n": 0}
+
+    async def flaky():
+        attempts["n"] += 1
+        if attempts["n"] < 3:
+            raise rate_limit_error()
+        return "ok"
+
+    assert await controller.call("a", flaky) == "ok"
+
+    async def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        await controller.call("a", broken)
+
+    stats = controller.stats()
+    assert attempts["n"] == 3
+    assert stats["retries"] == 2
+    assert stats["failures"] == 1
+    assert stats["active"] == 0
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from chat_cache import ResponseCache, history_key, normalize_prompt
+
+MORTGAGE_DATA = {"loanAmount": 400000, "homeValue": 500000}
+HISTORY = [
+    {"role": "user", "content": "Can I afford a $500,000 home?"},
+    {"role": "assistant", "content": "Probably, with 20% down."},
+]
+
+
+def test_normalize_prompt_ignores_case_punctuation_and_number_format():
+    assert normalize_prompt("What's the PMI on $500,000?") == normalize_prompt("what's the pmi on 500000")
+
+
+def test_exact_hit_ignores_user_id_and_formatting():
+    cache = ResponseCache(similarity_threshold=0)
+    cache.store("What is PMI?", {**MORTGAGE_DATA, "userId": "a"}, "answer")
+    assert cache.lookup("what is pmi", {**MORTGAGE_DATA, "userId": "b"}) == ("answer", "exact")
+    assert cache.lookup("What is PMI?", {**MORTGAGE_DATA, "loanAmount": 1}) == (None, "miss")
+
+
+def test_similar_hit_requires_same_numbers():
+    cache = ResponseCache(similarity_threshold=0.7)
+    cache.store("How much is PMI on a 400000 loan?", MORTGAGE_DATA, "answer")
+    assert cache.lookup("how much is the PMI on a 400000 loan", MORTGAGE_DATA) == ("answer", "similar")
+    assert cache.lookup("How much is PMI on a 300000 loan?", MORTGAGE_DATA) == (None, "miss")
+
+
+def test_follow_up_is_keyed_on_prior_turns():
+    cache = ResponseCache(similarity_threshold=0)
+    cache.store("And what about that?", MORTGAGE_DATA, "answer", HISTORY, "a")
+
+    assert cache.lookup("And what about that?", MORTGAGE_DATA, HISTORY, "a") == ("answer", "exact")
+    # 이전 대화가 다르거나 없으면 재사용하지 않음
+    other_history = [{"role": "user", "content": "Tell me about closing costs"}]
+    assert cache.lookup("And what about that?", MORTGAGE_DATA, other_history, "b") == (None, "miss")
+    assert cache.lookup("And what about that?", MORTGAGE_DATA) == (None, "miss")
+
+
+def test_similar_follow_up_is_not_shared_across_users():
+    cache = ResponseCache(similarity_threshold=0.7)
+    cache.store("and what about the rate?", MORTGAGE_DATA, "answer", HISTORY, "a")
+
+    assert cache.lookup("what about the rate then?", MORTGAGE_DATA, HISTORY, "a") == ("answer", "similar")
+    assert cache.lookup("what about the rate then?", MORTGAGE_DATA, HISTORY, "b") == (None, "miss")
+
+
+def test_history_key_is_empty_without_prior_turns():
+    assert history_key([]) == ""
+    assert history_key(HISTORY) == history_key([dict(turn) for turn in HISTORY])
+    assert history_key(HISTORY) != history_key(HISTORY[:1])
+
+
+def test_entries_expire_and_are_evicted_lru():
+    cache = ResponseCache(ttl=0.01, max_entries=2, similarity_threshold=0)
+    cache.store("first", MORTGAGE_DATA, "1")
+    time.sleep(0.02)
+    assert cache.lookup("first", MORTGAGE_DATA) == (None, "miss")
+
+    cache = ResponseCache(max_entries=2, similarity_threshold=0)
+    cache.store("first", MORTGAGE_DATA, "1")
+    cache.store("second", MORTGAGE_DATA, "2")
+    cache.lookup("first", MORTGAGE_DATA)
+    cache.store("third", MORTGAGE_DATA, "3")
+    assert cache.lookup("second", MORTGAGE_DATA) == (None, "miss")
+    assert cache.lookup("first", MORTGAGE_DATA) == ("1", "exact")
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.fixture
+def chat_client():
+    import chatbot
+
+    chatbot.response_cache.clear()
+    app = FastAPI()
+    app.include_router(chatbot.router)
+    with TestClient(app) as client:
+        yield client, chatbot
+
+
+def ask(client, user_id: str, content: str) -> str:
+    response = client.post(
+        "/api/chat/with-history",
+        json={"content": content, "mortgage_data": {**MORTGAGE_DATA, "userId": user_id}},
+    )
+    assert response.status_code == 200
+    return response.json()["content"]
+
+
+def test_chat_endpoint_shares_first_questions_but_not_follow_ups(chat_client):
+    client, chatbot = chat_client
+    completions = chatbot.client.chat.completions
+    calls = completions.calls
+    hits = chatbot.response_cache.stats()["exact_hits"]
+
+    ask(client, "cache-test-a", "What is a good down payment?")
+    ask(client, "cache-test-b", "What is a good down payment?")
+    assert completions.calls == calls + 1
+
+    ask(client, "cache-test-a", "And what about that?")
+    ask(client, "cache-test-c", "Tell me about closing costs")
+    ask(client, "cache-test-c", "And what about that?")
+    assert completions.calls == calls + 4
+    assert chatbot.response_cache.stats()["exact_hits"] == hits + 1
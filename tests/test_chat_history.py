@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from chat_history import MESSAGE_OVERHEAD_BYTES, MemoryHistoryStore, SQLiteHistoryStore
+
+pytestmark = pytest.mark.anyio
+
+
+def message(n: int, size: int = 10):
+    return {"role": "user", "content": str(n).rjust(size, "x")}
+
+
+async def test_ring_buffer_keeps_last_turns_and_tracks_bytes():
+    store = MemoryHistoryStore(max_turns=3)
+    for n in range(5):
+        await store.append("a", message(n))
+
+    assert await store.recent("a", 10) == [message(2), message(3), message(4)]
+    assert await store.recent("a", 2) == [message(3), message(4)]
+    assert await store.recent("a", 0) == []
+    stats = await store.stats()
+    assert stats["messages"] == 3
+    assert stats["bytes"] == 3 * (10 + MESSAGE_OVERHEAD_BYTES)
+
+
+async def test_idle_users_expire():
+    store = MemoryHistoryStore(idle_ttl=0.02)
+    await store.append("a", message(0))
+    await store.append("b", message(0))
+    await asyncio.sleep(0.03)
+
+    assert await store.recent("a", 10) == []
+    # 다른 사용자의 새 메시지가 유휴 사용자를 정리
+    await store.append("c", message(0))
+    stats = await store.stats()
+    assert stats["users"] == 1
+    assert stats["evicted"]["ttl"] == 2
+
+
+async def test_least_recently_used_user_is_evicted_over_user_limit():
+    store = MemoryHistoryStore(max_users=2)
+    await store.append("a", message(0))
+    await store.append("b", message(0))
+    await store.append("a", message(1))
+    await store.append("c", message(0))
+
+    assert await store.recent("b", 10) == []
+    assert await store.recent("a", 10) == [message(0), message(1)]
+    assert (await store.stats())["evicted"]["users"] == 1
+
+
+async def test_byte_budget_evicts_other_users_then_trims_current_user():
+    per_message = 10 + MESSAGE_OVERHEAD_BYTES
+    store = MemoryHistoryStore(max_turns=10, max_bytes=3 * per_message)
+    await store.append("a", message(0))
+    await store.append("a", message(1))
+    for n in range(2):
+        await store.append("b", message(n))
+
+    # 다른 사용자를 먼저 제거
+    assert await store.recent("a", 10) == []
+    assert (await store.stats())["evicted"]["bytes"] == 1
+
+    # 혼자 남아도 한도를 넘으면 현재 사용자의 오래된 메시지를 잘라냄
+    for n in range(2, 5):
+        await store.append("b", message(n))
+    assert await store.recent("b", 10) == [message(2), message(3), message(4)]
+    stats = await store.stats()
+    assert stats["bytes"] <= store.max_bytes
+    assert stats["trimmed_messages"] == 2
+
+
+async def test_oversized_message_is_kept():
+    store = MemoryHistoryStore(max_bytes=100)
+    await store.append("a", message(0))
+    await store.append("a", message(1, size=500))
+
+    assert await store.recent("a", 10) == [message(1, size=500)]
+
+
+async def test_sqlite_store_keeps_last_turns_per_user(tmp_path):
+    store = SQLiteHistoryStore(tmp_path / "history.sqlite3", max_turns=3)
+    for n in range(5):
+        await store.append("a", message(n))
+    await store.append("b", message(0))
+
+    assert await store.recent("a", 10) == [message(2), message(3), message(4)]
+    await store.clear("a")
+    assert await store.recent("a", 10) == []
+    assert await store.recent("b", 10) == [message(0)]
@@ -0,0 +1,119 @@
+import sys
+
+import pytest
+
+import chat_prompt
+from chat_prompt import build_messages, estimate_tokens, message_tokens, summarize_mortgage_data
+
+SYSTEM_PROMPT = "You are a helpful mortgage advisor."
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # tiktoken 설치 여부와 관계없이 같은 토큰 수로 테스트
+    monkeypatch.setattr(chat_prompt, "_token_counter", lambda model: estimate_tokens)
+
+
+def conversation(turns: int, words: int = 30):
+    history = []
+    for n in range(turns):
+        role = "user" if n % 2 == 0 else "assistant"
+        history.append({"role": role, "content": f"turn {n} " + "word " * words})
+    return history
+
+
+def total_tokens(messages):
+    return sum(message_tokens(message) for message in messages)
+
+
+@pytest.mark.parametrize("budget", [150, 400, 1000])
+def test_prompt_fits_budget_and_keeps_system_and_newest_turns(budget):
+    history = conversation(40)
+    messages = build_messages(SYSTEM_PROMPT, history, budget=budget)
+
+    assert total_tokens(messages) <= budget
+    assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    kept = [message for message in messages if message["role"] != "system"]
+    # 최신 메시지부터 순서 그대로 연속해서 포함
+    assert kept == history[-len(kept):]
+    assert kept[-1] == history[-1]
+
+
+def test_older_turns_are_compacted_into_a_summary():
+    # 긴 이전 메시지는 예산에 들어가지 않고 최근의 짧은 메시지만 그대로 들어감
+    history = conversation(10, words=300) + conversation(4, words=5)
+    messages = build_messages(SYSTEM_PROMPT, history, budget=300)
+
+    assert total_tokens(messages) <= 300
+    assert [m for m in messages if m["role"] != "system"] == history[-4:]
+    summaries = [m["content"] for m in messages[1:] if m["role"] == "system"]
+    assert len(summaries) == 1
+    assert summaries[0].startswith("Summary of earlier conversation")
+    # 요약은 제외된 메시지 중 가장 최근 것부터, 앞부분만 포함
+    assert "turn 9 " in summaries[0] and "turn 0 " not in summaries[0]
+    assert all(len(line) <= chat_prompt.SUMMARY_SNIPPET_CHARS + len("assistant: ") for line in summaries[0].splitlines())
+
+
+def test_short_history_is_sent_unchanged():
+    history = conversation(4, words=5)
+    assert build_messages(SYSTEM_PROMPT, history) == [{"role": "system", "content": SYSTEM_PROMPT}] + history
+
+
+def test_oversized_current_message_is_truncated():
+    history = [{"role": "user", "content": "word " * 2000}]
+    messages = build_messages(SYSTEM_PROMPT, history, budget=200)
+
+    assert total_tokens(messages) <= 200
+    assert messages[-1]["role"] == "user"
+    assert history[0]["content"].startswith(messages[-1]["content"])
+
+
+def test_mortgage_data_is_included_as_a_system_message():
+    mortgage_data = {
+        "userId": "user-1",
+        "home_value": 500000,
+        "interest_rate": 6.5,
+        "credit_score": 720,
+        "notes": "",
+        "property": {"city": "Seattle", "loan_amount": 400000},
+        "accounts": [1, 2, 3],
+    }
+    messages = build_messages(SYSTEM_PROMPT, conversation(2), mortgage_data=mortgage_data, budget=1000)
+
+    profile = messages[1]
+    assert profile["role"] == "system"
+    assert profile["content"] == summarize_mortgage_data(mortgage_data)
+    lines = profile["content"].splitlines()[1:]
+    assert lines == [
+        "- home_value: $500,000",
+        "- interest_rate: 6.5%",
+        "- credit_score: 720",
+        "- property.city: Seattle",
+        "- property.loan_amount: $400,000",
+        "- accounts: 3 items",
+    ]
+    assert summarize_mortgage_data({}) is None and summarize_mortgage_data(None) is None
+
+
+def test_many_profile_fields_are_capped(monkeypatch):
+    monkeypatch.setattr(chat_prompt, "PROFILE_MAX_FIELDS", 3)
+    summary = summarize_mortgage_data({f"field{n}": n for n in range(5)})
+    assert summary.splitlines()[-1] == "- (2 more fields omitted)"
+    assert len(summary.splitlines()) == 5
+
+
+def test_falls_back_to_estimate_without_tiktoken(monkeypatch):
+    monkeypatch.undo()
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    chat_prompt._token_counter.cache_clear()
+    try:
+        assert chat_prompt._token_counter("gpt-3.5-turbo") is estimate_tokens
+        assert chat_prompt.count_tokens("one two three four") == estimate_tokens("one two three four")
+    finally:
+        chat_prompt._token_counter.cache_clear()
+
+
+def test_estimate_tokens_grows_with_text():
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+    assert estimate_tokens("a " * 300) == 401
@@ -0,0 +1,189 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import financial_profile
+import mortgage
+from financial_profile import FinancialProfileService, FinancialProfileStore, ItemOwnerConflict, compute_profile
+
+ACCOUNT = {
+    "account_id": "acc-1",
+    "name": "Checking",
+    "type": "depository",
+    "subtype": "checking",
+    "balances": {"current": 1200.0, "available": 1100.0},
+}
+TRANSACTIONS = [
+    {"amount": -5000.0, "personal_finance_category": {"primary": "INCOME"}},
+    {"amount": -1000.0, "category": ["Transfer", "Payroll"]},
+    {"amount": 600.0, "personal_finance_category": {"primary": "LOAN_PAYMENTS"}},
+    # 카드 계좌 쪽에 찍힌 같은 납부와 일반 지출은 제외
+    {"amount": -600.0, "personal_finance_category": {"primary": "LOAN_PAYMENTS"}},
+    {"amount": 45.0, "category": ["Food and Drink"]},
+]
+MORTGAGE_RATE = 6.0
+# LTV 70%, 6% 30년 월 상환액 약 2,098
+LOAN = {"home_value": 500000, "loan_amount": 350000, "down_payment": 150000}
+
+
+class FakePlaid:
+    """access token별 잔액/거래 내역을 돌려주는 Plaid 조회 함수 (Exception이면 raise)"""
+
+    def __init__(self, balances=None, transactions=None):
+        self.balances = balances or {}
+        self.transactions = transactions or {}
+
+    async def fetch_balances(self, access_token):
+        return {"accounts": self.balances.get(access_token, [])}
+
+    async def fetch_transactions(self, access_token, start, end):
+        transactions = self.transactions.get(access_token, [])
+        if isinstance(transactions, Exception):
+            raise transactions
+        return transactions
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FinancialProfileStore(tmp_path / "profiles.sqlite3")
+
+
+@pytest.fixture
+def plaid():
+    return FakePlaid()
+
+
+@pytest.fixture
+def service(store, plaid, monkeypatch):
+    service = FinancialProfileService(plaid.fetch_balances, plaid.fetch_transactions, store=store, retry_after=120)
+    monkeypatch.setattr(financial_profile, "_service", service)
+    return service
+
+
+@pytest.fixture
+def mortgage_client(service, monkeypatch):
+    async def current_rate():
+        return MORTGAGE_RATE
+
+    monkeypatch.setattr(mortgage, "get_current_mortgage_rate", current_rate)
+    app = FastAPI()
+    app.include_router(mortgage.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def save_profile(store, user_id, item_id, income, debt):
+    store.save_item(user_id, item_id, f"access-{item_id}")
+    store.save_profile(item_id, {"income": income, "debt": debt, "accounts": []})
+
+
+def analyze(client, user_id, **params):
+    return client.get("/api/mortgage-analysis/", params={"user_id": user_id, **LOAN, **params})
+
+
+def test_compute_profile_annualizes_income_and_monthly_debt_payments():
+    profile = compute_profile([ACCOUNT], TRANSACTIONS, lookback_days=365)
+
+    assert profile["income"] == 6000.0
+    assert profile["debt"] == 50.0
+    assert profile["accounts"] == [
+        {
+            "account_id": "acc-1",
+            "name": "Checking",
+            "type": "depository",
+            "subtype": "checking",
+            "current": 1200.0,
+            "available": 1100.0,
+        }
+    ]
+
+
+def test_compute_profile_without_transactions_leaves_income_unknown():
+    profile = compute_profile([ACCOUNT], None)
+    assert profile["income"] is None
+    assert profile["debt"] is None
+    assert len(profile["accounts"]) == 1
+
+
+@pytest.mark.anyio
+async def test_link_item_computes_profile_and_keeps_it_when_transactions_fail(store, plaid):
+    plaid.balances["access-a"] = [ACCOUNT]
+    plaid.transactions["access-a"] = TRANSACTIONS
+    service = FinancialProfileService(plaid.fetch_balances, plaid.fetch_transactions, store=store, lookback_days=365)
+
+    profile = await service.link_item("user-a", "item-a", "access-a")
+    assert (profile["income"], profile["debt"], profile["pending_items"]) == (6000.0, 50.0, 0)
+
+    # 거래 내역을 읽지 못하면 이전 소득/부채를 유지
+    plaid.transactions["access-a"] = RuntimeError("PRODUCT_NOT_READY")
+    await service.refresh("item-a")
+    profile = await service.get_profile("user-a")
+    assert (profile["income"], profile["debt"]) == (6000.0, 50.0)
+
+
+@pytest.mark.anyio
+async def test_get_profile_sums_items_and_counts_pending(service, store):
+    save_profile(store, "user-a", "item-a", income=60000, debt=300)
+    save_profile(store, "user-a", "item-b", income=40000, debt=None)
+    store.save_item("user-a", "item-c", "access-item-c")
+    save_profile(store, "user-b", "item-d", income=999999, debt=999)
+
+    profile = await service.get_profile("user-a")
+    await service.shutdown()
+    assert profile["income"] == 100000
+    assert profile["debt"] == 300
+    assert profile["items"] == 3
+    assert profile["pending_items"] == 1
+    assert await service.get_profile("nobody") is None
+
+
+def test_item_owner_cannot_be_changed(store):
+    store.save_item("user-a", "item-a", "access-1")
+    # 같은 사용자의 재연결은 access token만 갱신
+    store.save_item("user-a", "item-a", "access-2")
+
+    with pytest.raises(ItemOwnerConflict):
+        store.save_item("user-b", "item-a", "access-3")
+    assert store.item("item-a")["user_id"] == "user-a"
+    assert store.item("item-a")["access_token"] == "access-2"
+    assert store.item_profiles("user-b") == []
+
+
+def test_missing_credit_score_is_incomplete_not_approved(mortgage_client, store):
+    save_profile(store, "user-a", "item-a", income=120000, debt=500)
+
+    response = analyze(mortgage_client, "user-a")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["approval_status"] == "Incomplete"
+    assert body["unknown_conditions"] == ["credit_score"]
+    assert body["approval_details"]["신용점수 충족"] == "❔"
+
+    assert analyze(mortgage_client, "user-a", credit_score=720).json()["approval_status"] == "Approved"
+    assert analyze(mortgage_client, "user-a", credit_score=600).json()["approval_status"] == "Rejected"
+
+
+def test_failed_condition_rejects_even_with_unknown_credit_score(mortgage_client, store):
+    # 월 부채 5,000 / 월 소득 10,000 = DTI 50%
+    save_profile(store, "user-a", "item-a", income=120000, debt=5000)
+
+    assert analyze(mortgage_client, "user-a").json()["approval_status"] == "Rejected"
+
+
+def test_pending_profile_returns_503_with_retry_after(mortgage_client, store, plaid):
+    # 거래 내역이 아직 준비되지 않은 item
+    plaid.transactions["access-item-a"] = RuntimeError("PRODUCT_NOT_READY")
+    store.save_item("user-a", "item-a", "access-item-a")
+
+    response = analyze(mortgage_client, "user-a", credit_score=720)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "120"
+
+
+def test_unknown_user_returns_404(mortgage_client):
+    assert analyze(mortgage_client, "nobody", credit_score=720).status_code == 404
+
+
+def test_zero_income_returns_422(mortgage_client, store):
+    save_profile(store, "user-a", "item-a", income=0, debt=200)
+    assert analyze(mortgage_client, "user-a", credit_score=720).status_code == 422
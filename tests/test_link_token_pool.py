@@ -0,0 +1,107 @@
+import asyncio
+import itertools
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from link_token_pool import LinkTokenPool, PooledToken
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeMinter:
+    """순번이 붙은 토큰을 발급하는 mint 함수 (ttls 순서대로 유효 시간 지정)"""
+
+    def __init__(self, ttls=None, default_ttl: float = 4 * 3600, fail: bool = False):
+        self.ttls = list(ttls or [])
+        self.default_ttl = default_ttl
+        self.fail = fail
+        self.calls = 0
+        self._ids = itertools.count()
+
+    async def __call__(self) -> PooledToken:
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("plaid unavailable")
+        n = next(self._ids)
+        ttl = self.ttls.pop(0) if self.ttls else self.default_ttl
+        return PooledToken(
+            link_token=f"link-sandbox-{n}",
+            expiration=datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            request_id=f"req-{n}",
+        )
+
+
+async def wait_for_size(pool: LinkTokenPool, size: int):
+    for _ in range(50):
+        if pool.stats()["size"] == size:
+            return
+        await asyncio.sleep(0.01)
+
+
+async def test_refill_fills_to_high_watermark_and_serves_earliest_expiration_first():
+    mint = FakeMinter(ttls=[7200, 3600, 10800])
+    pool = LinkTokenPool(mint, low_watermark=1, high_watermark=3, min_ttl=60, refill_concurrency=2)
+    assert await pool.refill() == 3
+    assert await pool.refill() == 0
+
+    taken = [await pool.take() for _ in range(3)]
+    assert [token.link_token for token in taken] == ["link-sandbox-1", "link-sandbox-0", "link-sandbox-2"]
+    stats = pool.stats()
+    assert stats["served_from_pool"] == 3
+    assert stats["served_on_demand"] == 0
+    assert stats["size"] == 0
+
+
+async def test_tokens_near_expiry_are_evicted_and_pool_falls_back_to_minting():
+    # 앞의 두 토큰은 min_ttl보다 빨리 만료됨
+    mint = FakeMinter(ttls=[30, 30])
+    pool = LinkTokenPool(mint, low_watermark=0, high_watermark=2, min_ttl=60)
+    await pool.refill()
+    token = await pool.take()
+
+    stats = pool.stats()
+    assert token.link_token == "link-sandbox-2"
+    assert stats["expired"] == 2
+    assert stats["served_on_demand"] == 1
+    assert stats["served_from_pool"] == 0
+
+
+async def test_take_below_low_watermark_wakes_background_refill():
+    mint = FakeMinter()
+    # 주기적 보충은 충분히 길게 두어 깨우기 신호로만 보충되도록 함
+    pool = LinkTokenPool(mint, low_watermark=2, high_watermark=4, min_ttl=60, refill_interval=60)
+    pool.start()
+    try:
+        await wait_for_size(pool, 4)
+        for _ in range(3):
+            await pool.take()
+        await wait_for_size(pool, 4)
+
+        stats = pool.stats()
+        assert stats["size"] == 4
+        assert stats["running"] is True
+        assert stats["served_from_pool"] == 3
+        assert stats["minted"] == 7
+    finally:
+        await pool.stop()
+    assert pool.stats()["running"] is False
+
+
+async def test_mint_errors_are_counted_and_do_not_fill_pool():
+    mint = FakeMinter(fail=True)
+    pool = LinkTokenPool(mint, low_watermark=1, high_watermark=3, min_ttl=60)
+
+    assert await pool.refill() == 0
+    assert pool.stats()["mint_errors"] == 3
+    assert pool.stats()["size"] == 0
+
+
+def test_pooled_token_response_uses_utc_suffix():
+    token = PooledToken("link-sandbox-x", datetime(2030, 1, 2, 3, 4, 5, tzinfo=timezone.utc), "req")
+    assert token.as_response() == {
+        "link_token": "link-sandbox-x",
+        "expiration": "2030-01-02T03:04:05Z",
+        "request_id": "req",
+    }
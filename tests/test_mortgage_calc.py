@@ -0,0 +1,327 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import mortgage
+import mortgage_calc
+from mortgage_calc import amortized_payment, evaluate_applications
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(mortgage.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def scalar_payment(principal, annual_rate, term_months):
+    """교과서 공식 (1 + r)^n 으로 계산한 월 납입액"""
+    r = annual_rate / 12 / 100
+    if r == 0:
+        return principal / term_months
+    growth = (1 + r) ** term_months
+    return principal * r * growth / (growth - 1)
+
+
+@pytest.mark.parametrize("annual_rate", [0.0, 3.5, 7.25, 30.0])
+@pytest.mark.parametrize("term_months", [1, 120, 360, 600])
+def test_amortized_payment_matches_formula(annual_rate, term_months):
+    assert float(amortized_payment(400000, annual_rate, term_months)) == pytest.approx(
+        scalar_payment(400000, annual_rate, term_months), rel=1e-9
+    )
+
+
+@pytest.mark.parametrize("term_months", [1, 360])
+def test_amortized_payment_is_stable_near_zero_rate(term_months):
+    # (1 + r)^n - 1 은 r이 아주 작으면 자릿수가 사라지므로 0% 극한과 비교
+    assert float(amortized_payment(400000, 1e-9, term_months)) == pytest.approx(400000 / term_months, rel=1e-9)
+
+
+def test_amortized_payment_broadcasts():
+    payments = amortized_payment(np.array([100000, 200000]), np.array([[3.0], [6.0]]), 360)
+    assert payments.shape == (2, 2)
+    assert payments[1, 1] == pytest.approx(scalar_payment(200000, 6.0, 360))
+
+
+APPLICATIONS = [
+    # home_value, loan_amount, down_payment, annual_income, total_debt, credit_score
+    (500000, 400000, 100000, 150000, 1000, 720),  # 승인
+    (500000, 450000, 50000, 150000, 1000, 720),   # LTV/계약금 부족
+    (500000, 400000, 100000, 60000, 2500, 720),   # DTI 초과
+    (500000, 400000, 100000, 150000, 1000, 600),  # 신용점수 부족
+]
+
+
+def test_evaluate_applications_matches_scalar_rules():
+    columns = [np.array(column, dtype="float64") for column in zip(*APPLICATIONS)]
+    evaluated = evaluate_applications(*columns, annual_rate=6.0, term_months=360)
+
+    for i, (home_value, loan, down, income, debt, score) in enumerate(APPLICATIONS):
+        dti = debt / (income / 12) * 100
+        ltv = loan / home_value * 100
+        assert evaluated["monthly_payment"][i] == pytest.approx(scalar_payment(loan, 6.0, 360))
+        assert evaluated["dti_ratio"][i] == pytest.approx(dti)
+        assert evaluated["ltv_ratio"][i] == pytest.approx(ltv)
+        expected = (
+            score >= mortgage_calc.MIN_CREDIT_SCORE,
+            dti <= mortgage_calc.MAX_DTI_RATIO,
+            ltv <= mortgage_calc.MAX_LTV_RATIO,
+            down / home_value * 100 >= mortgage_calc.MIN_DOWN_PAYMENT_RATIO,
+        )
+        flags = ("credit_ok", "dti_ok", "ltv_ok", "down_payment_ok")
+        assert tuple(bool(evaluated[name][i]) for name in flags) == expected
+        assert bool(evaluated["approved"][i]) == all(expected)
+
+    assert evaluated["approved"].tolist() == [True, False, False, False]
+
+
+def application(home_value, loan_amount, down_payment, annual_income, total_debt, credit_score):
+    return {
+        "home_value": home_value,
+        "loan_amount": loan_amount,
+        "down_payment": down_payment,
+        "annual_income": annual_income,
+        "total_debt": total_debt,
+        "credit_score": credit_score,
+    }
+
+
+def test_batch_endpoint_keeps_input_order_and_reports_invalid_items(client):
+    items = [application(*row) for row in APPLICATIONS]
+    items.insert(1, {"home_value": 500000})
+    items.insert(3, application(0, 1, 1, 1, 0, 700))
+    response = client.post("/mortgage-analysis/batch", json={"applications": items, "annual_rate": 6.0})
+    assert response.status_code == 200
+    body = response.json()
+
+    assert [item["index"] for item in body["results"]] == list(range(len(items)))
+    statuses = [item["result"]["approval_status"] if item["result"] else None for item in body["results"]]
+    assert statuses == ["Approved", None, "Denied", None, "Denied", "Denied"]
+    assert body["results"][1]["errors"]
+    assert body["results"][3]["errors"][0]["loc"] == ["home_value"]
+    assert (body["approved"], body["denied"], body["invalid"]) == (1, 3, 2)
+
+    first = body["results"][0]["result"]
+    assert first["monthly_payment"] == round(scalar_payment(400000, 6.0, 360), 2)
+    assert first["approval_details"]["Credit Score"] == "✅ Sufficient"
+    assert body["results"][5]["result"]["approval_details"]["Credit Score"] == "❌ Insufficient"
+
+
+def test_batch_endpoint_rejects_oversized_batches(client, monkeypatch):
+    monkeypatch.setattr(mortgage, "MAX_BATCH_SIZE", 2)
+    items = [application(*APPLICATIONS[0])] * 3
+    assert client.post("/mortgage-analysis/batch", json={"applications": items}).status_code == 413
+
+
+GRID_ARGS = (500000, 150000, 1000, 720, (5.5, 6.5), (15, 30), (10.0, 20.0, 25.0))
+
+
+def test_scenario_grid_cells_match_single_evaluation():
+    grid = mortgage_calc.scenario_grid(*GRID_ARGS)
+    home_value, income, debt, score, rates, terms, downs = GRID_ARGS
+
+    for i, rate in enumerate(rates):
+        for j, years in enumerate(terms):
+            for k, down in enumerate(downs):
+                loan = home_value * (1 - down / 100)
+                evaluated = evaluate_applications(home_value, loan, home_value - loan, income, debt, score, rate, years * 12)
+                payment = float(evaluated["monthly_payment"])
+                assert grid["monthly_payment"][i][j][k] == round(payment, 2)
+                assert grid["total_interest"][i][j][k] == pytest.approx(payment * years * 12 - loan, abs=0.01)
+                payment_ok = payment / (income / 12) * 100 <= mortgage_calc.MAX_PAYMENT_TO_INCOME_RATIO
+                assert grid["approved"][i][j][k] == (bool(evaluated["approved"]) and payment_ok)
+
+    assert grid["loan_amounts"] == [450000.0, 400000.0, 375000.0]
+    assert grid["approved_count"] == sum(cell for plane in grid["approved"] for row in plane for cell in row)
+    # 같은 입력은 캐시된 결과를 재사용
+    assert mortgage_calc.scenario_grid(*GRID_ARGS) is grid
+
+
+def scenario_request(**overrides):
+    return {"home_value": 500000, "annual_income": 150000, "total_debt": 1000, "credit_score": 720, **overrides}
+
+
+def test_scenario_endpoint_expands_rate_range(client):
+    response = client.post(
+        "/mortgage-analysis/scenarios",
+        json=scenario_request(rate_start=6.0, rate_stop=6.5, rate_step=0.25, terms_years=[30], down_payment_pcts=[20]),
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rates"] == [6.0, 6.25, 6.5]
+    assert len(body["monthly_payment"]) == 3
+
+
+@pytest.mark.parametrize("overrides", [
+    {"rates": [6.0], "terms_years": [25]},
+    {"rates": [6.0], "down_payment_pcts": [100]},
+    {"rates": [31.0]},
+    {"rate_start": 6.5, "rate_stop": 6.0},
+])
+def test_scenario_endpoint_rejects_invalid_axes(client, overrides):
+    assert client.post("/mortgage-analysis/scenarios", json=scenario_request(**overrides)).status_code == 400
+
+
+def test_scenario_endpoint_limits_grid_size(client, monkeypatch):
+    monkeypatch.setattr(mortgage, "MAX_SCENARIO_CELLS", 10)
+    response = client.post("/mortgage-analysis/scenarios", json=scenario_request(rates=[5.0, 6.0, 7.0]))
+    assert response.status_code == 400
+
+
+def loop_schedule(principal, annual_rate, term_months, extra_monthly=0.0, extra_payments=None):
+    """회차별 반복문으로 만든 기준 상환 일정"""
+    r = annual_rate / 12 / 100
+    payment = scalar_payment(principal, annual_rate, term_months) + extra_monthly
+    balance = principal
+    rows = []
+    for period in range(1, term_months + 1):
+        interest = balance * r
+        paid = payment + (extra_payments or {}).get(period, 0.0)
+        if balance + interest <= paid + 1e-6:
+            rows.append((period, balance + interest, interest, 0.0))
+            break
+        balance = balance + interest - paid
+        rows.append((period, paid, interest, balance))
+    return rows
+
+
+@pytest.mark.parametrize("annual_rate", [0.0, 6.5])
+@pytest.mark.parametrize("extra_monthly, extra_payments", [(0, None), (350, None), (0, {12: 50000, 60: 25000})])
+def test_schedule_matches_loop(annual_rate, extra_monthly, extra_payments):
+    schedule = mortgage_calc.amortization_schedule(400000, annual_rate, 360, extra_monthly, extra_payments)
+    expected = loop_schedule(400000, annual_rate, 360, extra_monthly, extra_payments)
+
+    assert len(schedule["period"]) == len(expected)
+    periods, payments, interest, balance = (np.array(column) for column in zip(*expected))
+    assert schedule["period"].tolist() == periods.tolist()
+    np.testing.assert_allclose(schedule["payment"], payments, atol=1e-6)
+    np.testing.assert_allclose(schedule["interest"], interest, atol=1e-6)
+    np.testing.assert_allclose(schedule["balance"], balance, atol=1e-6)
+    assert schedule["balance"][-1] == 0
+    np.testing.assert_allclose(schedule["principal"].sum(), 400000)
+
+
+@pytest.mark.parametrize("annual_rate", [0.0, 3.0, 6.5])
+@pytest.mark.parametrize("extra_monthly", [0, 200, 1500])
+@pytest.mark.parametrize("year", [1, 7, 30])
+def test_closed_form_summary_matches_schedule(annual_rate, extra_monthly, year):
+    args = (400000, annual_rate, 360)
+    summary = mortgage_calc.amortization_summary(*args, extra_monthly, year)
+    from_schedule = mortgage_calc.schedule_summary(mortgage_calc.amortization_schedule(*args, extra_monthly), *args, year)
+
+    for name in ("monthly_payment", "num_payments", "months_saved"):
+        assert summary[name] == from_schedule[name]
+    for name in ("last_payment", "total_paid", "total_interest", "interest_saved"):
+        assert summary[name] == pytest.approx(from_schedule[name], abs=0.02)
+    for name in ("interest_paid", "principal_paid"):
+        assert summary["year"][name] == pytest.approx(from_schedule["year"][name], abs=0.02)
+
+
+def test_amortization_endpoint_streams_ndjson(client):
+    request = {"loan_amount": 400000, "annual_rate": 6.0, "term_months": 360}
+    full = client.post("/mortgage-analysis/amortization", json=request).json()
+    assert len(full["schedule"]) == 360
+
+    with client.stream("POST", "/mortgage-analysis/amortization", json={**request, "stream": True}) as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+    assert lines[0] == {"summary": full["summary"]}
+    assert lines[1:] == full["schedule"]
+
+    summary_only = client.post("/mortgage-analysis/amortization", json={**request, "summary_only": True}).json()
+    assert summary_only == {"summary": full["summary"]}
+
+
+@pytest.mark.parametrize("overrides", [{"year": 40}, {"extra_payments": {"12": -1}}])
+def test_amortization_endpoint_rejects_invalid_requests(client, overrides):
+    request = {"loan_amount": 400000, "annual_rate": 6.0, "term_months": 360, **overrides}
+    assert client.post("/mortgage-analysis/amortization", json=request).status_code == 400
+
+
+def approvable(home_value, down_payment, annual_income, total_debt, annual_rate, tax_rate=0.0, hoa=0.0):
+    """집값 하나가 28%/43%/LTV 조건을 모두 만족하는지 (스칼라 기준)"""
+    monthly_income = annual_income / 12
+    loan = max(home_value - down_payment, 0)
+    housing = scalar_payment(loan, annual_rate, 360) + home_value * tax_rate / 100 / 12 + hoa
+    return (
+        loan <= home_value * mortgage_calc.MAX_LTV_RATIO / 100 + 1e-6
+        and housing <= monthly_income * mortgage_calc.MAX_PAYMENT_TO_INCOME_RATIO / 100 + 1e-6
+        and total_debt + housing <= monthly_income * mortgage_calc.MAX_DTI_RATIO / 100 + 1e-6
+    )
+
+
+def bisect_price(down_for, *args, high=10_000_000):
+    low = 0.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        low, high = (mid, high) if approvable(mid, down_for(mid), *args) else (low, mid)
+    return low
+
+
+AFFORDABILITY_CASES = [
+    # annual_income, total_debt, annual_rate, tax_rate, hoa, down_payment
+    (120000, 500, 6.5, 0.0, 0.0, None),
+    (120000, 2500, 6.5, 1.2, 300.0, None),   # DTI 규칙이 제한
+    (200000, 0, 0.0, 0.0, 0.0, None),
+    (120000, 500, 6.5, 1.2, 0.0, 40000.0),   # 계약금이 제한
+    (120000, 500, 6.5, 0.0, 100.0, 300000.0),
+    (60000, 0, 7.0, 0.0, 0.0, 2_000_000.0),  # 대출이 필요 없는 경우
+]
+
+
+@pytest.mark.parametrize("income, debt, rate, tax_rate, hoa, down_payment", AFFORDABILITY_CASES)
+def test_max_affordable_price_matches_bisection(income, debt, rate, tax_rate, hoa, down_payment):
+    solved = mortgage_calc.max_affordable_price(
+        income, debt, 720, rate, 360,
+        down_payment=down_payment, tax_insurance_rate=tax_rate, hoa_monthly=hoa,
+    )
+    if down_payment is None:
+        down_for = lambda price: price * mortgage_calc.MIN_DOWN_PAYMENT_RATIO / 100  # noqa: E731
+    else:
+        down_for = lambda price: down_payment  # noqa: E731
+    expected = bisect_price(down_for, income, debt, rate, tax_rate, hoa)
+
+    price = float(solved["max_home_value"])
+    assert price == pytest.approx(expected, rel=1e-6)
+    assert float(solved["loan_amount"]) == pytest.approx(max(price - min(down_for(price), price), 0), abs=0.01)
+
+
+def test_max_affordable_price_vectorized_matches_single():
+    columns = list(zip(*AFFORDABILITY_CASES))
+    income, debt, rate, tax_rate, hoa = (np.array(column, dtype="float64") for column in columns[:5])
+    by_pct = mortgage_calc.max_affordable_price(income, debt, 720, rate, 360, tax_insurance_rate=tax_rate, hoa_monthly=hoa)
+
+    for i, case in enumerate(AFFORDABILITY_CASES):
+        single = mortgage_calc.max_affordable_price(case[0], case[1], 720, case[2], 360, tax_insurance_rate=case[3], hoa_monthly=case[4])
+        assert by_pct["max_home_value"][i] == pytest.approx(float(single["max_home_value"]))
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"credit_score": 600},
+    {"total_debt": 5000},
+    {"down_payment_pct": 10},
+])
+def test_max_affordable_price_is_zero_when_not_approvable(kwargs):
+    args = {"annual_income": 120000, "total_debt": 500, "credit_score": 720, "annual_rate": 6.5, "term_months": 360, **kwargs}
+    assert float(mortgage_calc.max_affordable_price(**args)["max_home_value"]) == 0
+
+
+def test_affordability_batch_endpoint_keeps_input_order(client):
+    applicants = [
+        {"annual_income": 120000, "total_debt": 500, "credit_score": 720, "annual_rate": 6.5, "down_payment": 40000},
+        {"annual_income": 120000, "total_debt": 500, "credit_score": 600, "annual_rate": 6.5},
+        {"annual_income": 200000, "total_debt": 0, "credit_score": 720, "annual_rate": 6.5},
+    ]
+    response = client.post("/mortgage-analysis/affordability/batch", json={"applicants": applicants})
+    assert response.status_code == 200
+    results = response.json()
+
+    assert [result["limiting_factor"] for result in results] == ["down_payment", "credit_score", "income"]
+    assert [result["approvable"] for result in results] == [True, False, True]
+    assert results[0]["max_home_value"] == pytest.approx(200000, abs=0.01)
+    single = client.post("/mortgage-analysis/affordability", json=applicants[2]).json()
+    assert single == results[2]
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+jwt = pytest.importorskip("jose.jwt")
+jwk = pytest.importorskip("jose.jwk")
+ec = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.ec")
+serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+
+import financial_profile  # noqa: E402
+from plaid_webhook import WebhookVerificationError, WebhookVerifier  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+BODY = json.dumps({"webhook_type": "TRANSACTIONS", "webhook_code": "DEFAULT_UPDATE", "item_id": "item-a"}).encode()
+
+
+class KeyServer:
+    """kid별 공개 키(JWK)를 돌려주는 /webhook_verification_key/get 대체 함수"""
+
+    def __init__(self):
+        private_key = ec.generate_private_key(ec.SECP256R1())
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self.key = {**jwk.construct(public_pem, "ES256").to_dict(), "kid": "key-1", "expired_at": None}
+        self.calls = 0
+
+    async def __call__(self, key_id):
+        self.calls += 1
+        if key_id != self.key["kid"]:
+            raise KeyError(key_id)
+        return self.key
+
+    def sign(self, body=BODY, issued_at=None, kid="key-1"):
+        claims = {
+            "iat": int(time.time() if issued_at is None else issued_at),
+            "request_body_sha256": hashlib.sha256(body).hexdigest(),
+        }
+        return jwt.encode(claims, self.private_pem, algorithm="ES256", headers={"kid": kid})
+
+
+@pytest.fixture
+def keys():
+    return KeyServer()
+
+
+async def test_valid_signature_is_accepted_and_key_is_cached(keys):
+    verifier = WebhookVerifier(keys)
+
+    claims = await verifier.verify(BODY, keys.sign())
+    assert claims["request_body_sha256"] == hashlib.sha256(BODY).hexdigest()
+    await verifier.verify(BODY, keys.sign())
+    assert keys.calls == 1
+
+
+async def test_tampered_body_is_rejected(keys):
+    verifier = WebhookVerifier(keys)
+    with pytest.raises(WebhookVerificationError):
+        await verifier.verify(BODY.replace(b"item-a", b"item-b"), keys.sign())
+
+
+async def test_old_token_is_rejected(keys):
+    verifier = WebhookVerifier(keys, max_age=300)
+    with pytest.raises(WebhookVerificationError):
+        await verifier.verify(BODY, keys.sign(issued_at=time.time() - 301))
+
+
+async def test_missing_header_unknown_key_and_expired_key_are_rejected(keys):
+    verifier = WebhookVerifier(keys)
+    with pytest.raises(WebhookVerificationError):
+        await verifier.verify(BODY, None)
+    with pytest.raises(WebhookVerificationError):
+        await verifier.verify(BODY, keys.sign(kid="key-2"))
+
+    keys.key["expired_at"] = int(time.time())
+    with pytest.raises(WebhookVerificationError):
+        await WebhookVerifier(keys).verify(BODY, keys.sign())
+
+
+async def test_other_algorithms_are_rejected(keys):
+    verifier = WebhookVerifier(keys)
+    token = jwt.encode({"iat": int(time.time())}, "secret", algorithm="HS256", headers={"kid": "key-1"})
+    with pytest.raises(WebhookVerificationError):
+        await verifier.verify(BODY, token)
+    assert keys.calls == 0
+
+
+@pytest.fixture
+def webhook_client(keys, tmp_path, monkeypatch):
+    monkeypatch.setenv("PLAID_CLIENT_ID", "test")
+    monkeypatch.setenv("PLAID_SECRET", "test")
+    import LinkToken
+
+    service = financial_profile.FinancialProfileService(
+        store=financial_profile.FinancialProfileStore(tmp_path / "profiles.sqlite3")
+    )
+    monkeypatch.setattr(LinkToken, "profile_service", service)
+    monkeypatch.setattr(LinkToken, "webhook_verifier", WebhookVerifier(keys))
+    app = FastAPI()
+    app.include_router(LinkToken.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_webhook_endpoint_requires_a_valid_signature(webhook_client, keys):
+    assert webhook_client.post("/plaid/webhook", content=BODY).status_code == 401
+    forged = keys.sign(body=b"{}")
+    response = webhook_client.post("/plaid/webhook", content=BODY, headers={"Plaid-Verification": forged})
+    assert response.status_code == 401
+
+    response = webhook_client.post("/plaid/webhook", content=BODY, headers={"Plaid-Verification": keys.sign()})
+    assert response.status_code == 200
+    # 연결되지 않은 item의 webhook은 무시
+    assert response.json() == {"status": "ignored"}
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from property_geo import GridIndex, haversine_miles
+
+QUERIES = [(34.05, -118.24), (37.77, -122.42), (32.0, -124.5), (45.0, -100.0)]
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(42)
+    lats = rng.uniform(32.0, 42.0, 3000)
+    lngs = rng.uniform(-124.0, -114.0, 3000)
+    return np.arange(3000) * 10, lats, lngs
+
+
+@pytest.fixture(scope="module", params=[0.05, 0.5])
+def grid(points, request):
+    return GridIndex.build(*points, cell_size=request.param)
+
+
+def brute_force(points, lat, lng):
+    positions, lats, lngs = points
+    distances = haversine_miles(lat, lng, lats, lngs)
+    order = np.argsort(distances, kind="stable")
+    return positions[order], distances[order]
+
+
+def test_haversine_known_distance():
+    # 로스앤젤레스 - 샌프란시스코 약 347마일
+    distance = haversine_miles(34.0522, -118.2437, np.array([37.7749]), np.array([-122.4194]))[0]
+    assert distance == pytest.approx(347.4, abs=1.0)
+
+
+@pytest.mark.parametrize("lat, lng", QUERIES)
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest_matches_brute_force(grid, points, lat, lng, k):
+    positions, distances = grid.nearest(lat, lng, k)
+    expected_positions, expected_distances = brute_force(points, lat, lng)
+
+    assert positions.tolist() == expected_positions[:k].tolist()
+    np.testing.assert_allclose(distances, expected_distances[:k])
+
+
+@pytest.mark.parametrize("lat, lng", QUERIES)
+def test_nearest_respects_max_radius(grid, points, lat, lng):
+    positions, distances = grid.nearest(lat, lng, 20, max_radius_miles=25)
+    expected_positions, expected_distances = brute_force(points, lat, lng)
+    expected = expected_positions[:20][expected_distances[:20] <= 25]
+
+    assert positions.tolist() == expected.tolist()
+    assert (distances <= 25).all()
+
+
+@pytest.mark.parametrize("lat, lng", QUERIES)
+@pytest.mark.parametrize("radius", [5, 30, 120])
+def test_radius_matches_brute_force(grid, points, lat, lng, radius):
+    positions, distances = grid.radius(lat, lng, radius)
+    expected_positions, expected_distances = brute_force(points, lat, lng)
+    inside = expected_distances <= radius
+
+    assert positions.tolist() == expected_positions[inside].tolist()
+    np.testing.assert_allclose(distances, expected_distances[inside])
+    limited, _ = grid.radius(lat, lng, radius, limit=3)
+    assert limited.tolist() == expected_positions[inside][:3].tolist()
+
+
+@pytest.mark.parametrize("box", [(33.0, -119.0, 34.5, -117.0), (41.9, -124.0, 42.0, -123.9), (0.0, 0.0, 1.0, 1.0)])
+def test_bbox_matches_brute_force(grid, points, box):
+    south, west, north, east = box
+    positions, lats, lngs = points
+    inside = (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+
+    assert sorted(grid.bbox(south, west, north, east).tolist()) == positions[inside].tolist()
+
+
+def test_empty_index():
+    grid = GridIndex.build(np.empty(0, dtype="int64"), np.empty(0), np.empty(0))
+    assert len(grid.nearest(34.0, -118.0, 5)[0]) == 0
+    assert len(grid.radius(34.0, -118.0, 10)[0]) == 0
+    assert len(grid.bbox(33.0, -119.0, 35.0, -117.0)) == 0
@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import property_store
+from property_store import PropertyStore, iter_record_batches, to_records
+from routes import properties
+
+
+@pytest.fixture
+def client(properties_csv, tmp_path, monkeypatch):
+    store = PropertyStore(properties_csv, check_interval=0, snapshot_dir=tmp_path / "no-snapshot")
+    monkeypatch.setattr(property_store, "_store", store)
+    app = FastAPI()
+    app.include_router(properties.router)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("url", ["/api/properties?limit=2", "/api/properties/10", "/api/properties/stats/city"])
+def test_matching_etag_returns_304(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get(url, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_depends_on_query(client):
+    first = client.get("/api/properties?limit=2").headers["ETag"]
+    assert client.get("/api/properties?limit=3").headers["ETag"] != first
+    # 같은 필터 값(대소문자/공백 차이)은 같은 ETag
+    assert (
+        client.get("/api/properties?city=Seattle").headers["ETag"]
+        == client.get("/api/properties?city=%20seattle").headers["ETag"]
+    )
+
+
+def test_if_modified_since(client):
+    last_modified = client.get("/api/properties/10").headers["Last-Modified"]
+
+    assert client.get("/api/properties/10", headers={"If-Modified-Since": last_modified}).status_code == 304
+    old = "Mon, 01 Jan 2001 00:00:00 GMT"
+    assert client.get("/api/properties/10", headers={"If-Modified-Since": old}).status_code == 200
+
+
+def test_csv_change_invalidates_etag(client, properties_csv):
+    first = client.get("/api/properties?limit=2")
+    etag = first.headers["ETag"]
+
+    properties_csv.write_text(properties_csv.read_text().replace("10,Seattle,WA,500000", "10,Seattle,WA,510000", 1))
+    os.utime(properties_csv, ns=(1_700_000_000 * 10**9,) * 2)
+
+    response = client.get("/api/properties?limit=2", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["properties"][0]["price"] == 510000
+
+
+def test_unknown_property_is_404(client):
+    assert client.get("/api/properties/999").status_code == 404
+
+
+@pytest.mark.parametrize("headers, params", [({}, "&stream=1"), ({"Accept": "application/x-ndjson"}, "")])
+def test_stream_matches_json_page(client, headers, params):
+    page = client.get("/api/properties?limit=5&fields=id,price").json()
+
+    with client.stream("GET", f"/api/properties?limit=5&fields=id,price{params}", headers=headers) as response:
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert response.headers["X-Total-Count"] == str(page["total"])
+        assert response.headers["X-Next-Cursor"] == str(page["next_cursor"])
+        rows = [json.loads(line) for line in response.iter_lines() if line]
+    assert rows == page["properties"]
+
+
+def test_record_batches_cover_positions_in_order(client):
+    dataset = property_store.get_store().get()
+    batches = list(iter_record_batches(dataset, dataset.sorted_positions, ("id",), batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [row for batch in batches for row in batch] == to_records(dataset, dataset.sorted_positions, ("id",))
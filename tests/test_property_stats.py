@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+import property_stats
+from property_store import PropertyStore
+
+
+@pytest.fixture
+def dataset(properties_csv, tmp_path):
+    return PropertyStore(properties_csv, check_interval=0, snapshot_dir=tmp_path / "snapshot").get()
+
+
+def expected_groups(csv_path, column):
+    """pandas로 직접 계산한 그룹별 건수/중앙값 (유효 행, 첫 번째 RegionID만)"""
+    df = pd.read_csv(csv_path)
+    for name in ("RegionID", "price", "latitude", "longitude"):
+        df[name] = pd.to_numeric(df[name], errors="coerce")
+    df = df.dropna(subset=["RegionID", "price", "latitude", "longitude"]).drop_duplicates("RegionID")
+    grouped = df.groupby(df[column].astype(str).str.strip().str.lower())["price"]
+    return {key: (int(count), median) for key, count, median in zip(grouped.count().index, grouped.count(), grouped.median())}
+
+
+def test_groups_merge_case_and_whitespace_variants(dataset):
+    records, total = property_stats.group_records(property_stats.aggregate(dataset, "city")["table"], sort="key", descending=False)
+
+    assert [record["key"] for record in records] == ["Los Angeles", "Portland", "Seattle"]
+    assert total == 3
+    seattle = records[-1]
+    assert (seattle["count"], seattle["median"], seattle["min"], seattle["max"]) == (3, 600000.0, 500000.0, 700000.0)
+    assert sum(seattle["histogram"]) == 3
+
+
+@pytest.mark.parametrize("group_by, column", [("city", "City"), ("state", "State"), ("zipcode", "zipcode")])
+def test_count_and_median_match_pandas(dataset, properties_csv, group_by, column):
+    table = property_stats.aggregate(dataset, group_by)["table"]
+
+    actual = {str(key).lower(): (count, median) for key, count, median in zip(table["key"], table["count"], table["median"])}
+    assert actual == expected_groups(properties_csv, column)
+
+
+def test_filters_apply_before_grouping(dataset):
+    result = property_stats.aggregate(dataset, "city", filters={"state": "wa"}, min_price=550000)
+    records, _ = property_stats.group_records(result["table"])
+
+    assert [(record["key"], record["count"]) for record in records] == [("Seattle", 2)]
+    assert result["overall"]["count"] == 2
+    # 같은 필터 조합은 캐시된 결과를 반환
+    assert property_stats.aggregate(dataset, "city", filters={"state": "wa"}, min_price=550000) is result
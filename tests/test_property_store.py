@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+import pytest
+
+from property_snapshot import load_snapshot
+from property_store import FILTER_FIELDS, PropertyStore, build_snapshot, query_positions, to_records
+
+ALL_IDS = [10, 11, 12, 20, 21, 30, 31]
+
+
+@pytest.fixture
+def csv_store(properties_csv, tmp_path):
+    # 스냅샷이 없는 디렉터리를 지정해 항상 CSV에서 로드
+    return PropertyStore(properties_csv, check_interval=0, snapshot_dir=tmp_path / "no-snapshot")
+
+
+@pytest.fixture
+def dataset(csv_store):
+    return csv_store.get()
+
+
+def page_through(dataset, limit, **query):
+    """next_cursor를 따라 끝까지 읽은 (RegionID 목록, 페이지별 total)"""
+    ids, totals, cursor = [], [], None
+    while True:
+        positions, cursor, total = query_positions(dataset, cursor=cursor, limit=limit, **query)
+        ids.extend(dataset.columns["region_id"][positions].tolist())
+        totals.append(total)
+        if cursor is None:
+            return ids, totals
+
+
+def test_invalid_and_duplicate_region_ids_are_skipped(dataset):
+    assert dataset.sorted_ids.tolist() == ALL_IDS
+    # 숫자가 아닌 ID와 가격 누락 행
+    assert dataset.bad_row_count == 2
+    # 중복 ID는 첫 번째 행을 사용
+    assert dataset.duplicate_id_count == 1
+    assert dataset.columns["price"][dataset.position_of(10)] == 500000
+    assert dataset.position_of(999) is None
+    assert dataset.position_of(40) is None
+
+def test_records_use_typed_columns(dataset):
+    record = to_records(dataset, [dataset.position_of(11)])[0]
+    assert record["id"] == "11"
+    assert record["city"] == "seattle "
+    assert record["zipcode"] == "98102"
+    assert record["metro"] == "seattle  Metro"
+    assert record["price"] == 700000.0
+    assert np.isclose(record["latitude"], 47.61)
+
+
+def test_records_keep_position_order_and_project_fields(dataset):
+    positions = [dataset.position_of(31), dataset.position_of(10)]
+    assert to_records(dataset, positions, ("id", "price")) == [
+        {"id": "31", "price": 800000.0},
+        {"id": "10", "price": 500000.0},
+    ]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 100])
+def test_cursor_pages_cover_every_row_once_in_id_order(dataset, limit):
+    ids, totals = page_through(dataset, limit)
+    assert ids == ALL_IDS
+    assert set(totals) == {len(ALL_IDS)}
+
+
+def test_cursor_pages_with_filters(dataset):
+    # 필터 값은 대소문자/앞뒤 공백 무시
+    ids, totals = page_through(dataset, 2, filters={"city": " SEATTLE", "state": "wa"})
+    assert ids == [10, 11, 12]
+    assert set(totals) == {3}
+
+    ids, _ = page_through(dataset, 1, filters={"state": "CA"}, min_price=850000)
+    assert ids == [30]
+    positions, cursor, total = query_positions(dataset, filters={"city": "Nowhere"})
+    assert (len(positions), cursor, total) == (0, None, 0)
+
+
+def test_cursor_after_last_id_returns_empty_page(dataset):
+    positions, cursor, total = query_positions(dataset, cursor=31, limit=5)
+    assert len(positions) == 0
+    assert cursor is None
+    assert total == len(ALL_IDS)
+
+
+def set_mtime(path, seconds):
+    os.utime(path, ns=(seconds * 10**9, seconds * 10**9))
+
+
+def signature(path):
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def test_snapshot_matches_csv(properties_csv, tmp_path, dataset):
+    snapshot_dir = build_snapshot(properties_csv, tmp_path / "snapshot")
+    from_snapshot = PropertyStore(properties_csv, check_interval=0, snapshot_dir=snapshot_dir).get()
+
+    assert from_snapshot.source == "snapshot"
+    assert dataset.source == "csv"
+    assert to_records(from_snapshot, from_snapshot.sorted_positions) == to_records(dataset, dataset.sorted_positions)
+    assert (from_snapshot.bad_row_count, from_snapshot.duplicate_id_count) == (2, 1)
+    for name in FILTER_FIELDS:
+        for part, array in dataset.value_index[name].arrays().items():
+            np.testing.assert_array_equal(getattr(from_snapshot.value_index[name], part), array)
+    for part, array in dataset.geo.arrays().items():
+        np.testing.assert_array_equal(getattr(from_snapshot.geo, part), array)
+    assert query_positions(from_snapshot, filters={"city": "seattle"})[2] == 3
+
+
+def test_snapshot_is_stale_after_csv_edit(properties_csv, tmp_path):
+    snapshot_dir = build_snapshot(properties_csv, tmp_path / "snapshot")
+    store = PropertyStore(properties_csv, check_interval=0, snapshot_dir=snapshot_dir)
+    assert store.get().source == "snapshot"
+
+    # 내용은 그대로 두고 mtime만 바뀌면 해시가 같으므로 스냅샷을 계속 사용
+    set_mtime(properties_csv, 1_700_000_000)
+    assert load_snapshot(snapshot_dir, properties_csv, signature(properties_csv)) is not None
+
+    # 크기가 같은 수정도 내용 해시로 감지
+    properties_csv.write_text(properties_csv.read_text().replace("10,Seattle,WA,500000", "10,Seattle,WA,500001", 1))
+    set_mtime(properties_csv, 1_700_000_100)
+    assert load_snapshot(snapshot_dir, properties_csv, signature(properties_csv)) is None
+
+    dataset = store.get()
+    assert dataset.source == "csv"
+    assert dataset.columns["price"][dataset.position_of(10)] == 500001
+    assert store.reload_count == 1
+
+
+def test_store_loads_once_and_reloads_on_change(csv_store, properties_csv):
+    first = csv_store.get()
+    assert csv_store.get() is first
+
+    properties_csv.write_text(properties_csv.read_text().replace("10,Seattle,WA,500000", "10,Seattle,WA,510000", 1))
+    set_mtime(properties_csv, 1_700_000_000)
+    reloaded = csv_store.get()
+
+    assert reloaded is not first
+    assert reloaded.version == first.version + 1
+    assert reloaded.columns["price"][reloaded.position_of(10)] == 510000
+    # 진행 중인 요청이 잡고 있는 이전 데이터셋은 바뀌지 않음
+    assert first.columns["price"][first.position_of(10)] == 500000
+    assert csv_store.stats()["reload_count"] == 1
+
+
+def test_store_checks_the_file_at_most_once_per_interval(properties_csv, tmp_path):
+    store = PropertyStore(properties_csv, check_interval=3600, snapshot_dir=tmp_path / "no-snapshot")
+    first = store.get()
+    properties_csv.write_text(properties_csv.read_text() + "50,Boise,ID,300000,43.6,-116.2,83702\n")
+
+    assert store.get() is first
+    store.check_interval = 0
+    assert store.get().position_of(50) is not None
+
+
+def test_store_keeps_previous_data_when_reload_fails(csv_store, properties_csv):
+    first = csv_store.get()
+
+    properties_csv.write_text("not,a,property,file\n1,2,3,4\n")
+    assert csv_store.get() is first
+    properties_csv.unlink()
+    assert csv_store.get() is first
+    assert csv_store.reload_count == 0
+
+
+def test_store_without_csv_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        PropertyStore(tmp_path / "missing.csv", check_interval=0, snapshot_dir=tmp_path / "no-snapshot").get()
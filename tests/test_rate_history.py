@@ -0,0 +1,116 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import mortgage
+import rate_history
+from rate_history import RateHistoryStore
+from ttl_cache import AsyncTTLCache
+
+OBSERVATIONS = [
+    {"date": "2023-12-21", "rate": 6.67},
+    {"date": "2023-12-28", "rate": 6.61},
+    {"date": "2024-01-04", "rate": 6.62},
+    {"date": "2024-01-11", "rate": 6.66},
+    {"date": "2024-01-18", "rate": 6.60},
+    {"date": "2024-02-01", "rate": 6.63},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RateHistoryStore(tmp_path / "rates.sqlite3")
+
+
+class FakeFred:
+    """observation_start 이후의 관측치만 돌려주는 FRED 대체 함수"""
+
+    def __init__(self, observations):
+        self.observations = list(observations)
+        self.starts = []
+        self.error = None
+
+    async def __call__(self, observation_start=None):
+        self.starts.append(observation_start)
+        if self.error:
+            raise self.error
+        return [item for item in self.observations if observation_start is None or item["date"] >= observation_start]
+
+
+def test_observations_window_and_limit(store):
+    store.upsert(OBSERVATIONS)
+
+    assert store.latest_date() == "2024-02-01"
+    assert store.observations() == OBSERVATIONS
+    assert store.observations(start="2024-01-01", end="2024-01-18") == OBSERVATIONS[2:5]
+    # limit은 가장 최근 N개를 오래된 순으로
+    assert store.observations(limit=2) == OBSERVATIONS[-2:]
+
+
+@pytest.mark.anyio
+async def test_refresh_fetches_only_observations_after_the_latest_date(store):
+    fred = FakeFred(OBSERVATIONS[:4])
+    assert await store.refresh(fred) == "2024-01-11"
+    assert fred.starts == [None]
+
+    # 마지막 날짜의 수정값과 새 관측치만 받아옴
+    fred.observations = [{"date": "2024-01-11", "rate": 6.65}] + OBSERVATIONS[4:]
+    assert await store.refresh(fred) == "2024-02-01"
+    assert fred.starts == [None, "2024-01-11"]
+    assert store.observations(start="2024-01-11", end="2024-01-11") == [{"date": "2024-01-11", "rate": 6.65}]
+    assert len(store.observations()) == len(OBSERVATIONS)
+    assert store.stats()["last_fetched"] == 3
+
+
+def test_resample_averages_by_period(store):
+    store.upsert(OBSERVATIONS)
+
+    monthly = store.resample("monthly")
+    assert [row["date"] for row in monthly] == ["2023-12-01", "2024-01-01", "2024-02-01"]
+    assert monthly[1] == {"date": "2024-01-01", "rate": 6.6267, "min": 6.60, "max": 6.66, "count": 3}
+    assert store.resample("monthly", start="2024-01-05")[0]["count"] == 2
+
+    yearly = store.resample("yearly")
+    assert [(row["date"], row["count"]) for row in yearly] == [("2023-01-01", 2), ("2024-01-01", 4)]
+
+
+@pytest.fixture
+def fred(store, monkeypatch):
+    fred = FakeFred(OBSERVATIONS)
+    monkeypatch.setattr(rate_history, "_store", store)
+    monkeypatch.setattr(mortgage, "fetch_fred_observations", fred)
+    monkeypatch.setattr(mortgage, "fred_cache", AsyncTTLCache(ttl=3600, name="fred", error_ttl=300))
+    return fred
+
+
+@pytest.fixture
+def client(fred):
+    app = FastAPI()
+    app.include_router(mortgage.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_historical_endpoint_serves_the_local_store(client, fred):
+    assert client.get("/api/mortgage-rates/historical/").json() == OBSERVATIONS
+    assert client.get("/api/mortgage-rates/historical/?limit=2").json() == OBSERVATIONS[-2:]
+    monthly = client.get("/api/mortgage-rates/historical/?frequency=monthly&start=2024-01-01").json()
+    assert [row["date"] for row in monthly] == ["2024-01-01", "2024-02-01"]
+    # 한 번 받은 뒤에는 TTL 동안 FRED를 다시 호출하지 않음
+    assert fred.starts == [None]
+    assert client.get("/api/mortgage-rates/historical/?start=2024-02-01&end=2024-01-01").status_code == 400
+
+
+def test_historical_endpoint_uses_stored_data_when_fred_is_down(client, fred, store):
+    store.upsert(OBSERVATIONS[:3])
+    fred.error = ConnectionError("FRED unavailable")
+
+    assert client.get("/api/mortgage-rates/historical/").json() == OBSERVATIONS[:3]
+    assert client.get("/api/mortgage-rates/historical/").json() == OBSERVATIONS[:3]
+    # 실패는 error_ttl 동안 기억되어 한 번만 시도
+    assert fred.starts == ["2024-01-04"]
+
+
+def test_historical_endpoint_without_any_data_is_503(client, fred):
+    fred.error = ConnectionError("FRED unavailable")
+    assert client.get("/api/mortgage-rates/historical/").status_code == 503
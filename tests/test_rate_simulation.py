@@ -0,0 +1,117 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import mortgage
+import rate_simulation
+from rate_simulation import ArmTerms, chunk_plan, fit_rate_model, run_simulation
+
+TERMS = ArmTerms(principal=400000, initial_rate=6.0, term_months=360, fixed_months=60, reset_months=12)
+
+
+def weekly_history(monthly_levels):
+    """월 금리 수준마다 같은 값의 주간 관측치 4개 (월 평균 = 그 수준)"""
+    start = date(2000, 1, 1)
+    observations = []
+    for i, level in enumerate(monthly_levels):
+        month = date(start.year + (start.month - 1 + i) // 12, (start.month - 1 + i) % 12 + 1, 1)
+        observations.extend(
+            {"date": (month + timedelta(days=7 * week)).isoformat(), "rate": round(float(level), 4)}
+            for week in range(4)
+        )
+    return observations
+
+
+@pytest.fixture(scope="module")
+def history():
+    # mu=6, phi=0.95, sigma=0.2인 AR(1) 월 금리 20년
+    rng = np.random.default_rng(7)
+    levels = [6.0]
+    for _ in range(239):
+        levels.append(6.0 + 0.95 * (levels[-1] - 6.0) + 0.2 * rng.standard_normal())
+    return weekly_history(levels)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(rate_simulation, "CHUNK_PATHS", 500)
+    yield
+    rate_simulation.shutdown()
+
+
+def assert_ordered(summary):
+    values = [summary[f"p{q}"] for q in rate_simulation.PERCENTILES]
+    assert values == sorted(values)
+
+
+def test_chunk_plan_is_fixed_size_and_seeded(small_chunks):
+    plan = chunk_plan(1200, seed=3)
+
+    assert [size for size, _ in plan] == [500, 500, 200]
+    assert [seq.spawn_key for _, seq in plan] == [(0,), (1,), (2,)]
+    assert all(seq.entropy == 3 for _, seq in plan)
+    # 같은 시드는 같은 난수, 청크마다 다른 난수
+    first = [np.random.default_rng(seq).random() for _, seq in plan]
+    assert first == [np.random.default_rng(seq).random() for _, seq in chunk_plan(1200, seed=3)]
+    assert len(set(first)) == 3
+
+
+def test_mean_reverting_fit_recovers_parameters(history):
+    model = fit_rate_model(history, "mean_reverting")
+
+    assert model.phi == pytest.approx(0.95, abs=0.05)
+    assert model.sigma == pytest.approx(0.2, abs=0.03)
+    assert model.current == history[-1]["rate"]
+
+
+@pytest.mark.parametrize("kind", ["mean_reverting", "bootstrap"])
+def test_percentiles_are_ordered(history, small_chunks, kind):
+    result = run_simulation(TERMS, fit_rate_model(history, kind), paths=1200, seed=1)
+
+    fixed = result["payment_by_period"][0]
+    assert fixed["month"] == 1
+    assert fixed["p5"] == fixed["p95"] == result["initial_payment"]
+    for period in result["payment_by_period"]:
+        assert_ordered(period)
+    assert_ordered(result["max_payment"])
+    assert_ordered(result["total_interest"])
+    assert result["max_payment"]["p5"] >= result["initial_payment"] - 0.01
+    assert 0 <= result["probability_payment_shock_25pct"] <= result["probability_payment_increase"] <= 1
+
+
+@pytest.mark.anyio
+async def test_thread_and_process_paths_give_identical_results(history, small_chunks, monkeypatch):
+    model = fit_rate_model(history, "mean_reverting")
+    threaded = await rate_simulation.simulate(TERMS, model, paths=1200, seed=5)
+
+    monkeypatch.setattr(rate_simulation, "PROCESS_WORKERS", 2)
+    monkeypatch.setattr(rate_simulation, "PROCESS_THRESHOLD", 1000)
+    assert rate_simulation.executor_kind(1200) == "process"
+    pooled = await rate_simulation.simulate(TERMS, model, paths=1200, seed=5)
+
+    assert pooled == threaded
+    assert await rate_simulation.simulate(TERMS, model, paths=1200, seed=6) != threaded
+
+
+def test_endpoint_reports_execution_outside_the_cached_result(history, small_chunks, monkeypatch):
+    async def load_rate_history(*args, **kwargs):
+        return history
+
+    monkeypatch.setattr(mortgage, "load_rate_history", load_rate_history)
+    mortgage.simulation_cache.invalidate()
+    app = FastAPI()
+    app.include_router(mortgage.router)
+    request = {"loan_amount": 400000, "initial_rate": 6.0, "paths": 1000, "seed": 11}
+
+    with TestClient(app) as client:
+        first = client.post("/mortgage-analysis/rate-risk", json=request).json()
+        second = client.post("/mortgage-analysis/rate-risk", json=request).json()
+
+    assert first["executor"] == "thread"
+    assert second["executor"] == "cache"
+    assert first["payment_by_period"] == second["payment_by_period"]
+    cached = mortgage.simulation_cache.peek(first["params_hash"])
+    assert "executor" not in cached and "elapsed_seconds" not in cached
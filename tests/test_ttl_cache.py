@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from ttl_cache import AsyncTTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+class Loader:
+    """호출 횟수를 세는 loader (values를 순서대로 반환, Exception이면 raise)"""
+
+    def __init__(self, *values, delay: float = 0.0):
+        self.values = list(values)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        value = self.values.pop(0) if len(self.values) > 1 else self.values[0]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(ttl=60)
+    loader = Loader("v1", delay=0.02)
+    results = await asyncio.gather(*(cache.get("k", loader) for _ in range(5)))
+
+    assert results == ["v1"] * 5
+    assert await cache.get("k", loader) == "v1"
+    assert loader.calls == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["hits"] == 1
+
+
+async def test_stale_value_is_served_while_refreshing_in_background():
+    cache = AsyncTTLCache(ttl=0.02, stale_ttl=60)
+    loader = Loader("v1", "v2", delay=0.02)
+    assert await cache.get("k", loader) == "v1"
+    await asyncio.sleep(0.03)
+
+    # 만료 후 첫 조회는 기다리지 않고 이전 값을 반환
+    assert await asyncio.wait_for(cache.get("k", loader), timeout=0.01) == "v1"
+    assert await cache.get("k", loader) == "v1"
+    await asyncio.sleep(0.05)
+
+    assert cache.peek("k") == "v2"
+    assert loader.calls == 2
+    assert cache.stats()["stale"] == 2
+    assert cache.stats()["refreshes"] == 1
+
+
+async def test_failed_refresh_serves_previous_value():
+    cache = AsyncTTLCache(ttl=0)
+    loader = Loader("v1", RuntimeError("upstream down"))
+    assert await cache.get("k", loader) == "v1"
+
+    assert await cache.get("k", loader) == "v1"
+    assert cache.stats()["errors"] == 1
+    assert cache.stats()["stale_on_error"] == 1
+
+
+async def test_error_ttl_remembers_failures():
+    cache = AsyncTTLCache(ttl=60, error_ttl=0.05)
+    loader = Loader(RuntimeError("upstream down"), "v1")
+    with pytest.raises(RuntimeError):
+        await cache.get("k", loader)
+    # 실패를 기억하는 동안에는 loader를 다시 부르지 않음
+    with pytest.raises(RuntimeError):
+        await cache.get("k", loader)
+    cache.prefetch("k", loader)
+    assert loader.calls == 1
+
+    await asyncio.sleep(0.06)
+    assert await cache.get("k", loader) == "v1"
+    assert cache.stats()["backoff"] == 1
+    assert cache.stats()["failing"] == 0
+
+
+async def test_prefetch_loads_in_background_without_waiting():
+    cache = AsyncTTLCache(ttl=60)
+    loader = Loader("v1", delay=0.02)
+    cache.prefetch("k", loader)
+    assert cache.peek("k") is None
+
+    await asyncio.sleep(0.05)
+    cache.prefetch("k", loader)
+    assert cache.peek("k") == "v1"
+    assert loader.calls == 1
+
+async def test_force_refresh_bypasses_fresh_entry():
+    cache = AsyncTTLCache(ttl=60)
+    loader = Loader("v1", "v2")
+    await cache.get("k", loader)
+
+    assert await cache.get("k", loader, force_refresh=True) == "v2"
+    assert loader.calls == 2
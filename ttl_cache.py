@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fetched_at: float
+    expires_at: float
+    stale_until: float
+
+
+class AsyncTTLCache:
+    """TTL 캐시 + 요청 병합(single-flight) + stale-while-revalidate
+
+    - TTL 안: 캐시 값을 바로 반환
+    - TTL 이후 stale 기간 안: 이전 값을 반환하고 백그라운드에서 갱신
+    - 그 이후 또는 값이 없을 때: 조회 (같은 키의 동시 조회는 한 번만 실행)
+
+    조회가 실패해도 이전 값이 있으면 그 값을 반환합니다. error_ttl을 지정하면
+    실패를 그 시간 동안 기억해 다시 조회하지 않고, 이전 값(없으면 같은 오류)을
+    바로 반환합니다.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        name: str = "cache",
+        max_entries: int = 1024,
+        error_ttl: float = 0.0,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self.max_entries = max_entries
+        self.error_ttl = error_ttl
+        self._entries: Dict[Hashable, CacheEntry] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        # 키 -> (재시도 가능 시각, 마지막 오류)
+        self._failures: Dict[Hashable, Tuple[float, Exception]] = {}
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+            "stale_on_error": 0,
+            "backoff": 0,
+        }
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        force_refresh: bool = False,
+    ) -> Any:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is not None and not force_refresh:
+            if now < entry.expires_at:
+                self._metrics["hits"] += 1
+                return entry.value
+            if now < entry.stale_until:
+                # 오래된 값을 먼저 반환하고 갱신은 백그라운드에서
+                self._metrics["stale"] += 1
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        failure = None if force_refresh else self._recent_failure(key, now)
+        if failure is not None:
+            # 최근에 실패한 키는 다시 조회하지 않음
+            self._metrics["backoff"] += 1
+            if entry is None:
+                raise failure.with_traceback(None)
+            return entry.value
+
+        self._metrics["misses"] += 1
+        try:
+            return await self._load(key, loader)
+        except Exception:
+            if entry is None:
+                raise
+            self._metrics["stale_on_error"] += 1
+            logger.warning(f"[{self.name}] refresh failed for {key!r}; serving cached value")
+            return entry.value
+
+    def prefetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        """값이 없거나 만료되었으면 백그라운드에서 조회 (기다리지 않음)"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() < entry.expires_at:
+            return
+        self._refresh_in_background(key, loader)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """만료 여부와 관계없이 저장된 값 (없으면 None)"""
+        entry = self._entries.get(key)
+        return entry.value if entry is not None else None
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._entries.clear()
+            self._failures.clear()
+        else:
+            self._entries.pop(key, None)
+            self._failures.pop(key, None)
+
+    def _recent_failure(self, key: Hashable, now: float) -> Optional[Exception]:
+        failure = self._failures.get(key)
+        if failure is None:
+            return None
+        retry_at, error = failure
+        if now >= retry_at:
+            self._failures.pop(key, None)
+            return None
+        return error
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+        future = self._inflight.get(key)
+        if future is not None:
+            self._metrics["coalesced"] += 1
+        else:
+            future = asyncio.ensure_future(self._fetch(key, loader))
+            self._inflight[key] = future
+        # 한 호출자가 취소되어도 공유 조회는 계속 진행
+        return asyncio.shield(future)
+
+    async def _fetch(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except Exception as e:
+            self._metrics["errors"] += 1
+            logger.warning(f"[{self.name}] load failed for {key!r}: {str(e)}")
+            if self.error_ttl > 0:
+                self._failures[key] = (time.monotonic() + self.error_ttl, e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        now = time.monotonic()
+        self._failures.pop(key, None)
+        self._entries[key] = CacheEntry(
+            value=value,
+            fetched_at=now,
+            expires_at=now + self.ttl,
+            stale_until=now + self.ttl + self.stale_ttl,
+        )
+        if len(self._entries) > self.max_entries:
+            # 가장 먼저 만료되는 항목부터 제거
+            oldest = min(self._entries, key=lambda k: self._entries[k].expires_at)
+            self._entries.pop(oldest, None)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        if key in self._inflight or self._recent_failure(key, time.monotonic()) is not None:
+            return
+        self._metrics["refreshes"] += 1
+        future = self._load(key, loader)
+        # 백그라운드 갱신 실패는 로그만 남김 (_fetch에서 기록)
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._metrics["hits"] + self._metrics["stale"] + self._metrics["misses"] + self._metrics["backoff"]
+        served = self._metrics["hits"] + self._metrics["stale"]
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "error_ttl_seconds": self.error_ttl,
+            "failing": len(self._failures),
+            **self._metrics,
+            "hit_rate": round(served / lookups, 4) if lookups else None,
+        }